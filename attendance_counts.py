@@ -0,0 +1,53 @@
+"""
+Live attendance counters by course and status
+"""
+
+from config import ATTENDANCE_STATUSES
+
+
+class AttendanceCounts:
+    """Attendance row counts for the open record or event, keyed by (course, status)
+
+    The counts are seeded once from an aggregate query and then moved in
+    memory as statuses change, so displaying them never reads the database.
+    """
+
+    def __init__(self):
+        self._counts = {}
+
+    def seed(self, totals):
+        """Replace the counts with the rows of DatabaseManager.get_attendance_counts"""
+        self._counts = {(row['course'], row['status']): row['total'] for row in totals}
+
+    def add(self, course, status, count=1):
+        """Count new attendance rows"""
+        key = (course, status)
+        self._counts[key] = self._counts.get(key, 0) + count
+
+    def move(self, course, old_status, new_status):
+        """Move one row of a course from one status to another"""
+        if old_status != new_status:
+            self.add(course, old_status, -1)
+            self.add(course, new_status)
+
+    def total(self, status=None, course=None):
+        """Count the rows with a status and/or course, or all rows"""
+        return sum(count for (row_course, row_status), count in self._counts.items()
+                   if (status is None or row_status == status) and (course is None or row_course == course))
+
+    def courses(self):
+        """Return the courses with at least one row, sorted"""
+        return sorted({course for (course, _), count in self._counts.items() if count and course is not None})
+
+    def summary(self):
+        """Return e.g. '312 / 1,840 present' followed by the other statuses"""
+        total = self.total()
+        others = [f"{self.total(status):,} {status.lower()}" for status in ATTENDANCE_STATUSES
+                  if status != 'Present' and self.total(status)]
+        text = f"{self.total('Present'):,} / {total:,} present"
+        return f"{text} ({', '.join(others)})" if others else text
+
+    def course_summary(self):
+        """Return one 'course: present / total' line per course"""
+        return "\n".join(f"{course}: {self.total('Present', course):,} / {self.total(course=course):,}"
+                         for course in self.courses())
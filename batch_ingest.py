@@ -0,0 +1,140 @@
+"""
+Batch QR ingestion from image folders and recorded video files
+
+Frames are decoded with the same logic as the live scanner (qr_decode) across a
+process pool. Student IDs are de-duplicated and committed to one attendance
+record in a single batch. This module does not depend on Qt.
+"""
+
+import os
+from concurrent.futures import as_completed
+from datetime import datetime
+
+from pool_tasks import decode_images, decode_video_segment, spawn_pool
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.webp')
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.m4v', '.webm')
+IMAGE_CHUNK_SIZE = 16
+SEGMENTS_PER_WORKER = 4
+DEFAULT_SAMPLE_FPS = 6.0
+
+
+class IngestResult:
+    """Outcome of an ingestion run"""
+
+    __slots__ = ('found', 'unknown', 'frames', 'sources', 'committed', 'cancelled')
+
+    def __init__(self):
+        self.found = {}  # student_id -> (source, position), first sighting
+        self.unknown = {}
+        self.frames = 0
+        self.sources = 0
+        self.committed = 0
+        self.cancelled = False
+
+
+def collect_sources(paths):
+    """Expand files and directories into (image paths, video paths)"""
+    images, videos = [], []
+    for path in paths:
+        if os.path.isdir(path):
+            names = sorted(os.listdir(path))
+            candidates = [os.path.join(path, name) for name in names]
+        else:
+            candidates = [path]
+        for candidate in candidates:
+            extension = os.path.splitext(candidate)[1].lower()
+            if extension in IMAGE_EXTENSIONS:
+                images.append(candidate)
+            elif extension in VIDEO_EXTENSIONS:
+                videos.append(candidate)
+    return images, videos
+
+
+def _video_segments(path, workers, sample_fps):
+    """Split a video into (path, start, stop, step) tasks covering all its frames
+
+    Streamed containers such as WebM or Matroska may not report a frame count;
+    those are read in one segment with stop None, until the capture runs out.
+    """
+    import cv2
+
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise ValueError(f"Could not open video: {path}")
+    total = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+    capture.release()
+    step = max(1, round(fps / sample_fps)) if sample_fps else 1
+    if total <= 0:
+        return [(path, 0, None, step)]
+    count = max(1, min(workers * SEGMENTS_PER_WORKER, total // (step * 10) or 1))
+    size = -(-total // count)
+    # Segment boundaries fall on sampled frames so no frame is decoded twice
+    size = -(-size // step) * step
+    return [(path, start, min(start + size, total), step) for start in range(0, total, size)]
+
+
+def scan_sources(paths, workers=None, sample_fps=DEFAULT_SAMPLE_FPS, progress=None, cancelled=None):
+    """Decode all images and videos under paths in a process pool and return an IngestResult
+
+    Videos are sampled at sample_fps frames per second (None decodes every frame).
+    progress(done, total) is called as tasks finish and cancelled() is polled
+    between tasks.
+    """
+    result = IngestResult()
+    images, videos = collect_sources(paths)
+    result.sources = len(images) + len(videos)
+    workers = workers or os.cpu_count() or 1
+
+    tasks = [(decode_images, (images[i:i + IMAGE_CHUNK_SIZE],))
+             for i in range(0, len(images), IMAGE_CHUNK_SIZE)]
+    for video in videos:
+        tasks.extend((decode_video_segment, segment) for segment in _video_segments(video, workers, sample_fps))
+    if not tasks:
+        return result
+
+    pool = spawn_pool(workers)
+    try:
+        futures = [pool.submit(function, *args) for function, args in tasks]
+        for done, future in enumerate(as_completed(futures), 1):
+            frames, found = future.result()
+            result.frames += frames
+            for student_id, sighting in found.items():
+                result.found.setdefault(student_id, sighting)
+            if progress:
+                progress(done, len(tasks))
+            if cancelled and cancelled():
+                result.cancelled = True
+                break
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+    return result
+
+
+def ingest(db, record_id, paths, workers=None, sample_fps=DEFAULT_SAMPLE_FPS, dry_run=False,
+           progress=None, cancelled=None):
+    """Scan images and videos and mark the students found present in one record, in one batch
+
+    IDs not in the roster are reported in result.unknown and not committed.
+    result.committed counts the attendance rows the batch actually changed.
+    Nothing is committed when the scan is cancelled or dry_run is set.
+    """
+    if db.is_event_archived(record_id=record_id):
+        raise ValueError("This record belongs to an archived event; restore the event first.")
+    result = scan_sources(paths, workers, sample_fps, progress, cancelled)
+    roster = {str(student['student_id']) for student in db.get_all_students()}
+    for student_id in list(result.found):
+        if student_id not in roster:
+            result.unknown[student_id] = result.found.pop(student_id)
+    if result.cancelled or dry_run or not result.found:
+        return result
+
+    now = datetime.now().replace(microsecond=0)
+    changed = db.mark_students_present_batch(
+        [(student_id, record_id, None, now) for student_id in sorted(result.found)]
+    )
+    if changed is None:
+        raise RuntimeError("The database rejected the batch; see the console for details.")
+    result.committed = changed
+    return result
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Offscreen benchmark of the table population paths of the main window
+
+Runs MainWindow under Qt's offscreen platform against a stand-in database
+holding synthetic rosters, and times table builds, filter keystrokes and the
+refresh after a scan, including the repaint of the visible rows. No MySQL
+server or display is needed.
+
+Examples:
+    python bench_ui.py --output bench_ui.json
+    python bench_ui.py --sizes 1000 10000 --baseline bench_ui.json --tolerance 1.5
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+# Read the masterlist from the stand-in database rather than a local roster snapshot
+os.environ['ROSTER_CACHE_FILE'] = ''
+
+# Add the current directory to Python path to ensure imports work
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PyQt5.QtCore import QT_VERSION_STR
+from PyQt5.QtWidgets import QApplication
+
+from main_app import MainWindow
+from rows import AttendanceRow, EventRow, StudentRow
+
+DEFAULT_SIZES = (1000, 10000, 50000)
+RECORDS_PER_EVENT = 2
+EVENT_COUNT = 200
+EVENT_ID = 1
+FILTER_QUERY = "2023-01"
+MASTERLIST_QUERY = "mar"
+SCANS = 50
+
+NAMES = ("Maria", "Jose", "Ana", "Mark", "Angela", "John", "Kristine", "Paolo", "Grace", "Carlo")
+YEAR_LEVELS = ("1st Year", "2nd Year", "3rd Year", "4th Year")
+COURSES = ("BSCS", "BSIT", "BSIS", "BSEMC")
+STATUSES = ("Absent", "Absent", "Absent", "Present", "Excused")
+
+
+class SyntheticDatabase:
+    """Stand-in for DatabaseManager serving a generated roster from memory
+
+    Only the methods the benchmarked paths call are provided. Every call
+    builds fresh row objects, as a query would.
+    """
+
+    def __init__(self, size, seed=0):
+        rng = random.Random(seed)
+        self.students = [(f"{2020 + i % 5}-{i:05d}", f"{rng.choice(NAMES)} {i}",
+                          rng.choice(YEAR_LEVELS), rng.choice(COURSES)) for i in range(size)]
+        start = datetime(2026, 1, 1, 8, 0)
+        self.attendance = {
+            record_id: [(student, status, start + timedelta(seconds=i) if status != 'Absent' else None)
+                        for i, (student, status) in
+                        enumerate((student, rng.choice(STATUSES)) for student in self.students)]
+            for record_id in range(1, RECORDS_PER_EVENT + 1)
+        }
+        first_day = date(2025, 1, 1)
+        self.events = [(event_id, f"Event {event_id}", first_day + timedelta(days=event_id))
+                       for event_id in range(1, EVENT_COUNT + 1)]
+
+    def has_students(self):
+        return bool(self.students)
+
+    def is_event_archived(self, record_id=None, event_id=None):
+        return False
+
+    def get_change_cursor(self):
+        # No cursor disables the change feed polling
+        return None
+
+    def get_students_page(self, after_student_id=None, limit=None, compact=False):
+        rows = [StudentRow(*student) for student in self.students
+                if after_student_id is None or student[0] > after_student_id]
+        return rows[:limit] if limit else rows
+
+    def get_events_page(self, after=None, limit=None, compact=False):
+        ordered = sorted(self.events, key=lambda event: (event[2], event[0]), reverse=True)
+        rows = [EventRow(*event) for event in ordered if after is None or (event[2], event[0]) < after]
+        return rows[:limit] if limit else rows
+
+    def get_students_for_record(self, record_id, compact=False):
+        return [AttendanceRow(record_id, *student, status, timestamp)
+                for student, status, timestamp in self.attendance[record_id]]
+
+    def get_attendance_for_event(self, event_id, compact=False):
+        rows = []
+        for record_id in self.attendance:
+            rows.extend(self.get_students_for_record(record_id))
+        return rows
+
+    def get_attendance_counts(self, record_id=None, event_id=None):
+        totals = {}
+        records = [record_id] if record_id is not None else list(self.attendance)
+        for record in records:
+            for student, status, _ in self.attendance[record]:
+                key = (student[3], status)
+                totals[key] = totals.get(key, 0) + 1
+        return [{'course': course, 'status': status, 'total': total} for (course, status), total in totals.items()]
+
+    def mark_student_present(self, event_id, student_id):
+        return True
+
+    def update_attendance_status(self, event_id, student_id, status):
+        return True
+
+    def close(self):
+        pass
+
+
+def summarize(samples):
+    """Return min/median/max milliseconds of a list of durations in seconds"""
+    ms = [seconds * 1000 for seconds in samples]
+    return {'runs': len(ms), 'min_ms': round(min(ms), 2), 'median_ms': round(statistics.median(ms), 2),
+            'max_ms': round(max(ms), 2)}
+
+
+class Bench:
+    """Times actions on a shown MainWindow, including event processing and a repaint of a table"""
+
+    def __init__(self, app, window):
+        self.app = app
+        self.window = window
+
+    def time(self, action, table):
+        start = time.perf_counter()
+        action()
+        self.app.processEvents()
+        table.viewport().repaint()
+        return time.perf_counter() - start
+
+    def type_text(self, line_edit, text, filter_action, table):
+        """Time each keystroke of text, calling the filter directly instead of waiting for the debounce"""
+        samples = []
+        for length in range(1, len(text) + 1):
+            line_edit.blockSignals(True)
+            line_edit.setText(text[:length])
+            line_edit.blockSignals(False)
+            samples.append(self.time(filter_action, table))
+        line_edit.blockSignals(True)
+        line_edit.clear()
+        line_edit.blockSignals(False)
+        return samples
+
+    def run(self, size, repeat):
+        """Benchmark every path for a roster of size students"""
+        window = self.window
+        window.db = SyntheticDatabase(size)
+        window.current_event_id = EVENT_ID
+        attendance_page = window.attendance_page
+        attendance_table = attendance_page.attendance_table
+        masterlist_page = window.masterlist_page
+        masterlist_table = masterlist_page.masterlist_table
+        samples = {}
+
+        window.central_widget.setCurrentWidget(attendance_page)
+        window.current_record_id = None
+        samples['populate_attendance_table'] = [
+            self.time(lambda: window.populate_attendance_table(EVENT_ID), attendance_table) for _ in range(repeat)]
+
+        window.current_record_id = 1
+        samples['populate_students_table'] = [
+            self.time(lambda: window.populate_students_table(1), attendance_table) for _ in range(repeat)]
+
+        samples['filter_attendance_keystroke'] = []
+        for _ in range(repeat):
+            samples['filter_attendance_keystroke'] += self.type_text(
+                attendance_page.search_input, FILTER_QUERY, window.filter_attendance_table, attendance_table)
+        window.filter_attendance_table()
+
+        rng = random.Random(size)
+        scanned = rng.sample([student[0] for student in window.db.students], min(SCANS, size))
+        samples['refresh_after_scan'] = [
+            self.time(lambda: window.refresh_student_attendance(student_id, 'Present'), attendance_table)
+            for student_id in scanned]
+
+        window.central_widget.setCurrentWidget(masterlist_page)
+        samples['populate_masterlist_table'] = [
+            self.time(window.populate_masterlist_table, masterlist_table) for _ in range(repeat)]
+        # The first keystroke loads the rest of the roster, so it is reported on its own
+        samples['filter_masterlist_first_keystroke'] = []
+        samples['filter_masterlist_keystroke'] = []
+        for _ in range(repeat):
+            window.populate_masterlist_table()
+            keystrokes = self.type_text(masterlist_page.masterlist_search_input, MASTERLIST_QUERY,
+                                        window.filter_masterlist_table, masterlist_table)
+            samples['filter_masterlist_first_keystroke'].append(keystrokes[0])
+            samples['filter_masterlist_keystroke'] += keystrokes[1:]
+        window.filter_masterlist_table()
+
+        return {name: summarize(values) for name, values in samples.items()}
+
+
+def compare(results, baseline, tolerance):
+    """Return (size, path, baseline ms, current ms) for every median slower than tolerance x the baseline"""
+    regressions = []
+    for size, paths in results.items():
+        for path, stats in paths.items():
+            before = baseline.get(size, {}).get(path)
+            if before and stats['median_ms'] > before['median_ms'] * tolerance:
+                regressions.append((size, path, before['median_ms'], stats['median_ms']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offscreen benchmark of the main window table population paths")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="roster sizes to benchmark")
+    parser.add_argument('--repeat', type=int, default=3, help="runs of each build and of each typed query")
+    parser.add_argument('--output', default='bench_ui.json', help="JSON results file")
+    parser.add_argument('--baseline', help="earlier results file; exit with status 1 on a regression")
+    parser.add_argument('--tolerance', type=float, default=1.5,
+                        help="median slowdown over the baseline counted as a regression (default: 1.5)")
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    window = MainWindow(db=SyntheticDatabase(args.sizes[0]))
+    window.show()
+    app.processEvents()
+    bench = Bench(app, window)
+
+    results = {}
+    for size in args.sizes:
+        results[str(size)] = bench.run(size, args.repeat)
+        for path, stats in results[str(size)].items():
+            print(f"{size:>7} rows  {path:<36} median {stats['median_ms']:>9.2f} ms  max {stats['max_ms']:>9.2f} ms")
+
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'qt': QT_VERSION_STR,
+        'qpa_platform': os.environ.get('QT_QPA_PLATFORM'),
+        'records_per_event': RECORDS_PER_EVENT,
+        'results': results,
+    }
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to {args.output}")
+
+    window.close()
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file)['results'], args.tolerance)
+        for size, path, before, after in regressions:
+            print(f"Regression: {path} at {size} rows took {after:.2f} ms, baseline {before:.2f} ms")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,13 +2,76 @@
 Camera and QR code scanning functionality for the Attendance Management System
 """
 
+import time
 import cv2
 import numpy as np
-from pyzbar.pyzbar import decode
+from qr_decode import Calibration, available_decoders, get_decoder, to_grayscale
 from PyQt5.QtCore import QTimer
-from PyQt5.QtGui import QImage, QPixmap
-from PyQt5.QtCore import Qt
-from config import CAMERA_UPDATE_INTERVAL, CAMERA_DISPLAY_WIDTH, CAMERA_DISPLAY_HEIGHT
+from PyQt5.QtGui import QImage
+from config import (CAMERA_UPDATE_INTERVAL, CAMERA_IDLE_INTERVAL, CAMERA_IDLE_AFTER, MOTION_THRESHOLD,
+                    CAMERA_DISPLAY_WIDTH, CAMERA_DISPLAY_HEIGHT, SCAN_COOLDOWN,
+                    QR_DECODER, QR_CALIBRATION_FRAMES, PROFILE_DIR, PROFILE_FRAME_BATCH, CHECKIN_SERVICE_URL, STATION_NAME)
+from database import ArchivedEventError
+from metrics import REGISTRY
+
+FRAMES_CAPTURED = REGISTRY.counter('attendance_camera_frames_total', 'Frames read from the camera')
+CAPTURE_FPS = REGISTRY.gauge('attendance_camera_fps', 'Frames captured per second over the last second')
+CAPTURE_INTERVAL = REGISTRY.gauge('attendance_camera_interval_ms', 'Current camera polling interval')
+DECODE_SECONDS = REGISTRY.histogram('attendance_qr_decode_seconds', 'Time spent decoding QR codes in one frame')
+ACTIVE_DECODER = REGISTRY.gauge('attendance_qr_decoder_active', 'QR decoder backend in use (1) or not (0)',
+                                ('decoder',))
+SCANS = REGISTRY.counter('attendance_scans_total', 'QR codes processed by outcome', ('outcome',))
+SCAN_TO_COMMIT_SECONDS = REGISTRY.histogram('attendance_scan_to_commit_seconds',
+                                            'Time from reading a frame to committing the attendance')
+
+# Size of the thumbnails compared to detect motion
+MOTION_SIZE = (80, 60)
+
+
+class ScanRateController:
+    """Chooses the camera polling interval from motion in view and the measured cost of a frame
+    
+    Frames are polled every active_interval ms while something moves in front
+    of the camera and for idle_after seconds afterwards, then every
+    idle_interval ms. Motion switches back to the fast rate on the next frame.
+    When processing a frame takes longer than the interval allows, the
+    interval is stretched to the measured time so frames do not queue up on a
+    machine that cannot keep up. Only the per-frame work counts: waiting on
+    the camera and committing scans would otherwise slow polling down exactly
+    when students queue up to scan.
+    """
+    
+    # Weight of the latest frame in the moving average of frame processing time
+    SMOOTHING = 0.2
+    # Interval kept above the average processing time, leaving the event loop some slack
+    HEADROOM = 1.25
+    
+    def __init__(self, active_interval=CAMERA_UPDATE_INTERVAL, idle_interval=CAMERA_IDLE_INTERVAL,
+                 idle_after=CAMERA_IDLE_AFTER):
+        self.active_interval = active_interval
+        self.idle_interval = max(idle_interval, active_interval)
+        self.idle_after = idle_after
+        self.reset(0.0)
+    
+    def reset(self, now):
+        """Start over at the active rate, e.g. when the camera starts"""
+        self.last_activity = now
+        self.frame_ms = 0.0
+        self.interval = self.active_interval
+    
+    def update(self, now, active, frame_seconds):
+        """Record a processed frame and return the interval to poll the next one at
+        
+        active is whether the frame showed motion or a QR code, and
+        frame_seconds the time spent converting, decoding and drawing it.
+        """
+        self.frame_ms += self.SMOOTHING * (frame_seconds * 1000 - self.frame_ms)
+        if active:
+            self.last_activity = now
+        idle = now - self.last_activity >= self.idle_after
+        target = self.idle_interval if idle else self.active_interval
+        self.interval = max(target, round(self.frame_ms * self.HEADROOM))
+        return self.interval
 
 
 class CameraScanner:
@@ -21,12 +84,39 @@ class CameraScanner:
         self.cap = None
         self.timer = QTimer()
         self.timer.timeout.connect(self.update_frame)
+        self.last_scanned = {}
+        self.fps_window_start = time.perf_counter()
+        self.fps_window_frames = 0
+        # Frame buffers reused across frames; reallocated only when the camera resolution changes
+        self.frame_buffer = None
+        self.gray_buffer = None
+        self.display_buffer = None
+        self.display_image = None
+        # Thumbnails of the current and previous frame and their difference, for motion detection
+        self.motion_buffer = np.empty(MOTION_SIZE[::-1], dtype=np.uint8)
+        self.motion_previous = np.empty_like(self.motion_buffer)
+        self.motion_diff = np.empty_like(self.motion_buffer)
+        self.has_previous = False
+        self.rate = ScanRateController()
+        self.decoder = None
+        self.calibration = None
+        self.recalibrate = False
+        self.calibration_decoders = []
+        self.checkin_client = None
+        if CHECKIN_SERVICE_URL:
+            from checkin_service import CheckinClient
+            self.checkin_client = CheckinClient(CHECKIN_SERVICE_URL, STATION_NAME)
     
     def start_camera(self):
         """Start the camera and begin scanning"""
+        if self.decoder is None and not self.setup_decoder():
+            return
         self.cap = cv2.VideoCapture(0)
         if self.cap.isOpened():
-            self.timer.start(CAMERA_UPDATE_INTERVAL)
+            self.has_previous = False
+            self.rate.reset(time.perf_counter())
+            CAPTURE_INTERVAL.set(self.rate.interval)
+            self.timer.start(self.rate.interval)
         else:
             self.status_label.setText("Error: Could not open camera")
     
@@ -36,65 +126,234 @@ class CameraScanner:
         if self.cap:
             self.cap.release()
             self.cap = None
+        self.camera_label.clear_frame()
     
     def update_frame(self):
         """Update camera frame and scan for QR codes"""
+        if self.checkin_client:
+            self.collect_checkins()
         if self.cap and self.cap.isOpened():
-            ret, frame = self.cap.read()
+            frame_time = time.perf_counter()
+            # Decode into the previous frame's buffer instead of a new array
+            ret, frame = self.cap.read(self.frame_buffer)
             if ret:
-                # Convert frame to RGB for QR detection
-                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                if frame is not self.frame_buffer:
+                    self.allocate_buffers(frame)
+                self.count_frame(frame_time)
+                work_start = time.perf_counter()
+                gray = to_grayscale(frame, self.gray_buffer)
+                moved = self.detect_motion(gray)
                 
                 # Decode QR codes
-                decoded_objects = decode(rgb_frame)
+                with DECODE_SECONDS.time():
+                    decoded_objects = self.decode(gray)
                 
-                for obj in decoded_objects:
-                    # Draw rectangle around QR code
-                    points = obj.polygon
-                    if len(points) > 4:
-                        hull = cv2.convexHull(np.array([point for point in points], dtype=np.float32))
-                        hull = list(map(tuple, np.squeeze(hull)))
-                    else:
-                        hull = points
-                    
-                    n = len(hull)
-                    for j in range(0, n):
-                        cv2.line(frame, hull[j], hull[(j+1) % n], (0, 255, 0), 3)
+                commit_seconds = 0.0
+                for data, points in decoded_objects:
+                    # Draw the outline of the QR code
+                    outline = np.array(points, dtype=np.int32)
+                    if len(outline) > 4:
+                        outline = cv2.convexHull(outline)
+                    cv2.polylines(frame, [outline], True, (0, 255, 0), 3)
                     
                     # Process QR code data
-                    data = obj.data.decode('utf-8')
-                    self.process_qr_code(data)
+                    commit_start = time.perf_counter()
+                    self.process_qr_code(data, frame_time)
+                    commit_seconds += time.perf_counter() - commit_start
                 
                 # Convert frame to QImage and display
                 self.display_frame(frame)
+                self.adjust_rate(work_start, commit_seconds, moved or bool(decoded_objects))
+    
+    def detect_motion(self, gray):
+        """Compare a thumbnail of the frame with the previous one; True if the scene changed"""
+        cv2.resize(gray, MOTION_SIZE, dst=self.motion_buffer, interpolation=cv2.INTER_AREA)
+        if not self.has_previous:
+            moved = True
+            self.has_previous = True
+        else:
+            cv2.absdiff(self.motion_buffer, self.motion_previous, dst=self.motion_diff)
+            moved = cv2.mean(self.motion_diff)[0] >= MOTION_THRESHOLD
+        self.motion_buffer, self.motion_previous = self.motion_previous, self.motion_buffer
+        return moved
+    
+    def adjust_rate(self, work_start, commit_seconds, active):
+        """Apply the controller's interval for the next frame
+        
+        The frame's cost runs from work_start, after the camera read, to now,
+        less commit_seconds spent recording scans.
+        """
+        now = time.perf_counter()
+        interval = self.rate.update(now, active, now - work_start - commit_seconds)
+        if interval != self.timer.interval():
+            self.timer.setInterval(interval)
+            CAPTURE_INTERVAL.set(interval)
+    
+    def setup_decoder(self):
+        """Choose the QR decoder backend, starting a calibration when QR_DECODER is 'auto'
+        
+        The choice is kept for the rest of the session, across camera restarts.
+        """
+        try:
+            if QR_DECODER == 'auto':
+                decoders = available_decoders()
+                if not decoders:
+                    raise RuntimeError("No QR decoder is available; install pyzbar and zbar, or OpenCV")
+                self.use_decoder(decoders[0])
+                if len(decoders) > 1:
+                    self.calibration = Calibration(decoders)
+            else:
+                self.use_decoder(get_decoder(QR_DECODER))
+        except (ValueError, RuntimeError, ImportError, OSError) as e:
+            self.status_label.setText(f"Error: {e}")
+            return False
+        return True
+    
+    def use_decoder(self, decoder):
+        """Switch to a decoder backend and publish the choice as a metric"""
+        if self.decoder is not None:
+            ACTIVE_DECODER.set(0, decoder=self.decoder.name)
+        self.decoder = decoder
+        ACTIVE_DECODER.set(1, decoder=decoder.name)
+    
+    def decode(self, gray):
+        """Decode the QR codes in a grayscale frame with the current backend, or with all of them while calibrating
+        
+        Calibration times every backend on the same frames and, after
+        QR_CALIBRATION_FRAMES frames, keeps the fastest one that decodes
+        reliably. When no code was in view during calibration there is nothing
+        to compare, so the preferred backend is kept and calibration runs again
+        once it decodes a code.
+        """
+        if self.calibration is None:
+            results = self.decoder.decode(gray)
+            if results and self.recalibrate:
+                self.recalibrate = False
+                self.calibration = Calibration(self.calibration_decoders)
+            return results
+        
+        results = self.calibration.add(gray)
+        if self.calibration.frames >= QR_CALIBRATION_FRAMES:
+            self.finish_calibration()
+        return results
+    
+    def finish_calibration(self):
+        """Pick the decoder backend from the finished calibration"""
+        calibration, self.calibration = self.calibration, None
+        for line in calibration.summary():
+            print(f"QR decoder calibration: {line}")
+        if not calibration.has_codes():
+            self.calibration_decoders = calibration.decoders
+            self.recalibrate = True
+            return
+        self.use_decoder(calibration.choose())
+        print(f"QR decoder calibration: using {self.decoder.name}")
+    
+    def count_frame(self, now):
+        """Count a captured frame and update the FPS gauge once per second"""
+        FRAMES_CAPTURED.inc()
+        self.fps_window_frames += 1
+        elapsed = now - self.fps_window_start
+        if elapsed >= 1.0:
+            CAPTURE_FPS.set(round(self.fps_window_frames / elapsed, 1))
+            self.fps_window_start = now
+            self.fps_window_frames = 0
+    
+    def allocate_buffers(self, frame):
+        """Allocate the reused frame, grayscale and display buffers for the frame size
+        
+        The display buffer is the frame scaled to fit CAMERA_DISPLAY_WIDTH x
+        CAMERA_DISPLAY_HEIGHT, and display_image is a QImage wrapping it, so
+        showing a frame only resizes into memory the view already paints from.
+        """
+        h, w = frame.shape[:2]
+        scale = min(CAMERA_DISPLAY_WIDTH / w, CAMERA_DISPLAY_HEIGHT / h)
+        display_w, display_h = max(1, round(w * scale)), max(1, round(h * scale))
+        self.frame_buffer = frame
+        self.gray_buffer = np.empty((h, w), dtype=np.uint8)
+        self.display_buffer = np.empty((display_h, display_w, 3), dtype=np.uint8)
+        self.display_image = QImage(self.display_buffer.data, display_w, display_h,
+                                    self.display_buffer.strides[0], QImage.Format_BGR888)
     
     def display_frame(self, frame):
-        """Convert OpenCV frame to QImage and display it"""
-        h, w, ch = frame.shape
-        bytes_per_line = ch * w
-        qt_image = QImage(frame.data, w, h, bytes_per_line, QImage.Format_BGR888)
-        pixmap = QPixmap.fromImage(qt_image).scaled(
-            CAMERA_DISPLAY_WIDTH, CAMERA_DISPLAY_HEIGHT, 
-            Qt.KeepAspectRatio, Qt.SmoothTransformation
-        )
-        self.camera_label.setPixmap(pixmap)
-    
-    def process_qr_code(self, data):
-        """Process scanned QR code data"""
+        """Scale the frame into the display buffer and repaint the view"""
+        cv2.resize(frame, (self.display_buffer.shape[1], self.display_buffer.shape[0]),
+                   dst=self.display_buffer, interpolation=cv2.INTER_AREA)
+        self.camera_label.show_frame(self.display_image)
+    
+    def process_qr_code(self, data, frame_time=None):
+        """Process scanned QR code data
+        
+        A code held in front of the camera is decoded on every frame, so repeat
+        scans of the same student within SCAN_COOLDOWN seconds are ignored.
+        When a check-in service is configured the scan is handed to the
+        client's sender thread instead of being written to the database
+        directly, and its outcome is shown by collect_checkins; the service
+        then observes SCAN_TO_COMMIT_SECONDS when its writer commits the scan.
+        """
         try:
             student_id = data.strip()
+            now = time.perf_counter()
+            if frame_time is None:
+                frame_time = now
             
-            self.parent.db.mark_student_present(self.parent.current_event_id, student_id)
+            last_scanned = self.last_scanned.get(student_id)
+            if last_scanned is not None and now - last_scanned < SCAN_COOLDOWN:
+                SCANS.inc(outcome='duplicate')
+                return
+            # Forget scans past their cooldown so the map only holds the last few seconds
+            self.last_scanned = {scanned_id: scanned_at for scanned_id, scanned_at in self.last_scanned.items()
+                                 if now - scanned_at < SCAN_COOLDOWN}
+            self.last_scanned[student_id] = now
             
-            self.parent.populate_attendance_table(self.parent.current_event_id)
-            
-            self.status_label.setText(f"Scanned: {student_id} marked as Present")
-            
-            QTimer.singleShot(2000, lambda: self.status_label.setText("Point camera at QR code"))
+            if self.checkin_client:
+                self.checkin_client.submit(student_id, event_id=self.parent.current_event_id)
+                self.status_label.setText(f"Scanned: {student_id}, checking in...")
+                return
+            if not self.parent.db.mark_student_present(self.parent.current_event_id, student_id):
+                SCANS.inc(outcome='error')
+                self.status_label.setText(f"Error: could not mark {student_id} as Present")
+                return
+            SCAN_TO_COMMIT_SECONDS.observe(time.perf_counter() - frame_time)
+            self.confirm_scan(student_id)
             
+        except ArchivedEventError:
+            SCANS.inc(outcome='rejected')
+            self.status_label.setText(f"Rejected: {student_id} (the event is archived; restore it to scan)")
         except Exception as e:
+            SCANS.inc(outcome='error')
             self.status_label.setText(f"Error: {str(e)}")
     
+    def collect_checkins(self):
+        """Show the outcome of check-ins the service has answered since the last frame"""
+        for student_id, _, outcome, detail in self.checkin_client.completed():
+            if outcome == 'accepted':
+                self.confirm_scan(student_id)
+                continue
+            SCANS.inc(outcome=outcome)
+            if outcome == 'rejected':
+                self.status_label.setText(f"Rejected: {student_id} ({detail})")
+            else:
+                self.status_label.setText(f"Error: {detail}")
+    
+    def confirm_scan(self, student_id):
+        """Count a committed scan and show it in the attendance table and status label"""
+        SCANS.inc(outcome='committed')
+        
+        self.parent.refresh_student_attendance(student_id, 'Present')
+        
+        # The name comes from the local roster snapshot, not another query
+        student = self.parent.roster.get(student_id) if self.parent.roster is not None else None
+        name = f" ({student.fname})" if student is not None else ""
+        self.status_label.setText(f"Scanned: {student_id}{name} marked as Present")
+        
+        QTimer.singleShot(2000, lambda: self.status_label.setText("Point camera at QR code"))
+    
     def is_camera_active(self):
         """Check if camera is currently active"""
         return self.cap is not None and self.cap.isOpened()
+
+
+if PROFILE_DIR:
+    from profiling import install_profiling
+    install_profiling(CameraScanner, ('update_frame',), PROFILE_DIR, batch_size=PROFILE_FRAME_BATCH)
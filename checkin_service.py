@@ -0,0 +1,489 @@
+#!/usr/bin/env python3
+"""
+Local HTTP check-in service for the Attendance Management System
+
+Scanning stations post check-ins here instead of each holding its own MySQL
+connection. Check-ins are validated against an in-memory roster and committed
+in batches by a single writer thread, which owns the only database connection.
+This module does not depend on Qt.
+
+    POST /checkins       {"student_id": ..., "event_id": ... or "record_id": ...,
+                          "station": ..., "timestamp": "2026-10-19T09:30:00"}
+                         or a list of such objects; answers 202 with the
+                         accepted count and the rejected check-ins
+    POST /roster/reload  reload the roster on the next flush
+    GET  /health         queue, roster and commit counters as JSON
+    GET  /metrics        Prometheus text metrics
+
+Run against MySQL with `python checkin_service.py`, or against an in-memory
+roster seeded with the sample students with `python checkin_service.py --memory`.
+
+Check-ins the database keeps refusing are appended to CHECKIN_DEAD_LETTER_FILE
+as JSON lines in the POST /checkins format, so they can be posted again once
+the cause is fixed.
+"""
+
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib import request as urlrequest
+from urllib.error import URLError
+
+# Add the current directory to Python path to ensure imports work
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import (CHECKIN_SERVICE_HOST, CHECKIN_SERVICE_PORT, CHECKIN_BATCH_SIZE, CHECKIN_FLUSH_INTERVAL,
+                    CHECKIN_ROSTER_REFRESH, CHECKIN_MAX_ATTEMPTS, CHECKIN_DEAD_LETTER_FILE, SAMPLE_STUDENTS)
+from metrics import REGISTRY
+
+CHECKINS = REGISTRY.counter('attendance_checkins_total', 'Check-ins received by outcome', ('outcome',))
+BATCH_COMMIT_SECONDS = REGISTRY.histogram('attendance_checkin_batch_commit_seconds',
+                                          'Time spent committing one batch of check-ins')
+BATCH_SIZE = REGISTRY.histogram('attendance_checkin_batch_size', 'Check-ins committed per batch',
+                                buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000))
+# Observed by the writer from each check-in's station timestamp, so it assumes
+# the stations' clocks agree with the service's
+SCAN_TO_COMMIT_SECONDS = REGISTRY.histogram('attendance_scan_to_commit_seconds',
+                                            'Time from reading a frame to committing the attendance')
+
+
+class MemoryStore:
+    """In-memory stand-in for DatabaseManager, for running the service locally and in tests
+
+    Attendance is kept as {(record_id, student_id): (status, timestamp)},
+    records as {record_id: event_id} and archived events as a set of event IDs.
+    """
+
+    def __init__(self, students=SAMPLE_STUDENTS, records=None, archived_events=()):
+        self.students = [{'student_id': student[0], 'fname': student[1],
+                          'year_level': student[2], 'course': student[3]} for student in students]
+        self.records = dict(records or {1: 1})
+        self.archived_events = set(archived_events)
+        self.attendance = {(record_id, student['student_id']): ('Absent', None)
+                           for record_id in self.records for student in self.students}
+
+    def get_all_students(self):
+        return list(self.students)
+
+    def mark_students_present_batch(self, checkins):
+        from database import ArchivedEventError
+
+        archived = [checkin for checkin in checkins
+                    if (self.records.get(checkin[1]) if checkin[1] else checkin[2]) in self.archived_events]
+        if archived:
+            raise ArchivedEventError(checkins=archived)
+        changed = 0
+        for student_id, record_id, event_id, timestamp in checkins:
+            record_ids = [record_id] if record_id else [
+                record for record, event in self.records.items() if event == event_id]
+            for record in record_ids:
+                if (record, student_id) in self.attendance:
+                    self.attendance[(record, student_id)] = ('Present', timestamp)
+                    changed += 1
+        return changed
+
+    def close(self):
+        pass
+
+
+def parse_checkin(payload, station=None):
+    """Validate one check-in object and return (student_id, record_id, event_id, timestamp, station)
+
+    Raises ValueError describing the first problem found.
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("check-in must be an object")
+    student_id = str(payload.get('student_id') or '').strip()
+    if not student_id:
+        raise ValueError("student_id is required")
+    record_id = payload.get('record_id')
+    event_id = payload.get('event_id')
+    if not record_id and not event_id:
+        raise ValueError("record_id or event_id is required")
+    try:
+        record_id = int(record_id) if record_id else None
+        event_id = int(event_id) if event_id else None
+    except (TypeError, ValueError):
+        raise ValueError("record_id and event_id must be integers")
+    timestamp = payload.get('timestamp')
+    if timestamp:
+        try:
+            timestamp = datetime.fromisoformat(timestamp)
+        except (TypeError, ValueError):
+            raise ValueError("timestamp must be an ISO 8601 date and time")
+        if timestamp.tzinfo is not None:
+            # Attendance timestamps are stored as naive local time
+            timestamp = timestamp.astimezone().replace(tzinfo=None)
+    else:
+        timestamp = datetime.now()
+    return student_id, record_id, event_id, timestamp, payload.get('station') or station
+
+
+def _attendance_row(checkin):
+    """Return the (student_id, record_id, event_id, timestamp) row to store for a queued check-in
+
+    Check-ins keep the station's sub-second timestamp for SCAN_TO_COMMIT_SECONDS;
+    attendance is stored to the second.
+    """
+    student_id, record_id, event_id, timestamp = checkin[:4]
+    return student_id, record_id, event_id, timestamp.replace(microsecond=0)
+
+
+class CheckinService:
+    """Validates check-ins against the roster and commits them in batches from one writer thread
+
+    store_factory() is called on the writer thread to open the store, so a
+    DatabaseManager connection is only ever used by that thread.
+    """
+
+    def __init__(self, store_factory, batch_size=CHECKIN_BATCH_SIZE, flush_interval=CHECKIN_FLUSH_INTERVAL,
+                 roster_refresh=CHECKIN_ROSTER_REFRESH, max_attempts=CHECKIN_MAX_ATTEMPTS,
+                 dead_letter_file=CHECKIN_DEAD_LETTER_FILE):
+        self.store_factory = store_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.roster_refresh = roster_refresh
+        self.max_attempts = max(1, max_attempts)
+        self.dead_letter_file = dead_letter_file
+        self.roster = frozenset()
+        # (student_id, record_id, event_id, timestamp, station, failed attempts)
+        self.queue = queue.Queue()
+        self.committed = 0
+        self.failed_batches = 0
+        self.dead_letters = 0
+        self._reload = threading.Event()
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.error = None
+
+    def start(self):
+        """Start the writer thread and wait until the roster is loaded"""
+        self._thread = threading.Thread(target=self._run, name="checkin-writer", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self.error:
+            raise self.error
+
+    def stop(self):
+        """Commit what is queued and stop the writer thread"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def request_roster_reload(self):
+        self._reload.set()
+
+    def submit(self, payloads, station=None):
+        """Validate and queue check-ins, returning (accepted count, [(payload, reason)])"""
+        accepted = 0
+        rejected = []
+        for payload in payloads:
+            try:
+                checkin = parse_checkin(payload, station)
+            except ValueError as e:
+                rejected.append((payload, str(e)))
+                CHECKINS.inc(outcome='invalid')
+                continue
+            if checkin[0] not in self.roster:
+                rejected.append((payload, "unknown student"))
+                CHECKINS.inc(outcome='unknown_student')
+                continue
+            self.queue.put(checkin + (0,))
+            accepted += 1
+            CHECKINS.inc(outcome='accepted')
+        return accepted, rejected
+
+    def health(self):
+        return {'pending': self.queue.qsize(), 'roster': len(self.roster),
+                'committed': self.committed, 'failed_batches': self.failed_batches,
+                'dead_letters': self.dead_letters}
+
+    def _load_roster(self, store):
+        self.roster = frozenset(str(student['student_id']) for student in store.get_all_students())
+        return time.monotonic()
+
+    def _take_batch(self):
+        """Wait up to flush_interval for check-ins and return at most batch_size of them"""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        try:
+            store = self.store_factory()
+        except Exception as e:
+            self.error = e
+            self._ready.set()
+            return
+        try:
+            loaded_at = self._load_roster(store)
+            self._ready.set()
+            while not (self._stop.is_set() and self.queue.empty()):
+                if self._reload.is_set() or time.monotonic() - loaded_at > self.roster_refresh:
+                    self._reload.clear()
+                    loaded_at = self._load_roster(store)
+                batch = self._take_batch()
+                if batch:
+                    self._commit(store, batch)
+        finally:
+            self._ready.set()
+            store.close()
+
+    def _commit(self, store, batch):
+        from database import ArchivedEventError
+
+        # Repeated scans of the same student for the same scope only need the first
+        unique = {}
+        for checkin in batch:
+            unique.setdefault(checkin[:3], checkin)
+        checkins = list(unique.values())
+        rows = [_attendance_row(checkin) for checkin in checkins]
+        try:
+            with BATCH_COMMIT_SECONDS.time():
+                changed = store.mark_students_present_batch(rows)
+        except ArchivedEventError as err:
+            # Retrying cannot help until the event is restored; commit the others
+            archived = set(err.checkins)
+            self._dead_letter([checkin for checkin, row in zip(checkins, rows) if row in archived], "event archived")
+            rest = [checkin for checkin, row in zip(checkins, rows) if row not in archived]
+            if rest:
+                self._commit(store, rest)
+            return
+        if changed is not None:
+            BATCH_SIZE.observe(len(checkins))
+            self._record_commit(checkins)
+            return
+        self.failed_batches += 1
+        if self._stop.is_set():
+            self._dead_letter(checkins, "not committed at shutdown")
+            return
+
+        failed = checkins
+        if len(checkins) > 1 and any(checkin[5] for checkin in checkins):
+            # A batch that fails again may hold one row the database always refuses
+            # (a deleted record, say); commit the rows one by one so it cannot block the rest
+            failed = []
+            for checkin in checkins:
+                try:
+                    changed = store.mark_students_present_batch([_attendance_row(checkin)])
+                except ArchivedEventError:
+                    self._dead_letter([checkin], "event archived")
+                    continue
+                if changed is None:
+                    failed.append(checkin)
+                else:
+                    self._record_commit([checkin])
+        retry = []
+        for checkin in failed:
+            checkin = checkin[:5] + (checkin[5] + 1,)
+            if checkin[5] >= self.max_attempts:
+                self._dead_letter([checkin], f"failed {checkin[5]} times")
+            else:
+                retry.append(checkin)
+        # Put the rest back so they are retried with the next flush
+        for checkin in retry:
+            self.queue.put(checkin)
+        if retry:
+            time.sleep(self.flush_interval)
+
+    def _record_commit(self, checkins):
+        """Count committed check-ins and observe how long after their scan they were committed"""
+        self.committed += len(checkins)
+        now = datetime.now()
+        for checkin in checkins:
+            SCAN_TO_COMMIT_SECONDS.observe(max(0.0, (now - checkin[3]).total_seconds()))
+
+    def _dead_letter(self, checkins, reason):
+        """Give up on check-ins, appending them to the dead letter file"""
+        self.dead_letters += len(checkins)
+        CHECKINS.inc(len(checkins), outcome='dead_letter')
+        print(f"Error: dropped {len(checkins)} check-ins ({reason})")
+        if not self.dead_letter_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.dead_letter_file)), exist_ok=True)
+            with open(self.dead_letter_file, 'a') as file:
+                for student_id, record_id, event_id, timestamp, station, _ in checkins:
+                    file.write(json.dumps({'student_id': student_id, 'record_id': record_id, 'event_id': event_id,
+                                           'station': station, 'timestamp': timestamp.isoformat(),
+                                           'reason': reason}) + "\n")
+        except OSError as err:
+            print(f"Error writing dead letter check-ins: {err}")
+
+
+def make_handler(service):
+    """Build the request handler class bound to a CheckinService"""
+
+    class CheckinHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, body):
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            path = self.path.split('?')[0]
+            if path == '/health':
+                self._send_json(200, service.health())
+            elif path == '/metrics':
+                data = REGISTRY.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            else:
+                self._send_json(404, {'error': 'not found'})
+
+        def do_POST(self):
+            path = self.path.split('?')[0]
+            if path == '/roster/reload':
+                service.request_roster_reload()
+                self._send_json(202, {'reloading': True})
+                return
+            if path != '/checkins':
+                self._send_json(404, {'error': 'not found'})
+                return
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                payload = json.loads(self.rfile.read(length) or b'null')
+            except ValueError:
+                self._send_json(400, {'error': 'body must be JSON'})
+                return
+            payloads = payload if isinstance(payload, list) else [payload]
+            accepted, rejected = service.submit(payloads, station=self.headers.get('X-Station'))
+            self._send_json(202 if accepted or not rejected else 422, {
+                'accepted': accepted,
+                'rejected': [{'checkin': checkin, 'reason': reason} for checkin, reason in rejected],
+            })
+
+        def log_message(self, format, *args):
+            pass
+
+    return CheckinHandler
+
+
+def serve(service, host=CHECKIN_SERVICE_HOST, port=CHECKIN_SERVICE_PORT):
+    """Start service and return an HTTP server for it; call serve_forever() on the result"""
+    service.start()
+    return ThreadingHTTPServer((host, port), make_handler(service))
+
+
+class CheckinClient:
+    """Posts check-ins from a scanning station to the check-in service
+
+    check_in() blocks for the round trip. submit() queues the check-in for a
+    sender thread instead, and completed() returns the outcomes that have come
+    back since the last call, so a camera loop never waits on the network.
+    """
+
+    def __init__(self, url, station, timeout=2.0):
+        self.url = url.rstrip('/') + '/checkins'
+        self.station = station
+        self.timeout = timeout
+        self._pending = queue.Queue()
+        self._results = queue.Queue()
+        self._sender = None
+
+    def submit(self, student_id, event_id=None, record_id=None, tag=None):
+        """Queue a check-in for the sender thread, stamped with the current time
+
+        tag is handed back with the outcome, e.g. the time the frame was read.
+        """
+        if self._sender is None:
+            self._sender = threading.Thread(target=self._send_loop, name="checkin-sender", daemon=True)
+            self._sender.start()
+        self._pending.put((student_id, event_id, record_id, datetime.now(), tag))
+
+    def completed(self):
+        """Return (student_id, tag, outcome, detail) for check-ins answered since the last call
+
+        outcome is 'accepted', 'rejected' with the reason as detail, or 'error'
+        with the connection error as detail.
+        """
+        results = []
+        while True:
+            try:
+                results.append(self._results.get_nowait())
+            except queue.Empty:
+                return results
+
+    def _send_loop(self):
+        while True:
+            student_id, event_id, record_id, timestamp, tag = self._pending.get()
+            try:
+                reason = self.check_in(student_id, event_id, record_id, timestamp)
+            except (ConnectionError, OSError, ValueError) as e:
+                self._results.put((student_id, tag, 'error', str(e)))
+            else:
+                self._results.put((student_id, tag, 'rejected' if reason else 'accepted', reason))
+
+    def check_in(self, student_id, event_id=None, record_id=None, timestamp=None):
+        """Post one check-in; returns None on success or the reason it was rejected"""
+        body = json.dumps({
+            'student_id': student_id, 'event_id': event_id, 'record_id': record_id, 'station': self.station,
+            'timestamp': (timestamp or datetime.now()).isoformat(timespec='milliseconds'),
+        }).encode('utf-8')
+        req = urlrequest.Request(self.url, data=body, headers={'Content-Type': 'application/json'})
+        try:
+            with urlrequest.urlopen(req, timeout=self.timeout) as response:
+                result = json.load(response)
+        except URLError as e:
+            if hasattr(e, 'read'):
+                result = json.load(e)
+            else:
+                raise ConnectionError(f"Check-in service unavailable: {e.reason}")
+        if result.get('accepted'):
+            return None
+        rejected = result.get('rejected') or [{}]
+        return rejected[0].get('reason', "rejected")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local check-in service for scanning stations")
+    parser.add_argument('--host', default=CHECKIN_SERVICE_HOST)
+    parser.add_argument('--port', type=int, default=CHECKIN_SERVICE_PORT)
+    parser.add_argument('--memory', action='store_true',
+                        help="use an in-memory roster of the sample students instead of MySQL")
+    args = parser.parse_args(argv)
+
+    if args.memory:
+        store_factory = MemoryStore
+    else:
+        from database import DatabaseManager
+        store_factory = DatabaseManager
+
+    service = CheckinService(store_factory)
+    server = serve(service, args.host, args.port)
+    print(f"Check-in service listening on http://{args.host}:{server.server_port} "
+          f"({len(service.roster)} students in roster)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+        print(f"Committed {service.committed} check-ins")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
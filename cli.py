@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Headless command-line interface for the Attendance Management System
+
+Runs bulk operations (roster import, events, records, exports and QR badges)
+without the GUI, e.g. from cron on a server. This module never imports Qt,
+and OpenCV is only imported by the ingest command.
+
+Examples:
+    python cli.py import-roster students.csv
+    python cli.py sync-roster students.csv --delete-missing
+    python cli.py create-event "General Assembly" --date 2026-11-05
+    python cli.py create-record 3 "Morning"
+    python cli.py export --event 3 assembly.parquet
+    python cli.py export-summary 3 assembly_summary.xlsx
+    python cli.py badges --sheets pdf
+    python cli.py archive --before 2026-06-01
+    python cli.py ingest 12 photos/ entrance.mp4
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime
+
+# Add the current directory to Python path to ensure imports work
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import QR_OUTPUT_DIR, QR_WORKERS
+from database import DatabaseManager, EVENT_ORDERS
+from exporters import EXPORT_FORMATS, export_attendance, export_event_pivot
+
+
+def progress_printer(label, quiet):
+    """Return a progress(done, total) callback printing to stderr, or None when quiet"""
+    if quiet:
+        return None
+
+    def progress(done, total):
+        suffix = f"/{total}" if total else ""
+        print(f"\r{label}: {done}{suffix}", end="", file=sys.stderr, flush=True)
+    return progress
+
+
+def parse_date(text):
+    """Parse a YYYY-MM-DD date argument"""
+    try:
+        return datetime.strptime(text, '%Y-%m-%d').date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date '{text}', expected YYYY-MM-DD")
+
+
+def cmd_import_roster(db, args):
+    if not db.import_students_from_csv(args.csv_file):
+        return 1
+    print(f"Imported roster from {args.csv_file}")
+    return 0
+
+
+def cmd_sync_roster(db, args):
+    result = db.sync_roster(args.csv_file, delete_missing=args.delete_missing, open_since=args.open_since)
+    if result is None:
+        return 1
+    print(", ".join(f"{count} {name.replace('_', ' ')}" for name, count in result.items()))
+    if result['kept_with_attendance']:
+        print(f"Warning: {result['kept_with_attendance']} students not in the CSV were kept because they have "
+              f"attendance history; delete them individually if that history should go too", file=sys.stderr)
+    return 0
+
+
+def cmd_events(db, args):
+    events = db.get_events_page(limit=args.limit, name=args.name, date_from=args.date_from,
+                                date_to=args.date_to, order=args.order)
+    for event in events:
+        archived = "\tarchived" if event['archived'] else ""
+        print(f"{event['event_id']}\t{event['event_date']}\t{event['event_name']}\t"
+              f"{event['record_count']} records\t{event['present_count']} present{archived}")
+    return 0
+
+
+def cmd_records(db, args):
+    for record in db.get_records_for_event(args.event_id):
+        print(f"{record['record_id']}\t{record['created_at']}\t{record['record_name']}")
+    return 0
+
+
+def cmd_create_event(db, args):
+    event_id = db.create_event(args.name, args.date)
+    if event_id is None:
+        return 1
+    print(event_id)
+    return 0
+
+
+def cmd_create_record(db, args):
+    record_id = db.create_attendance_record(args.name, args.event_id)
+    if record_id is None:
+        return 1
+    print(record_id)
+    return 0
+
+
+def cmd_export(db, args):
+    scope = {'record_id': args.record} if args.record else {'event_id': args.event}
+    title = args.title or (f"Record {args.record}" if args.record else f"Event {args.event}")
+    count = export_attendance(db, args.output, title, fmt=args.format,
+                              progress=progress_printer("Exporting", args.quiet), **scope)
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(f"Exported {count} rows to {args.output}")
+    return 0
+
+
+def cmd_export_summary(db, args):
+    title = args.title or f"Event {args.event_id}"
+    count = export_event_pivot(db, args.output, args.event_id, title,
+                               progress=progress_printer("Exporting", args.quiet))
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(f"Exported {count} students to {args.output}")
+    return 0
+
+
+def cmd_badges(db, args):
+    from qr_badges import generate_badges, compose_sheets
+
+    students = db.get_all_students()
+    if not students:
+        print("No students found in the database.")
+        return 1
+    result = generate_badges(students, args.output_dir, workers=args.workers, force=args.force,
+                             progress=progress_printer("Generating", args.quiet))
+    if not args.quiet:
+        print(file=sys.stderr)
+    if args.sheets:
+        result.sheets = compose_sheets(students, args.output_dir, fmt=args.sheets)
+    print(f"{result.generated} generated, {result.skipped} unchanged, "
+          f"{result.removed} removed, {len(result.sheets)} sheet files in {args.output_dir}")
+    return 0
+
+
+def cmd_ingest(db, args):
+    # OpenCV is only needed, and imported, for this command
+    from batch_ingest import ingest
+
+    result = ingest(db, args.record_id, args.paths, workers=args.workers, sample_fps=args.sample_fps or None,
+                    dry_run=args.dry_run, progress=progress_printer("Decoding", args.quiet))
+    if not args.quiet:
+        print(file=sys.stderr)
+    for student_id, (source, seconds) in sorted(result.found.items()):
+        where = f"{source} at {seconds}s" if seconds is not None else source
+        print(f"{student_id}\t{where}")
+    for student_id in sorted(result.unknown):
+        print(f"{student_id}\tnot in roster, skipped")
+    if args.dry_run:
+        action = f"would mark {len(result.found)}"
+    else:
+        action = f"marked {result.committed} of {len(result.found)}"
+    print(f"{result.frames} frames from {result.sources} files: {action} students present, "
+          f"{len(result.unknown)} unknown IDs")
+    return 0
+
+
+def cmd_archive(db, args):
+    if args.before:
+        archived = db.archive_events_before(args.before)
+    else:
+        archived = [(event_id, db.archive_event(event_id)) for event_id in args.event_ids]
+    failed = 0
+    for event_id, moved in archived:
+        if moved is None:
+            print(f"Event {event_id}: not archived (already archived or failed)")
+            failed += 1
+        else:
+            print(f"Event {event_id}: archived {moved} attendance rows")
+    return 1 if failed else 0
+
+
+def cmd_restore(db, args):
+    moved = db.restore_event(args.event_id)
+    if moved is None:
+        return 1
+    print(f"Event {args.event_id}: restored {moved} attendance rows")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Attendance Management System command-line tools")
+    parser.add_argument('-q', '--quiet', action='store_true', help="do not print progress")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('import-roster', help="import students from a CSV file "
+                                  "(student_id, fname, year_level, course; header row skipped)")
+    command.add_argument('csv_file')
+    command.set_defaults(handler=cmd_import_roster)
+
+    command = commands.add_parser('sync-roster', help="apply only the differences between a roster CSV and the "
+                                  "students table, adding new students to open attendance records")
+    command.add_argument('csv_file')
+    command.add_argument('--delete-missing', action='store_true',
+                         help="delete students not in the CSV, except those with attendance rows")
+    command.add_argument('--open-since', type=parse_date,
+                         help="records of events dated on or after YYYY-MM-DD are open (default: today)")
+    command.set_defaults(handler=cmd_sync_roster)
+
+    command = commands.add_parser('events', help="list events with their record and present counts")
+    command.add_argument('--name', help="only events whose name contains this text")
+    command.add_argument('--from', dest='date_from', type=parse_date, help="only events on or after YYYY-MM-DD")
+    command.add_argument('--to', dest='date_to', type=parse_date, help="only events on or before YYYY-MM-DD")
+    command.add_argument('--order', choices=EVENT_ORDERS, default='newest')
+    command.add_argument('--limit', type=int, help="list at most this many events")
+    command.set_defaults(handler=cmd_events)
+
+    command = commands.add_parser('records', help="list the attendance records of an event")
+    command.add_argument('event_id', type=int)
+    command.set_defaults(handler=cmd_records)
+
+    command = commands.add_parser('create-event', help="create an event and print its ID")
+    command.add_argument('name')
+    command.add_argument('--date', type=parse_date, help="event date as YYYY-MM-DD (default: today)")
+    command.set_defaults(handler=cmd_create_event)
+
+    command = commands.add_parser('create-record', help="create an attendance record and print its ID")
+    command.add_argument('event_id', type=int)
+    command.add_argument('name')
+    command.set_defaults(handler=cmd_create_record)
+
+    command = commands.add_parser('export', help="export the attendance of a record or event")
+    scope = command.add_mutually_exclusive_group(required=True)
+    scope.add_argument('--record', type=int, help="record ID")
+    scope.add_argument('--event', type=int, help="event ID")
+    command.add_argument('output')
+    command.add_argument('--format', choices=EXPORT_FORMATS, help="default: from the file extension")
+    command.add_argument('--title', help="report title")
+    command.set_defaults(handler=cmd_export)
+
+    command = commands.add_parser('export-summary', help="export an event as a students x records workbook")
+    command.add_argument('event_id', type=int)
+    command.add_argument('output')
+    command.add_argument('--title', help="report title")
+    command.set_defaults(handler=cmd_export_summary)
+
+    command = commands.add_parser('badges', help="generate QR badges for all students")
+    command.add_argument('--output-dir', default=QR_OUTPUT_DIR)
+    command.add_argument('--workers', type=int, default=QR_WORKERS)
+    command.add_argument('--force', action='store_true', help="regenerate unchanged badges")
+    command.add_argument('--sheets', choices=('pdf', 'png'), help="also compose printable sheets")
+    command.set_defaults(handler=cmd_badges)
+
+    command = commands.add_parser('ingest', help="mark students present in a record from QR codes in "
+                                  "image folders and video files")
+    command.add_argument('record_id', type=int)
+    command.add_argument('paths', nargs='+', help="image files, video files or directories")
+    command.add_argument('--workers', type=int, help="decoding processes (default: one per CPU)")
+    command.add_argument('--sample-fps', type=float, default=6.0,
+                         help="video frames decoded per second of footage, 0 for every frame (default: 6)")
+    command.add_argument('--dry-run', action='store_true', help="report the students found without committing")
+    command.set_defaults(handler=cmd_ingest)
+
+    command = commands.add_parser('archive', help="move the attendance of past events to the archive tables")
+    target = command.add_mutually_exclusive_group(required=True)
+    target.add_argument('event_ids', type=int, nargs='*', default=[], help="event IDs to archive")
+    target.add_argument('--before', type=parse_date, help="archive every event dated before YYYY-MM-DD")
+    command.set_defaults(handler=cmd_archive)
+
+    command = commands.add_parser('restore', help="move an archived event's attendance back so it can be edited")
+    command.add_argument('event_id', type=int)
+    command.set_defaults(handler=cmd_restore)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        db = DatabaseManager()
+    except Exception as e:
+        print(f"Could not connect to the database: {e}", file=sys.stderr)
+        return 1
+    try:
+        return args.handler(db, args)
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
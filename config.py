@@ -3,6 +3,7 @@ Configuration file for the Attendance Management System
 """
 
 import os
+import platform
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -15,15 +16,82 @@ DB_NAME = os.getenv('DB_NAME', 'comsoc_attendance')
 DB_USER = os.getenv('DB_USER', 'root')
 DB_PASSWORD = os.getenv('DB_PASSWORD', '')
 
+# Per-user directory for local state such as the roster snapshot
+def _default_data_dir():
+    if platform.system() == 'Windows':
+        base = os.getenv('LOCALAPPDATA') or os.path.expanduser('~')
+    elif platform.system() == 'Darwin':
+        base = os.path.expanduser('~/Library/Application Support')
+    else:
+        base = os.getenv('XDG_DATA_HOME') or os.path.expanduser('~/.local/share')
+    return os.path.join(base, 'comsoc_attendance')
+
+
+DATA_DIR = os.getenv('DATA_DIR', '') or _default_data_dir()
+
 # Application settings
 APP_TITLE = os.getenv('APP_TITLE', "COMSOC Attendance Recorder")
 APP_WIDTH = int(os.getenv('APP_WIDTH', 900))
 APP_HEIGHT = int(os.getenv('APP_HEIGHT', 700))
 
+# Append a JSON line with startup milestones to this file when set
+STARTUP_REPORT_FILE = os.getenv('STARTUP_REPORT_FILE', '')
+
 # Camera settings
 CAMERA_UPDATE_INTERVAL = int(os.getenv('CAMERA_UPDATE_INTERVAL', 30))  # milliseconds
+# Polling slows to CAMERA_IDLE_INTERVAL once nothing has moved in view for CAMERA_IDLE_AFTER seconds
+CAMERA_IDLE_INTERVAL = int(os.getenv('CAMERA_IDLE_INTERVAL', 200))  # milliseconds
+CAMERA_IDLE_AFTER = float(os.getenv('CAMERA_IDLE_AFTER', 3))  # seconds
+MOTION_THRESHOLD = float(os.getenv('MOTION_THRESHOLD', 3))  # mean grey-level change that counts as motion
 CAMERA_DISPLAY_WIDTH = int(os.getenv('CAMERA_DISPLAY_WIDTH', 640))
 CAMERA_DISPLAY_HEIGHT = int(os.getenv('CAMERA_DISPLAY_HEIGHT', 480))
+SCAN_COOLDOWN = float(os.getenv('SCAN_COOLDOWN', 3))  # seconds before the same code is processed again
+
+# QR decoder backend: 'pyzbar', 'opencv' or 'auto' to benchmark the available
+# backends on the first QR_CALIBRATION_FRAMES camera frames and keep the fastest reliable one
+QR_DECODER = os.getenv('QR_DECODER', 'auto')
+QR_CALIBRATION_FRAMES = int(os.getenv('QR_CALIBRATION_FRAMES', 60))
+
+# Change feed polling between scanner stations
+ATTENDANCE_POLL_INTERVAL = int(os.getenv('ATTENDANCE_POLL_INTERVAL', 3000))  # milliseconds, 0 disables
+ATTENDANCE_POLL_OVERLAP = float(os.getenv('ATTENDANCE_POLL_OVERLAP', 2))  # seconds re-read to cover commit lag
+
+# Search settings
+SEARCH_DEBOUNCE_MS = int(os.getenv('SEARCH_DEBOUNCE_MS', 250))  # milliseconds
+
+# Number of rows fetched per page by lazily loaded tables
+TABLE_PAGE_SIZE = int(os.getenv('TABLE_PAGE_SIZE', 200))
+
+# Local roster snapshot loaded at startup and revalidated against MySQL in the background
+ROSTER_CACHE_FILE = os.getenv('ROSTER_CACHE_FILE', os.path.join(DATA_DIR, "roster_cache.bin"))  # empty disables
+ROSTER_REVALIDATE_INTERVAL = int(os.getenv('ROSTER_REVALIDATE_INTERVAL', 60000))  # milliseconds, 0 only at startup
+
+# QR badge generation
+QR_OUTPUT_DIR = os.getenv('QR_OUTPUT_DIR', os.path.join(os.getcwd(), "student_qrcodes"))
+QR_WORKERS = int(os.getenv('QR_WORKERS', 0)) or None  # None uses one process per CPU
+
+# Check-in service: when CHECKIN_SERVICE_URL is set, the scanner posts check-ins
+# there instead of writing to MySQL directly (see checkin_service.py)
+CHECKIN_SERVICE_URL = os.getenv('CHECKIN_SERVICE_URL', '')
+CHECKIN_SERVICE_HOST = os.getenv('CHECKIN_SERVICE_HOST', '127.0.0.1')
+CHECKIN_SERVICE_PORT = int(os.getenv('CHECKIN_SERVICE_PORT', 8765))
+CHECKIN_BATCH_SIZE = int(os.getenv('CHECKIN_BATCH_SIZE', 200))
+CHECKIN_FLUSH_INTERVAL = float(os.getenv('CHECKIN_FLUSH_INTERVAL', 0.5))  # seconds
+CHECKIN_ROSTER_REFRESH = float(os.getenv('CHECKIN_ROSTER_REFRESH', 300))  # seconds
+# Failed commits of a check-in before it is written to the dead letter file instead
+CHECKIN_MAX_ATTEMPTS = int(os.getenv('CHECKIN_MAX_ATTEMPTS', 5))
+CHECKIN_DEAD_LETTER_FILE = os.getenv('CHECKIN_DEAD_LETTER_FILE', os.path.join(DATA_DIR, 'checkin_dead_letters.jsonl'))
+STATION_NAME = os.getenv('STATION_NAME', platform.node())
+
+# Metrics: serve them at http://127.0.0.1:METRICS_PORT/metrics and/or write them to METRICS_FILE
+METRICS_PORT = int(os.getenv('METRICS_PORT', 0))  # 0 disables the endpoint
+METRICS_FILE = os.getenv('METRICS_FILE', '')
+METRICS_FILE_INTERVAL = int(os.getenv('METRICS_FILE_INTERVAL', 10000))  # milliseconds
+
+# Profiling: when set, page actions and the camera frame loop are profiled with
+# cProfile and tracemalloc and the results are written to this directory
+PROFILE_DIR = os.getenv('PROFILE_DIR', '')
+PROFILE_FRAME_BATCH = int(os.getenv('PROFILE_FRAME_BATCH', 300))  # frames aggregated per profile
 
 # UI styling
 BUTTON_STYLE = """
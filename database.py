@@ -4,13 +4,108 @@ Database management module for the Attendance Management System
 
 import pymysql
 import csv
+import hashlib
 from datetime import datetime
+from itertools import starmap
 from config import DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD, SAMPLE_STUDENTS
+from metrics import REGISTRY, instrument_methods
+from rows import AttendanceRow, EventRow, StudentRow
+
+DB_QUERY_SECONDS = REGISTRY.histogram('attendance_db_query_seconds',
+                                      'Time spent in DatabaseManager calls', ('query',))
+
+# Roster rows are compared by an MD5 of their fields joined with the unit separator;
+# ROSTER_HASH_SQL computes the same hash inside MySQL
+ROSTER_HASH_SQL = "MD5(CONCAT_WS(CHAR(31 USING utf8mb4), fname, year_level, course))"
+SYNC_CHUNK_SIZE = 1000
+
+# Orderings of the events page: (keyset columns, descending)
+EVENT_ORDERS = {
+    'newest': (('event_date', 'event_id'), True),
+    'oldest': (('event_date', 'event_id'), False),
+    'name': (('event_name', 'event_id'), False),
+}
+
+# Record and present counts per event: live events read the EventCounts row kept
+# current by triggers, archived events their EventSummaries row
+EVENT_SUMMARY_COLUMNS = '''CASE WHEN es.event_id IS NULL THEN COALESCE(ec.record_count, 0)
+                                ELSE es.record_count END AS record_count,
+                           CASE WHEN es.event_id IS NULL THEN COALESCE(ec.present_count, 0)
+                                ELSE es.present_count END AS present_count,
+                           es.event_id IS NOT NULL AS archived'''
+EVENT_SUMMARY_JOINS = '''LEFT JOIN EventSummaries es ON es.event_id = e.event_id
+                         LEFT JOIN EventCounts ec ON ec.event_id = e.event_id'''
+
+# Used instead when the EventCounts triggers could not be created, e.g. for lack
+# of the TRIGGER privilege: live events are counted on every read
+EVENT_SUMMARY_COLUMNS_COUNTED = '''CASE WHEN es.event_id IS NULL
+                                        THEN (SELECT COUNT(*) FROM AttendanceRecords ar WHERE ar.event_id = e.event_id)
+                                        ELSE es.record_count END AS record_count,
+                                   CASE WHEN es.event_id IS NULL
+                                        THEN (SELECT COUNT(*) FROM Attendance a
+                                              JOIN AttendanceRecords ar ON a.record_id = ar.record_id
+                                              WHERE ar.event_id = e.event_id AND a.status = 'Present')
+                                        ELSE es.present_count END AS present_count,
+                                   es.event_id IS NOT NULL AS archived'''
+EVENT_SUMMARY_JOINS_COUNTED = "LEFT JOIN EventSummaries es ON es.event_id = e.event_id"
+
+# Triggers keeping EventCounts in step with AttendanceRecords and Attendance.
+# Cascaded deletes fire no triggers; deleting an event drops its EventCounts row
+# by its own cascade, and students with attendance are never deleted.
+EVENT_COUNT_TRIGGERS = {
+    'event_counts_record_insert': '''AFTER INSERT ON AttendanceRecords FOR EACH ROW
+        INSERT INTO EventCounts (event_id, record_count, present_count) VALUES (NEW.event_id, 1, 0)
+        ON DUPLICATE KEY UPDATE record_count = record_count + 1''',
+    'event_counts_record_delete': '''BEFORE DELETE ON AttendanceRecords FOR EACH ROW
+        UPDATE EventCounts
+        SET record_count = record_count - 1,
+            present_count = present_count - (SELECT COUNT(*) FROM Attendance
+                                             WHERE record_id = OLD.record_id AND status = 'Present')
+        WHERE event_id = OLD.event_id''',
+    'event_counts_attendance_insert': '''AFTER INSERT ON Attendance FOR EACH ROW
+        UPDATE EventCounts ec JOIN AttendanceRecords ar ON ar.event_id = ec.event_id
+        SET ec.present_count = ec.present_count + 1
+        WHERE ar.record_id = NEW.record_id AND (NEW.status <=> 'Present')''',
+    'event_counts_attendance_update': '''AFTER UPDATE ON Attendance FOR EACH ROW
+        UPDATE EventCounts ec JOIN AttendanceRecords ar ON ar.event_id = ec.event_id
+        SET ec.present_count = ec.present_count + (NEW.status <=> 'Present') - (OLD.status <=> 'Present')
+        WHERE ar.record_id = NEW.record_id AND (NEW.status <=> 'Present') <> (OLD.status <=> 'Present')''',
+    'event_counts_attendance_delete': '''AFTER DELETE ON Attendance FOR EACH ROW
+        UPDATE EventCounts ec JOIN AttendanceRecords ar ON ar.event_id = ec.event_id
+        SET ec.present_count = ec.present_count - 1
+        WHERE ar.record_id = OLD.record_id AND (OLD.status <=> 'Present')''',
+}
+
+
+class ArchivedEventError(ValueError):
+    """Raised when attendance of an archived event is written; restore the event first
+
+    checkins holds the check-ins of a batch that target archived events.
+    """
+
+    def __init__(self, message="The event is archived; restore it before changing its attendance.", checkins=()):
+        super().__init__(message)
+        self.checkins = list(checkins)
+
+
+def roster_hash(fname, year_level, course):
+    """Return the hash used to detect changed roster rows"""
+    return hashlib.md5("\x1f".join((fname, year_level, course)).encode('utf-8')).hexdigest()
+
+
+def _chunks(items, size=SYNC_CHUNK_SIZE):
+    """Split a list into lists of at most size items"""
+    return [items[start:start + size] for start in range(0, len(items), size)]
 
 
 class DatabaseManager:
     """Handles all database operations for the attendance system"""
     
+    # Whether this process has brought the schema up to date, see ensure_schema
+    _schema_checked = False
+    # Whether the EventCounts triggers are installed, see create_tables
+    _event_counts_live = False
+    
     def __init__(self):
         """Initialize database connection"""
         try:
@@ -28,6 +123,22 @@ class DatabaseManager:
         except pymysql.Error as err:
             print(f"Error connecting to MySQL: {err}")
             raise
+        self.ensure_schema()
+    
+    def ensure_schema(self):
+        """Create missing tables, columns and indexes once per process
+        
+        Installs set up before a table such as EventSummaries existed get it on
+        the first connection, without re-running setup_database.py.
+        """
+        if DatabaseManager._schema_checked:
+            return
+        DatabaseManager._schema_checked = True
+        try:
+            self.create_tables()
+        except pymysql.Error:
+            # Reported by create_tables; queries on missing tables fail on their own
+            pass
     
     def create_tables(self):
         """Create necessary database tables if they don't exist"""
@@ -74,12 +185,113 @@ class DatabaseManager:
                     UNIQUE KEY unique_attendance (record_id, student_id)
                 )''')
                 
+                # Columns and indexes added after the first release of the schema
+                self._ensure_index(cursor, 'Events', 'idx_events_date', 'event_date, event_id')
+                self._ensure_column(
+                    cursor, 'Attendance', 'updated_at',
+                    'TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)'
+                )
+                self._ensure_index(cursor, 'Attendance', 'idx_attendance_changes', 'record_id, updated_at')
+                self._ensure_index(cursor, 'Attendance', 'idx_attendance_status', 'record_id, status')
+                self._ensure_index(cursor, 'Events', 'idx_events_name', 'event_name, event_id')
+                self._ensure_column(
+                    cursor, 'Students', 'updated_at',
+                    'TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)'
+                )
+                self._ensure_index(cursor, 'Students', 'idx_students_changes', 'updated_at')
+                
+                # Attendance of archived events, moved out of the hot Attendance table
+                cursor.execute('''CREATE TABLE IF NOT EXISTS AttendanceArchive (
+                    attendance_id INT PRIMARY KEY,
+                    record_id INT NOT NULL,
+                    student_id VARCHAR(20) NOT NULL,
+                    student_fname VARCHAR(50) NOT NULL,
+                    student_year_level VARCHAR(20) NOT NULL,
+                    student_course VARCHAR(50) NOT NULL,
+                    status ENUM('Present', 'Absent', 'Excused') DEFAULT 'Absent',
+                    timestamp TIMESTAMP NULL,
+                    updated_at TIMESTAMP(6) NOT NULL,
+                    FOREIGN KEY (record_id) REFERENCES AttendanceRecords(record_id) ON DELETE CASCADE,
+                    KEY idx_archive_record (record_id, student_id)
+                )''')
+                
+                # Aggregates kept for archived events; a row here marks the event as archived
+                cursor.execute('''CREATE TABLE IF NOT EXISTS EventSummaries (
+                    event_id INT PRIMARY KEY,
+                    record_count INT NOT NULL,
+                    student_count INT NOT NULL,
+                    present_count INT NOT NULL,
+                    absent_count INT NOT NULL,
+                    excused_count INT NOT NULL,
+                    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (event_id) REFERENCES Events(event_id) ON DELETE CASCADE
+                )''')
+                
+                # Live record and present counts per event, kept by EVENT_COUNT_TRIGGERS
+                cursor.execute('''CREATE TABLE IF NOT EXISTS EventCounts (
+                    event_id INT PRIMARY KEY,
+                    record_count INT NOT NULL DEFAULT 0,
+                    present_count INT NOT NULL DEFAULT 0,
+                    FOREIGN KEY (event_id) REFERENCES Events(event_id) ON DELETE CASCADE
+                )''')
+                
                 self.conn.commit()
                 print("Database tables created/verified successfully")
                 
         except pymysql.Error as err:
             print(f"Error creating tables: {err}")
             raise
+        self._ensure_event_count_triggers()
+    
+    def _ensure_event_count_triggers(self):
+        """Install the EventCounts triggers, filling EventCounts from scratch when any was missing
+        
+        Without the triggers, e.g. for lack of the TRIGGER privilege, the events
+        page falls back to counting live events on every read.
+        """
+        try:
+            with self.conn.cursor() as cursor:
+                created = [name for name, definition in EVENT_COUNT_TRIGGERS.items()
+                           if self._ensure_trigger(cursor, name, definition)]
+                if created:
+                    cursor.execute('''REPLACE INTO EventCounts (event_id, record_count, present_count)
+                                      SELECT ar.event_id, COUNT(*), COALESCE(SUM(p.present), 0)
+                                      FROM AttendanceRecords ar
+                                      LEFT JOIN (SELECT record_id, COUNT(*) AS present FROM Attendance
+                                                 WHERE status = 'Present' GROUP BY record_id) p
+                                             ON p.record_id = ar.record_id
+                                      GROUP BY ar.event_id''')
+                self.conn.commit()
+            DatabaseManager._event_counts_live = True
+        except pymysql.Error as err:
+            print(f"Error creating event count triggers, counting events on every read: {err}")
+            DatabaseManager._event_counts_live = False
+    
+    def _ensure_trigger(self, cursor, name, definition):
+        """Create a trigger if it is missing; returns whether it was created"""
+        cursor.execute('''SELECT 1 FROM information_schema.triggers
+                          WHERE trigger_schema = DATABASE() AND trigger_name = %s
+                          LIMIT 1''', (name,))
+        if cursor.fetchone():
+            return False
+        cursor.execute(f"CREATE TRIGGER {name} {definition}")
+        return True
+    
+    def _ensure_index(self, cursor, table, index_name, columns):
+        """Add an index to an existing table if it is missing"""
+        cursor.execute('''SELECT 1 FROM information_schema.statistics
+                          WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+                          LIMIT 1''', (table, index_name))
+        if not cursor.fetchone():
+            cursor.execute(f"ALTER TABLE {table} ADD INDEX {index_name} ({columns})")
+    
+    def _ensure_column(self, cursor, table, column, definition):
+        """Add a column to an existing table if it is missing"""
+        cursor.execute('''SELECT 1 FROM information_schema.columns
+                          WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+                          LIMIT 1''', (table, column))
+        if not cursor.fetchone():
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
     
     def import_students_from_csv(self, filename):
         """Import students from a CSV file"""
@@ -88,18 +300,32 @@ class DatabaseManager:
                 with open(filename, 'r') as file:
                     reader = csv.reader(file)
                     next(reader) 
-                    for row in reader:
-                        if len(row) >= 4:
-                            cursor.execute(
-                                "INSERT IGNORE INTO Students (student_id, fname, year_level, course) VALUES (%s, %s, %s, %s)", 
-                                (row[0], row[1], row[2], row[3])
-                            )
+                    students = [row[:4] for row in reader if len(row) >= 4]
+                # executemany sends the rows as multi-row INSERT statements
+                cursor.executemany(
+                    "INSERT IGNORE INTO Students (student_id, fname, year_level, course) VALUES (%s, %s, %s, %s)", 
+                    students
+                )
                 self.conn.commit()
                 return True
         except Exception as e:
             print(f"Error importing CSV: {e}")
             return False
     
+    def _fetch_rows(self, query, params, row_class=None):
+        """Run a query and return its rows as dicts, or as row_class objects built from plain tuples
+        
+        The compact form skips building a dict with repeated key strings per row;
+        the selected columns must be in the order of row_class's constructor.
+        """
+        if row_class is None:
+            with self.conn.cursor() as cursor:
+                cursor.execute(query, params)
+                return cursor.fetchall()
+        with self.conn.cursor(pymysql.cursors.Cursor) as cursor:
+            cursor.execute(query, params)
+            return list(starmap(row_class, cursor.fetchall()))
+    
     def get_all_students(self):
         """Retrieve all students from the database"""
         try:
@@ -110,20 +336,131 @@ class DatabaseManager:
             print(f"Error fetching students: {err}")
             return []
     
+    def has_students(self):
+        """Check whether at least one student exists without loading the roster"""
+        try:
+            with self.conn.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM Students LIMIT 1")
+                return cursor.fetchone() is not None
+        except pymysql.Error as err:
+            print(f"Error checking students: {err}")
+            return False
+    
+    def get_students_page(self, after_student_id=None, limit=None, compact=False):
+        """Retrieve students ordered by ID, starting after the given ID
+        
+        With compact=True the rows are StudentRow objects instead of dicts.
+        """
+        query = "SELECT student_id, fname, year_level, course FROM Students"
+        params = []
+        if after_student_id is not None:
+            query += " WHERE student_id > %s"
+            params.append(after_student_id)
+        query += " ORDER BY student_id"
+        if limit is not None:
+            query += " LIMIT %s"
+            params.append(limit)
+        try:
+            return self._fetch_rows(query, params, StudentRow if compact else None)
+        except pymysql.Error as err:
+            print(f"Error fetching students: {err}")
+            return []
+    
+    def get_roster_marker(self):
+        """Return the student count and latest Students.updated_at, which change whenever the roster does
+        
+        Returns a dict with total and changed_at keys, or None on failure.
+        """
+        try:
+            with self.conn.cursor() as cursor:
+                cursor.execute("SELECT COUNT(*) AS total, MAX(updated_at) AS changed_at FROM Students")
+                return cursor.fetchone()
+        except pymysql.Error as err:
+            print(f"Error reading roster marker: {err}")
+            return None
+    
+    def get_students_changed_since(self, since):
+        """Return StudentRow objects for students added or edited at or after since (all students for None)"""
+        query = "SELECT student_id, fname, year_level, course FROM Students"
+        params = []
+        if since is not None:
+            query += " WHERE updated_at >= %s"
+            params.append(since)
+        try:
+            return self._fetch_rows(query, params, StudentRow)
+        except pymysql.Error as err:
+            print(f"Error fetching changed students: {err}")
+            return None
+    
+    def get_student_ids(self):
+        """Return every student ID, e.g. to find students deleted since a roster snapshot"""
+        try:
+            with self.conn.cursor(pymysql.cursors.Cursor) as cursor:
+                cursor.execute("SELECT student_id FROM Students")
+                return [row[0] for row in cursor.fetchall()]
+        except pymysql.Error as err:
+            print(f"Error fetching student IDs: {err}")
+            return None
+    
     def get_all_events(self):
         """Retrieve all events from the database"""
         try:
             with self.conn.cursor() as cursor:
-                cursor.execute("SELECT event_id, event_name, event_date FROM Events")
+                cursor.execute("SELECT event_id, event_name, event_date FROM Events ORDER BY event_date DESC, event_id DESC")
                 return cursor.fetchall()
         except pymysql.Error as err:
             print(f"Error fetching events: {err}")
             return []
     
-    def create_event(self, name):
-        """Create a new event"""
+    def get_events_page(self, after=None, limit=None, compact=False, name=None, date_from=None, date_to=None,
+                        order='newest'):
+        """Retrieve a page of events with their record and present counts
+        
+        Events are filtered by a name substring and an inclusive date range and
+        sorted by one of EVENT_ORDERS; after is the key of the last event of the
+        previous page, the values of the order's keyset columns. With
+        compact=True the rows are EventRow objects instead of dicts.
+        """
+        columns, descending = EVENT_ORDERS[order]
+        if DatabaseManager._event_counts_live:
+            summary_columns, summary_joins = EVENT_SUMMARY_COLUMNS, EVENT_SUMMARY_JOINS
+        else:
+            summary_columns, summary_joins = EVENT_SUMMARY_COLUMNS_COUNTED, EVENT_SUMMARY_JOINS_COUNTED
+        query = f'''SELECT e.event_id, e.event_name, e.event_date, {summary_columns}
+                    FROM Events e
+                    {summary_joins}'''
+        conditions = []
+        params = []
+        if name:
+            escaped = name.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            conditions.append("e.event_name LIKE %s")
+            params.append(f"%{escaped}%")
+        if date_from is not None:
+            conditions.append("e.event_date >= %s")
+            params.append(date_from)
+        if date_to is not None:
+            conditions.append("e.event_date <= %s")
+            params.append(date_to)
+        if after is not None:
+            conditions.append(f"({', '.join('e.' + column for column in columns)}) {'<' if descending else '>'} (%s, %s)")
+            params.extend(after)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        direction = " DESC" if descending else ""
+        query += " ORDER BY " + ", ".join(f"e.{column}{direction}" for column in columns)
+        if limit is not None:
+            query += " LIMIT %s"
+            params.append(limit)
+        try:
+            return self._fetch_rows(query, params, EventRow if compact else None)
+        except pymysql.Error as err:
+            print(f"Error fetching events: {err}")
+            return []
+    
+    def create_event(self, name, event_date=None):
+        """Create a new event, dated today unless event_date is given"""
         try:
-            date = datetime.now().date()
+            date = event_date or datetime.now().date()
             with self.conn.cursor() as cursor:
                 cursor.execute("INSERT INTO Events (event_name, event_date) VALUES (%s, %s)", (name, date))
                 event_id = cursor.lastrowid
@@ -136,38 +473,136 @@ class DatabaseManager:
     def create_attendance_record(self, record_name, event_id):
         """Create a new attendance record for an event and initialize all students as absent"""
         try:
+            if self.is_event_archived(event_id=event_id):
+                print("Error creating attendance record: the event is archived, restore it first")
+                return None
+            self.conn.begin()
             with self.conn.cursor() as cursor:
                 # Create attendance record
                 cursor.execute("INSERT INTO AttendanceRecords (record_name, event_id) VALUES (%s, %s)", (record_name, event_id))
                 record_id = cursor.lastrowid
                 
-                # Initialize all students as absent for this record
-                students = self.get_all_students()
-                for student in students:
-                    cursor.execute(
-                        "INSERT INTO Attendance (record_id, student_id, student_fname, student_year_level, student_course, status) VALUES (%s, %s, %s, %s, %s, %s)",
-                        (record_id, student['student_id'], student['fname'], student['year_level'], student['course'], 'Absent')
-                    )
+                # Initialize all students as absent for this record in one statement
+                cursor.execute('''INSERT INTO Attendance (record_id, student_id, student_fname, student_year_level, student_course, status)
+                                  SELECT %s, student_id, fname, year_level, course, 'Absent' FROM Students''', (record_id,))
                 
-                self.conn.commit()
-                return record_id
+            self.conn.commit()
+            return record_id
         except pymysql.Error as err:
+            self.conn.rollback()
             print(f"Error creating attendance record: {err}")
             return None
     
-    def get_attendance_for_event(self, event_id):
-        """Get attendance records for a specific event"""
+    def get_attendance_for_event(self, event_id, compact=False):
+        """Get attendance records for a specific event
+        
+        With compact=True the rows are AttendanceRow objects instead of dicts.
+        """
         try:
+            table = self.attendance_table(event_id=event_id)
+            return self._fetch_rows(f'''SELECT a.record_id, a.student_id, a.student_fname, a.student_year_level, a.student_course, a.status, a.timestamp
+                                        FROM {table} a 
+                                        JOIN AttendanceRecords ar ON a.record_id = ar.record_id 
+                                        WHERE ar.event_id = %s''', (event_id,), AttendanceRow if compact else None)
+        except pymysql.Error as err:
+            print(f"Error fetching attendance: {err}")
+            return []
+    
+    def count_attendance(self, record_id=None, event_id=None):
+        """Count the attendance rows of a record or event"""
+        try:
+            table = self.attendance_table(record_id=record_id, event_id=event_id)
             with self.conn.cursor() as cursor:
-                cursor.execute('''SELECT a.student_id, a.student_fname, a.student_year_level, a.student_course, a.status, a.timestamp
-                                  FROM Attendance a 
-                                  JOIN AttendanceRecords ar ON a.record_id = ar.record_id 
-                                  WHERE ar.event_id = %s''', (event_id,))
+                if record_id is not None:
+                    cursor.execute(f"SELECT COUNT(*) AS total FROM {table} WHERE record_id = %s", (record_id,))
+                else:
+                    cursor.execute(f'''SELECT COUNT(*) AS total
+                                      FROM {table} a
+                                      JOIN AttendanceRecords ar ON a.record_id = ar.record_id
+                                      WHERE ar.event_id = %s''', (event_id,))
+                return cursor.fetchone()['total']
+        except pymysql.Error as err:
+            print(f"Error counting attendance: {err}")
+            return 0
+    
+    def get_attendance_counts(self, record_id=None, event_id=None):
+        """Count the attendance rows of a record or event by course and status
+        
+        Returns dicts with course, status and total keys.
+        """
+        try:
+            table = self.attendance_table(record_id=record_id, event_id=event_id)
+            with self.conn.cursor() as cursor:
+                if record_id is not None:
+                    cursor.execute(f'''SELECT student_course AS course, status, COUNT(*) AS total
+                                      FROM {table} WHERE record_id = %s
+                                      GROUP BY student_course, status''', (record_id,))
+                else:
+                    cursor.execute(f'''SELECT a.student_course AS course, a.status, COUNT(*) AS total
+                                      FROM {table} a
+                                      JOIN AttendanceRecords ar ON a.record_id = ar.record_id
+                                      WHERE ar.event_id = %s
+                                      GROUP BY a.student_course, a.status''', (event_id,))
                 return cursor.fetchall()
         except pymysql.Error as err:
-            print(f"Error fetching attendance: {err}")
+            print(f"Error counting attendance: {err}")
             return []
     
+    def iter_attendance(self, record_id=None, event_id=None):
+        """Stream attendance rows of a record or event as tuples through a server-side cursor
+        
+        Rows are (student_id, student_fname, student_year_level, student_course, status, timestamp).
+        The connection cannot run other queries until the iterator is exhausted or closed.
+        """
+        table = self.attendance_table(record_id=record_id, event_id=event_id)
+        with self.conn.cursor(pymysql.cursors.SSCursor) as cursor:
+            if record_id is not None:
+                cursor.execute(f'''SELECT student_id, student_fname, student_year_level, student_course, status, timestamp
+                                  FROM {table}
+                                  WHERE record_id = %s''', (record_id,))
+            else:
+                cursor.execute(f'''SELECT a.student_id, a.student_fname, a.student_year_level, a.student_course, a.status, a.timestamp
+                                  FROM {table} a
+                                  JOIN AttendanceRecords ar ON a.record_id = ar.record_id
+                                  WHERE ar.event_id = %s''', (event_id,))
+            yield from cursor
+    
+    def count_event_students(self, event_id):
+        """Count the distinct students with attendance in any record of an event"""
+        try:
+            table = self.attendance_table(event_id=event_id)
+            with self.conn.cursor() as cursor:
+                cursor.execute(f'''SELECT COUNT(DISTINCT a.student_id) AS total
+                                  FROM {table} a
+                                  JOIN AttendanceRecords ar ON a.record_id = ar.record_id
+                                  WHERE ar.event_id = %s''', (event_id,))
+                return cursor.fetchone()['total']
+        except pymysql.Error as err:
+            print(f"Error counting event students: {err}")
+            return 0
+    
+    def iter_event_pivot(self, event_id, record_ids):
+        """Stream one tuple per student with their status in each of the given records
+        
+        Rows are (student_id, fname, year_level, course, <status per record_id>...,
+        present_count, absent_count, excused_count), computed by a single grouped query.
+        """
+        status_columns = "".join(
+            f"MAX(CASE WHEN a.record_id = %s THEN a.status END) AS record_{position}, "
+            for position in range(len(record_ids))
+        )
+        table = self.attendance_table(event_id=event_id)
+        with self.conn.cursor(pymysql.cursors.SSCursor) as cursor:
+            cursor.execute(f'''SELECT a.student_id, MAX(a.student_fname), MAX(a.student_year_level), MAX(a.student_course),
+                                      {status_columns}
+                                      SUM(a.status = 'Present'), SUM(a.status = 'Absent'), SUM(a.status = 'Excused')
+                               FROM {table} a
+                               JOIN AttendanceRecords ar ON a.record_id = ar.record_id
+                               WHERE ar.event_id = %s
+                               GROUP BY a.student_id
+                               ORDER BY a.student_id''', (*record_ids, event_id))
+            yield from cursor
+    
     def get_records_for_event(self, event_id):
         """Get all attendance records for a specific event"""
         try:
@@ -180,20 +615,55 @@ class DatabaseManager:
             print(f"Error fetching records: {err}")
             return []
     
-    def get_students_for_record(self, record_id):
-        """Get all students and their attendance for a specific record"""
+    def get_students_for_record(self, record_id, compact=False):
+        """Get all students and their attendance for a specific record
+        
+        With compact=True the rows are AttendanceRow objects instead of dicts.
+        """
+        try:
+            table = self.attendance_table(record_id=record_id)
+            return self._fetch_rows(f'''SELECT record_id, student_id, student_fname, student_year_level, student_course, status, timestamp
+                                        FROM {table} 
+                                        WHERE record_id = %s''', (record_id,), AttendanceRow if compact else None)
+        except pymysql.Error as err:
+            print(f"Error fetching students for record: {err}")
+            return []
+    
+    def get_change_cursor(self):
+        """Return the database clock, used as the starting point of an attendance change feed"""
         try:
             with self.conn.cursor() as cursor:
-                cursor.execute('''SELECT student_id, student_fname, student_year_level, student_course, status, timestamp
-                                  FROM Attendance 
-                                  WHERE record_id = %s''', (record_id,))
+                cursor.execute("SELECT NOW(6) AS now")
+                return cursor.fetchone()['now']
+        except pymysql.Error as err:
+            print(f"Error reading change cursor: {err}")
+            return None
+    
+    def get_attendance_changes(self, since, record_id=None, event_id=None):
+        """Get attendance rows of a record or event whose updated_at is later than since"""
+        try:
+            with self.conn.cursor() as cursor:
+                if record_id is not None:
+                    cursor.execute('''SELECT record_id, student_id, student_fname, student_year_level, student_course, status, timestamp, updated_at
+                                      FROM Attendance
+                                      WHERE record_id = %s AND updated_at > %s''', (record_id, since))
+                else:
+                    cursor.execute('''SELECT a.record_id, a.student_id, a.student_fname, a.student_year_level, a.student_course, a.status, a.timestamp, a.updated_at
+                                      FROM Attendance a
+                                      JOIN AttendanceRecords ar ON a.record_id = ar.record_id
+                                      WHERE ar.event_id = %s AND a.updated_at > %s''', (event_id, since))
                 return cursor.fetchall()
         except pymysql.Error as err:
-            print(f"Error fetching students for record: {err}")
+            print(f"Error fetching attendance changes: {err}")
             return []
     
     def update_attendance_status(self, event_id, student_id, status):
-        """Update attendance status for a specific student at a specific event"""
+        """Update attendance status for a specific student at a specific event
+        
+        Raises ArchivedEventError if the event is archived.
+        """
+        if self.is_event_archived(event_id=event_id):
+            raise ArchivedEventError()
         try:
             with self.conn.cursor() as cursor:
                 cursor.execute('''UPDATE Attendance a 
@@ -208,9 +678,190 @@ class DatabaseManager:
             return False
     
     def mark_student_present(self, event_id, student_id):
-        """Mark a student as present for a specific event"""
+        """Mark a student as present for a specific event; raises ArchivedEventError if it is archived"""
         return self.update_attendance_status(event_id, student_id, 'Present')
     
+    def mark_students_present_batch(self, checkins):
+        """Mark many check-ins present in one transaction
+        
+        checkins are (student_id, record_id, event_id, timestamp) tuples. A
+        check-in with a record_id marks that record only; otherwise every record
+        of event_id is marked. Returns the number of attendance rows changed, or
+        None if the batch failed and was rolled back.
+        Raises ArchivedEventError listing the check-ins for archived events, and
+        writes nothing, if there are any.
+        """
+        try:
+            archived = self._archived_checkins(checkins)
+        except pymysql.Error as err:
+            print(f"Error checking archived events: {err}")
+            return None
+        if archived:
+            raise ArchivedEventError(checkins=archived)
+        by_record = [('Present', timestamp, record_id, student_id)
+                     for student_id, record_id, event_id, timestamp in checkins if record_id]
+        by_event = [('Present', timestamp, event_id, student_id)
+                    for student_id, record_id, event_id, timestamp in checkins if not record_id]
+        try:
+            self.conn.begin()
+            with self.conn.cursor() as cursor:
+                changed = 0
+                if by_record:
+                    changed += cursor.executemany('''UPDATE Attendance 
+                                                     SET status = %s, timestamp = %s
+                                                     WHERE record_id = %s AND student_id = %s''', by_record) or 0
+                if by_event:
+                    changed += cursor.executemany('''UPDATE Attendance a 
+                                                     JOIN AttendanceRecords ar ON a.record_id = ar.record_id 
+                                                     SET a.status = %s, a.timestamp = %s
+                                                     WHERE ar.event_id = %s AND a.student_id = %s''', by_event) or 0
+            self.conn.commit()
+            return changed
+        except pymysql.Error as err:
+            self.conn.rollback()
+            print(f"Error committing check-ins: {err}")
+            return None
+    
+    def _archived_checkins(self, checkins):
+        """Return the (student_id, record_id, event_id, timestamp) check-ins whose event is archived"""
+        record_ids = sorted({record_id for _, record_id, _, _ in checkins if record_id})
+        event_ids = sorted({event_id for _, record_id, event_id, _ in checkins if not record_id})
+        archived_records = set()
+        archived_events = set()
+        with self.conn.cursor(pymysql.cursors.Cursor) as cursor:
+            for chunk in _chunks(record_ids):
+                placeholders = ", ".join(["%s"] * len(chunk))
+                cursor.execute(f'''SELECT ar.record_id FROM AttendanceRecords ar
+                                   JOIN EventSummaries es ON es.event_id = ar.event_id
+                                   WHERE ar.record_id IN ({placeholders})''', chunk)
+                archived_records.update(row[0] for row in cursor.fetchall())
+            for chunk in _chunks(event_ids):
+                placeholders = ", ".join(["%s"] * len(chunk))
+                cursor.execute(f"SELECT event_id FROM EventSummaries WHERE event_id IN ({placeholders})", chunk)
+                archived_events.update(row[0] for row in cursor.fetchall())
+        return [checkin for checkin in checkins
+                if (checkin[1] in archived_records if checkin[1] else checkin[2] in archived_events)]
+    
+    def attendance_table(self, record_id=None, event_id=None):
+        """Return the table holding the attendance of a record or event: Attendance, or AttendanceArchive once archived"""
+        return 'AttendanceArchive' if self.is_event_archived(record_id=record_id, event_id=event_id) else 'Attendance'
+    
+    def is_event_archived(self, record_id=None, event_id=None):
+        """Check whether an event, or the event of a record, has been archived"""
+        try:
+            with self.conn.cursor() as cursor:
+                if record_id is not None:
+                    cursor.execute('''SELECT 1 FROM EventSummaries es
+                                      JOIN AttendanceRecords ar ON ar.event_id = es.event_id
+                                      WHERE ar.record_id = %s''', (record_id,))
+                else:
+                    cursor.execute("SELECT 1 FROM EventSummaries WHERE event_id = %s", (event_id,))
+                return cursor.fetchone() is not None
+        except pymysql.Error as err:
+            print(f"Error checking archived event: {err}")
+            return False
+    
+    def archive_event(self, event_id):
+        """Move an event's attendance to AttendanceArchive, keeping its totals in EventSummaries
+        
+        Runs in one transaction. Returns the number of attendance rows moved,
+        or None if the event is already archived or archiving failed.
+        """
+        try:
+            if self.is_event_archived(event_id=event_id):
+                return None
+            self.conn.begin()
+            with self.conn.cursor() as cursor:
+                cursor.execute('''INSERT INTO EventSummaries
+                                      (event_id, record_count, student_count, present_count, absent_count, excused_count)
+                                  SELECT %s,
+                                         (SELECT COUNT(*) FROM AttendanceRecords WHERE event_id = %s),
+                                         COUNT(DISTINCT a.student_id),
+                                         COALESCE(SUM(a.status = 'Present'), 0),
+                                         COALESCE(SUM(a.status = 'Absent'), 0),
+                                         COALESCE(SUM(a.status = 'Excused'), 0)
+                                  FROM Attendance a
+                                  JOIN AttendanceRecords ar ON a.record_id = ar.record_id
+                                  WHERE ar.event_id = %s''', (event_id, event_id, event_id))
+                moved = cursor.execute('''INSERT INTO AttendanceArchive
+                                              (attendance_id, record_id, student_id, student_fname, student_year_level,
+                                               student_course, status, timestamp, updated_at)
+                                          SELECT a.attendance_id, a.record_id, a.student_id, a.student_fname, a.student_year_level,
+                                                 a.student_course, a.status, a.timestamp, a.updated_at
+                                          FROM Attendance a
+                                          JOIN AttendanceRecords ar ON a.record_id = ar.record_id
+                                          WHERE ar.event_id = %s''', (event_id,))
+                cursor.execute('''DELETE a FROM Attendance a
+                                  JOIN AttendanceRecords ar ON a.record_id = ar.record_id
+                                  WHERE ar.event_id = %s''', (event_id,))
+            self.conn.commit()
+            return moved
+        except pymysql.Error as err:
+            self.conn.rollback()
+            print(f"Error archiving event: {err}")
+            return None
+    
+    def restore_event(self, event_id):
+        """Move an archived event's attendance back into Attendance so it can be edited again
+        
+        Returns the number of attendance rows restored, or None on failure.
+        """
+        try:
+            self.conn.begin()
+            with self.conn.cursor() as cursor:
+                restored = cursor.execute('''INSERT INTO Attendance
+                                                 (attendance_id, record_id, student_id, student_fname, student_year_level,
+                                                  student_course, status, timestamp, updated_at)
+                                             SELECT aa.attendance_id, aa.record_id, aa.student_id, aa.student_fname,
+                                                    aa.student_year_level, aa.student_course, aa.status, aa.timestamp, aa.updated_at
+                                             FROM AttendanceArchive aa
+                                             JOIN AttendanceRecords ar ON aa.record_id = ar.record_id
+                                             WHERE ar.event_id = %s''', (event_id,))
+                cursor.execute('''DELETE aa FROM AttendanceArchive aa
+                                  JOIN AttendanceRecords ar ON aa.record_id = ar.record_id
+                                  WHERE ar.event_id = %s''', (event_id,))
+                cursor.execute("DELETE FROM EventSummaries WHERE event_id = %s", (event_id,))
+            self.conn.commit()
+            return restored
+        except pymysql.Error as err:
+            self.conn.rollback()
+            print(f"Error restoring event: {err}")
+            return None
+    
+    def archive_events_before(self, cutoff_date):
+        """Archive every event dated before cutoff_date that is not archived yet
+        
+        Returns a list of (event_id, rows moved) for the events archived.
+        """
+        try:
+            with self.conn.cursor() as cursor:
+                cursor.execute('''SELECT e.event_id FROM Events e
+                                  LEFT JOIN EventSummaries es ON es.event_id = e.event_id
+                                  WHERE e.event_date < %s AND es.event_id IS NULL
+                                  ORDER BY e.event_date''', (cutoff_date,))
+                event_ids = [row['event_id'] for row in cursor.fetchall()]
+        except pymysql.Error as err:
+            print(f"Error finding events to archive: {err}")
+            return []
+        archived = []
+        for event_id in event_ids:
+            moved = self.archive_event(event_id)
+            if moved is not None:
+                archived.append((event_id, moved))
+        return archived
+    
+    def get_event_summary(self, event_id):
+        """Get the stored totals of an archived event, or None if it is not archived"""
+        try:
+            with self.conn.cursor() as cursor:
+                cursor.execute('''SELECT event_id, record_count, student_count, present_count, absent_count,
+                                         excused_count, archived_at
+                                  FROM EventSummaries WHERE event_id = %s''', (event_id,))
+                return cursor.fetchone()
+        except pymysql.Error as err:
+            print(f"Error fetching event summary: {err}")
+            return None
+    
     def get_student_by_id(self, student_id):
         """Get student information by student ID"""
         try:
@@ -229,12 +880,120 @@ class DatabaseManager:
                     "INSERT INTO Students (student_id, fname, year_level, course) VALUES (%s, %s, %s, %s)",
                     (student_id, fname, year_level, course)
                 )
+                self._add_to_open_records(cursor, [student_id])
                 self.conn.commit()
                 return True
         except pymysql.Error as err:
             print(f"Error adding student: {err}")
             return False
     
+    def _add_to_open_records(self, cursor, student_ids, open_since=None):
+        """Add students as absent to the records of events dated open_since (default today) or later
+        
+        Archived events are left alone. Returns the number of attendance rows added.
+        """
+        added = 0
+        for chunk in _chunks(list(student_ids)):
+            placeholders = ", ".join(["%s"] * len(chunk))
+            added += cursor.execute(f'''INSERT IGNORE INTO Attendance
+                                            (record_id, student_id, student_fname, student_year_level, student_course, status)
+                                        SELECT ar.record_id, s.student_id, s.fname, s.year_level, s.course, 'Absent'
+                                        FROM AttendanceRecords ar
+                                        JOIN Events e ON e.event_id = ar.event_id
+                                        LEFT JOIN EventSummaries es ON es.event_id = e.event_id
+                                        JOIN Students s ON s.student_id IN ({placeholders})
+                                        WHERE es.event_id IS NULL AND e.event_date >= COALESCE(%s, CURDATE())''',
+                                    (*chunk, open_since))
+        return added
+    
+    def sync_roster(self, filename, delete_missing=False, open_since=None):
+        """Synchronize Students with a roster CSV, applying only the differences
+        
+        The CSV has the import_students_from_csv layout. Rows are compared by a
+        hash of their fields, in one pass over the file and the stored hashes.
+        Then, in one transaction:
+        - new students are inserted and added as absent to open records, which
+          belong to unarchived events dated open_since (default today) or later
+        - changed students are updated, and their copies in Attendance are refreshed
+        - with delete_missing, students absent from the CSV are deleted, unless
+          they have attendance rows: deleting would cascade into Attendance and
+          erase their history, so they are kept and counted in kept_with_attendance.
+        IDs are matched ignoring case, like the Students primary key; a student
+        keeps the stored spelling of its ID. missing counts the stored students
+        absent from the CSV, whether deleted or not.
+        Returns a dict of counts, or None if the sync failed and was rolled back.
+        """
+        incoming = {}
+        with open(filename, 'r', newline='', encoding='utf-8-sig') as file:
+            reader = csv.reader(file)
+            next(reader, None)
+            for row in reader:
+                if len(row) >= 4 and row[0].strip():
+                    student_id = row[0].strip()
+                    incoming[student_id.casefold()] = (student_id, tuple(value.strip() for value in row[1:4]))
+        
+        try:
+            with self.conn.cursor(pymysql.cursors.Cursor) as cursor:
+                cursor.execute(f"SELECT student_id, {ROSTER_HASH_SQL} FROM Students")
+                stored = {student_id.casefold(): (student_id, stored_hash)
+                          for student_id, stored_hash in cursor.fetchall()}
+            
+            inserts, updates = [], []
+            for key, (student_id, fields) in incoming.items():
+                stored_id, stored_hash = stored.get(key, (None, None))
+                if stored_id is None:
+                    inserts.append((student_id, *fields))
+                elif stored_hash != roster_hash(*fields):
+                    updates.append((*fields, stored_id))
+            missing = [stored_id for key, (stored_id, _) in stored.items() if key not in incoming]
+            kept = self._students_with_attendance(missing) if delete_missing and missing else set()
+            deletes = [student_id for student_id in missing if student_id.casefold() not in kept] if delete_missing else []
+            result = {'inserted': len(inserts), 'updated': len(updates), 'deleted': len(deletes),
+                      'unchanged': len(incoming) - len(inserts) - len(updates),
+                      'missing': len(missing), 'kept_with_attendance': len(kept),
+                      'attendance_added': 0, 'attendance_refreshed': 0}
+            if not (inserts or updates or deletes):
+                return result
+            
+            self.conn.begin()
+            with self.conn.cursor() as cursor:
+                if inserts:
+                    cursor.executemany("INSERT INTO Students (student_id, fname, year_level, course) VALUES (%s, %s, %s, %s)",
+                                       inserts)
+                    result['attendance_added'] = self._add_to_open_records(
+                        cursor, [row[0] for row in inserts], open_since)
+                if updates:
+                    cursor.executemany("UPDATE Students SET fname = %s, year_level = %s, course = %s WHERE student_id = %s",
+                                       updates)
+                    for chunk in _chunks([row[-1] for row in updates]):
+                        placeholders = ", ".join(["%s"] * len(chunk))
+                        result['attendance_refreshed'] += cursor.execute(f'''
+                            UPDATE Attendance a JOIN Students s ON s.student_id = a.student_id
+                            SET a.student_fname = s.fname, a.student_year_level = s.year_level, a.student_course = s.course
+                            WHERE a.student_id IN ({placeholders})''', chunk)
+                for chunk in _chunks(deletes):
+                    placeholders = ", ".join(["%s"] * len(chunk))
+                    cursor.execute(f"DELETE FROM Students WHERE student_id IN ({placeholders})", chunk)
+            self.conn.commit()
+            return result
+        except pymysql.Error as err:
+            self.conn.rollback()
+            print(f"Error syncing roster: {err}")
+            return None
+    
+    def _students_with_attendance(self, student_ids):
+        """Return the casefolded IDs of the given students that have rows in Attendance or AttendanceArchive"""
+        found = set()
+        with self.conn.cursor(pymysql.cursors.Cursor) as cursor:
+            for chunk in _chunks(list(student_ids)):
+                placeholders = ", ".join(["%s"] * len(chunk))
+                cursor.execute(f'''SELECT student_id FROM Attendance WHERE student_id IN ({placeholders})
+                                   UNION
+                                   SELECT student_id FROM AttendanceArchive WHERE student_id IN ({placeholders})''',
+                               (*chunk, *chunk))
+                found.update(student_id.casefold() for (student_id,) in cursor.fetchall())
+        return found
+    
     def import_sample_data(self):
         """Import sample student data for testing purposes"""
         try:
@@ -254,3 +1013,7 @@ class DatabaseManager:
         if hasattr(self, 'conn') and self.conn:
             self.conn.close()
             print("Database connection closed")
+
+
+# Time every public query method; streaming iterators are left unwrapped
+instrument_methods(DatabaseManager, DB_QUERY_SECONDS, label='query')
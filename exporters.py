@@ -0,0 +1,251 @@
+"""
+Attendance export writers for the Attendance Management System
+
+These functions stream rows from DatabaseManager iterators straight to disk and
+do not depend on Qt, so they can run on a worker thread or from a script.
+"""
+
+import csv
+import os
+import tempfile
+from datetime import datetime
+from itertools import islice
+
+ATTENDANCE_HEADERS = ["Student ID", "First Name", "Year Level", "Course", "Status", "Timestamp"]
+ATTENDANCE_COLUMNS = ["student_id", "fname", "year_level", "course", "status", "timestamp"]
+MAX_COLUMN_WIDTH = 50
+PROGRESS_EVERY = 500
+BATCH_SIZE = 10000
+EXPORT_FORMATS = ('xlsx', 'csv', 'parquet')
+
+
+class ExportCancelled(Exception):
+    """Raised when the user cancels an export in progress"""
+
+
+def _cell_text(value):
+    """Render a database value the way it appears in exported files"""
+    return '' if value is None else str(value)
+
+
+def _check_progress(done, total, progress, cancelled):
+    """Report progress and stop if the export was cancelled"""
+    if cancelled and cancelled():
+        raise ExportCancelled()
+    if progress:
+        progress(done, total)
+
+
+def _batches(rows, size=BATCH_SIZE):
+    """Split an iterator of rows into lists of at most size rows"""
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def export_format(path):
+    """Return the export format implied by a file name, defaulting to xlsx"""
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    return extension if extension in EXPORT_FORMATS else 'xlsx'
+
+
+def _write_streamed_workbook(path, sheet_title, headers, rows, header_lines, footer_rows=None,
+                             numeric_columns=(), total=None, progress=None, cancelled=None):
+    """Write rows to a write-only workbook in a single pass, sizing columns to their contents
+
+    openpyxl writes column definitions before the first row, so rows are spooled
+    to a temporary CSV file while column widths are measured, then streamed into
+    the workbook. Memory use stays constant regardless of the number of rows.
+    header_lines(count) and footer_rows() are called once every row has been read.
+    Values in numeric_columns are written back as integers. Progress counts
+    every row twice, once per pass, so it runs to 2 x the row count.
+    Returns the number of data rows written.
+    """
+    from openpyxl import Workbook
+    from openpyxl.utils import get_column_letter
+
+    widths = [len(header) for header in headers]
+    count = 0
+    with tempfile.TemporaryFile('w+', newline='', encoding='utf-8') as spool:
+        writer = csv.writer(spool)
+        for row in rows:
+            values = [_cell_text(value) for value in row]
+            for column, value in enumerate(values):
+                if len(value) > widths[column]:
+                    widths[column] = len(value)
+            writer.writerow(values)
+            count += 1
+            if count % PROGRESS_EVERY == 0:
+                _check_progress(count, 2 * total if total else None, progress, cancelled)
+
+        lines = header_lines(count)
+        footer = footer_rows() if footer_rows else []
+        widths[0] = max(widths[0], *(len(line) for line in lines))
+        for row in footer:
+            for column, value in enumerate(row):
+                widths[column] = max(widths[column], len(_cell_text(value)))
+
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(sheet_title)
+        for column, width in enumerate(widths, 1):
+            ws.column_dimensions[get_column_letter(column)].width = min(width + 2, MAX_COLUMN_WIDTH)
+
+        for line in lines:
+            ws.append([line])
+        ws.append([])
+        ws.append(headers)
+
+        spool.seek(0)
+        try:
+            for written, row in enumerate(csv.reader(spool), 1):
+                for column in numeric_columns:
+                    row[column] = int(row[column] or 0)
+                ws.append(row)
+                if written % PROGRESS_EVERY == 0:
+                    _check_progress(count + written, 2 * count, progress, cancelled)
+        except ExportCancelled:
+            # Finish the sheet's temporary file so openpyxl does not write to it after it is closed
+            ws.close()
+            raise
+        for row in footer:
+            ws.append(row)
+
+        _check_progress(2 * count, 2 * count, progress, cancelled)
+        wb.save(path)
+    return count
+
+
+def _report_lines(title):
+    """Return a callable producing the title block of a report once the row count is known"""
+    generated = f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+    return lambda count: [title, generated, f"Total Students: {count}"]
+
+
+def write_attendance_xlsx(path, rows, title, total=None, progress=None, cancelled=None):
+    """Write attendance rows to an Excel report in a single pass over rows"""
+    return _write_streamed_workbook(
+        path, "Attendance Data", ATTENDANCE_HEADERS, rows,
+        _report_lines(f"Attendance Report - {title}"),
+        total=total, progress=progress, cancelled=cancelled
+    )
+
+
+def write_attendance_csv(path, rows, title=None, total=None, progress=None, cancelled=None):
+    """Write attendance rows to a CSV file in batches straight from the database tuples"""
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(ATTENDANCE_HEADERS)
+        for batch in _batches(rows):
+            writer.writerows(batch)
+            count += len(batch)
+            _check_progress(count, total, progress, cancelled)
+    return count
+
+
+def write_attendance_parquet(path, rows, title=None, total=None, progress=None, cancelled=None):
+    """Write attendance rows to a Parquet file, one column batch at a time
+
+    Requires the optional pyarrow package.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export requires the optional 'pyarrow' package (pip install pyarrow)")
+
+    schema = pa.schema([(name, pa.string()) for name in ATTENDANCE_COLUMNS[:-1]] +
+                       [(ATTENDANCE_COLUMNS[-1], pa.timestamp('s'))])
+    count = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for batch in _batches(rows):
+            columns = list(zip(*batch))
+            arrays = [pa.array(column, type=field.type) for column, field in zip(columns, schema)]
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            count += len(batch)
+            _check_progress(count, total, progress, cancelled)
+    return count
+
+
+ATTENDANCE_WRITERS = {
+    'xlsx': write_attendance_xlsx,
+    'csv': write_attendance_csv,
+    'parquet': write_attendance_parquet,
+}
+
+
+def write_event_pivot_xlsx(path, records, rows, title, total=None, progress=None, cancelled=None):
+    """Write a students x records matrix with per-student and per-record totals
+
+    rows come from DatabaseManager.iter_event_pivot: student details, one status
+    per record in the order of records, then Present, Absent and Excused counts.
+    """
+    record_names = [str(record['record_name']) for record in records]
+    headers = ["Student ID", "First Name", "Year Level", "Course"] + record_names + ["Present", "Absent", "Excused"]
+    first_status = 4
+    present_per_record = [0] * len(records)
+    totals = [0, 0, 0]
+
+    def counted(rows):
+        for row in rows:
+            for position, status in enumerate(row[first_status:first_status + len(records)]):
+                if status == 'Present':
+                    present_per_record[position] += 1
+            for position, value in enumerate(row[-3:]):
+                totals[position] += int(value or 0)
+            yield row
+
+    def footer_rows():
+        return [["Total Present", "", "", ""] + present_per_record + totals]
+
+    return _write_streamed_workbook(
+        path, "Event Pivot", headers, counted(rows),
+        _report_lines(f"Event Attendance Summary - {title}"),
+        footer_rows, numeric_columns=range(len(headers) - 3, len(headers)),
+        total=total, progress=progress, cancelled=cancelled
+    )
+
+
+def export_attendance(db, path, title, record_id=None, event_id=None, progress=None, cancelled=None, fmt=None):
+    """Export the attendance of a record or event as xlsx, csv or parquet
+
+    The format defaults to the one implied by the file extension. Cancelling
+    removes the partially written file and raises ExportCancelled.
+    Returns the number of data rows written.
+    """
+    writer = ATTENDANCE_WRITERS[fmt or export_format(path)]
+    total = db.count_attendance(record_id=record_id, event_id=event_id)
+    rows = db.iter_attendance(record_id=record_id, event_id=event_id)
+    return _run_export(writer, path, rows, title, total, progress, cancelled)
+
+
+def export_event_pivot(db, path, event_id, title, progress=None, cancelled=None):
+    """Export a whole event as one students x records pivot sheet
+
+    The matrix is computed by a single aggregated query and streamed to disk.
+    Returns the number of student rows written.
+    """
+    records = sorted(db.get_records_for_event(event_id), key=lambda record: record['record_id'])
+    if not records:
+        raise ValueError("This event has no attendance records.")
+    total = db.count_event_students(event_id)
+    rows = db.iter_event_pivot(event_id, [record['record_id'] for record in records])
+
+    def write(path, rows, title, total, progress, cancelled):
+        return write_event_pivot_xlsx(path, records, rows, title, total, progress, cancelled)
+
+    return _run_export(write, path, rows, title, total, progress, cancelled)
+
+
+def _run_export(writer, path, rows, title, total, progress, cancelled):
+    """Call writer, removing the partial file if the export is cancelled"""
+    try:
+        return writer(path, rows, title, total, progress, cancelled)
+    except ExportCancelled:
+        rows.close()
+        if os.path.exists(path):
+            os.remove(path)
+        raise
@@ -2,32 +2,57 @@
 Main application for the Attendance Management System
 """
 
+import startup_timer
 import sys
 import os
-import qrcode
-from PyQt5.QtWidgets import QApplication, QMainWindow, QStackedWidget, QMessageBox, QComboBox, QTableWidgetItem, QFileDialog
-from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QStackedWidget, QMessageBox, QTableWidgetItem, QFileDialog,
+                             QProgressDialog)
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QFont
-import openpyxl
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from database import DatabaseManager
+from database import ArchivedEventError, DatabaseManager, EVENT_ORDERS
+from exporters import ExportCancelled, export_attendance, export_event_pivot, export_format
+from rows import AttendanceRow
+from roster_cache import RosterCache
+from qr_badges import generate_badges, compose_sheets
 from ui_pages import MainPage, EventsPage, RecordsPage, MasterlistPage, AttendancePage, ScannerPage
-from camera_scanner import CameraScanner
-from config import APP_TITLE, APP_WIDTH, APP_HEIGHT, ATTENDANCE_STATUSES
+from workers import BackgroundJob
+from metrics import REGISTRY, start_http_server
+from config import (APP_TITLE, APP_WIDTH, APP_HEIGHT, ATTENDANCE_POLL_INTERVAL, ATTENDANCE_POLL_OVERLAP,
+                    STARTUP_REPORT_FILE, QR_OUTPUT_DIR, QR_WORKERS, METRICS_PORT, METRICS_FILE,
+                    METRICS_FILE_INTERVAL, PROFILE_DIR, ROSTER_CACHE_FILE, ROSTER_REVALIDATE_INTERVAL)
+
+# OpenCV, pyzbar, numpy, openpyxl and qrcode are imported on first use of the
+# scanner, export and QR generation features to keep startup fast.
+startup_timer.mark("imports")
 
 
 class MainWindow(QMainWindow):
     """Main application window"""
     
-    def __init__(self):
+    def __init__(self, db=None):
+        """Create the window; db replaces the MySQL connection, e.g. with a stand-in for benchmarks"""
         super().__init__()
-        self.db = DatabaseManager()
+        self.db = db
+        self.camera_scanner = None
         self.current_event_id = None
         self.current_record_id = None
+        self.current_event_name = ''
+        self.attendance_cursor = None
+        # The record_id or event_id the attendance table was loaded for
+        self.attendance_scope = None
+        # The last roster snapshot is usable before the database connection is up
+        self.roster = RosterCache(ROSTER_CACHE_FILE) if ROSTER_CACHE_FILE else None
+        self.roster_job = None
+        # Connection used by the roster jobs, opened on the first job's worker thread
+        self.roster_db = None
+        self.init_job = None
         self.setup_ui()
-        self.setup_camera()
-        self.initialize_data()
+        self.attendance_page.attendance_model.status_changed.connect(self.on_attendance_status_changed)
+        self.attendance_page.attendance_model.counts_changed.connect(self.update_attendance_counts)
+        # Connect to the database once the window has been shown
+        QTimer.singleShot(0, self.initialize_data)
     
     def setup_ui(self):
         """Setup the main window UI"""
@@ -53,16 +78,118 @@ class MainWindow(QMainWindow):
     
     def setup_camera(self):
         """Setup camera scanner for the scanner page"""
-        self.camera_scanner = CameraScanner(
-            self.scanner_page.camera_label,
-            self.scanner_page.scanner_status,
-            self
-        )
+        if self.camera_scanner is None:
+            from camera_scanner import CameraScanner
+            self.camera_scanner = CameraScanner(
+                self.scanner_page.camera_label,
+                self.scanner_page.scanner_status,
+                self
+            )
+        return self.camera_scanner
     
     def initialize_data(self):
-        """Initialize sample data if no students exist"""
-        if not self.db.get_all_students():
-            self.db.import_sample_data()
+        """Connect to the database and initialize sample data if no students exist
+        
+        Connecting and bringing the schema up to date run on a worker thread;
+        the pages stay disabled until the connection is ready.
+        """
+        if self.db is not None:
+            startup_timer.mark("database connected")
+            if not self.db.has_students():
+                self.db.import_sample_data()
+            self.finish_initialization(self.db)
+            return
+        self.central_widget.setEnabled(False)
+        
+        def connect(progress, cancelled):
+            db = DatabaseManager()
+            startup_timer.mark("database connected")
+            if cancelled():
+                db.close()
+                raise ExportCancelled()
+            if not db.has_students():
+                db.import_sample_data()
+            return db
+        
+        def give_up(error):
+            self.init_job = None
+            self.close()
+        
+        self.init_job = self.run_background_job(connect, "Connecting to the database...", self.finish_initialization,
+                                                "Could not connect to the database", give_up)
+    
+    def finish_initialization(self, db):
+        """Use the connection set up by initialize_data and start the background refreshes"""
+        self.db = db
+        self.init_job = None
+        self.central_widget.setEnabled(True)
+        startup_timer.mark("data ready")
+        startup_timer.report(STARTUP_REPORT_FILE)
+        self.start_metrics_export()
+        self.start_roster_revalidation()
+    
+    def start_roster_revalidation(self):
+        """Revalidate the roster snapshot now and then every ROSTER_REVALIDATE_INTERVAL"""
+        if self.roster is None:
+            return
+        self.revalidate_roster()
+        if ROSTER_REVALIDATE_INTERVAL > 0:
+            self.roster_timer = QTimer(self)
+            self.roster_timer.timeout.connect(self.revalidate_roster)
+            self.roster_timer.start(ROSTER_REVALIDATE_INTERVAL)
+    
+    def revalidate_roster(self):
+        """Fetch roster changes into the snapshot on a worker thread, refreshing the masterlist if it changed"""
+        if self.roster is None or self.roster_job is not None:
+            return
+        roster = self.roster
+        
+        def revalidate(progress, cancelled):
+            # Jobs never overlap, so they can share one connection; a dropped
+            # connection is reopened on the next job
+            if self.roster_db is None:
+                self.roster_db = DatabaseManager()
+            else:
+                self.roster_db.conn.ping(reconnect=True)
+            try:
+                return roster.revalidate(self.roster_db)
+            except Exception:
+                self.roster_db.close()
+                self.roster_db = None
+                raise
+        
+        def finish(changed):
+            if changed and self.central_widget.currentWidget() is self.masterlist_page:
+                self.populate_masterlist_table()
+        
+        def forget_job():
+            self.roster_job = None
+        
+        self.roster_job = BackgroundJob(revalidate, self)
+        self.roster_job.succeeded.connect(finish)
+        self.roster_job.failed.connect(lambda error: print(f"Error revalidating roster: {error}"))
+        self.roster_job.finished.connect(forget_job)
+        self.roster_job.finished.connect(self.roster_job.deleteLater)
+        self.roster_job.start()
+    
+    def start_metrics_export(self):
+        """Serve metrics over HTTP and/or write them to a text file periodically, if configured"""
+        if METRICS_PORT:
+            try:
+                self.metrics_server = start_http_server(METRICS_PORT)
+            except OSError as e:
+                print(f"Error starting metrics endpoint: {e}")
+        if METRICS_FILE:
+            self.metrics_file_timer = QTimer(self)
+            self.metrics_file_timer.timeout.connect(self.write_metrics_file)
+            self.metrics_file_timer.start(METRICS_FILE_INTERVAL)
+    
+    def write_metrics_file(self):
+        """Write the current metrics to METRICS_FILE"""
+        try:
+            REGISTRY.write_text_file(METRICS_FILE)
+        except OSError as e:
+            print(f"Error writing metrics file: {e}")
     
     def show_events_page(self):
         """Show the events page and populate the table"""
@@ -77,71 +204,48 @@ class MainWindow(QMainWindow):
     def show_scanner_page(self):
         """Show the scanner page and start camera"""
         self.central_widget.setCurrentWidget(self.scanner_page)
-        self.camera_scanner.start_camera()
+        self.setup_camera().start_camera()
     
     def stop_camera_and_go_back(self):
         """Stop camera and return to attendance page"""
-        self.camera_scanner.stop_camera()
+        if self.camera_scanner:
+            self.camera_scanner.stop_camera()
         self.central_widget.setCurrentWidget(self.attendance_page)
     
     def populate_events_table(self):
-        """Populate the events table with data from database"""
-        events = self.db.get_all_events()
-        self.events_page.events_table.setRowCount(len(events))
+        """Populate the events table from the page's filters, fetching further pages as the user scrolls"""
+        filters = self.events_page.filters()
+        columns = EVENT_ORDERS[filters['order']][0]
         
-        for row, event in enumerate(events):
-            event_name = str(event['event_name'])
-            event_date = str(event['event_date'])
-            
-            self.events_page.events_table.setItem(row, 0, QTableWidgetItem(event_name))
-            self.events_page.events_table.setItem(row, 1, QTableWidgetItem(event_date))
+        def fetch_events(last_event, limit):
+            after = tuple(getattr(last_event, column) for column in columns) if last_event else None
+            return self.db.get_events_page(after, limit, compact=True, **filters)
+        
+        self.events_page.events_model.set_fetcher(fetch_events)
     
     def populate_masterlist_table(self):
-        """Populate the masterlist table with student data"""
-        students = self.db.get_all_students()
-        self.masterlist_page.masterlist_table.setRowCount(len(students))
+        """Populate the masterlist table, fetching further pages as the user scrolls"""
+        # Served from the local snapshot once one has been loaded or validated
+        source = self.roster if self.roster is not None and self.roster.ready else None
         
-        for row, student in enumerate(students):
-            student_id = str(student['student_id'])
-            fname = str(student['fname'])
-            year_level = str(student['year_level'])
-            course = str(student['course'])
-            
-            self.masterlist_page.masterlist_table.setItem(row, 0, QTableWidgetItem(student_id))
-            self.masterlist_page.masterlist_table.setItem(row, 1, QTableWidgetItem(fname))
-            self.masterlist_page.masterlist_table.setItem(row, 2, QTableWidgetItem(year_level))
-            self.masterlist_page.masterlist_table.setItem(row, 3, QTableWidgetItem(course))
+        def fetch_students(last_student, limit):
+            after = last_student.student_id if last_student else None
+            if source is not None:
+                return source.students_page(after, limit)
+            return self.db.get_students_page(after, limit, compact=True)
         
+        self.masterlist_page.masterlist_model.set_fetcher(fetch_students)
         self.filter_masterlist_table()
     
     def populate_attendance_table(self, event_id):
-        """Populate the attendance table for a specific event"""
-        attendance = self.db.get_attendance_for_event(event_id)
-        self.attendance_page.attendance_table.setRowCount(len(attendance))
-        
-        for row, record in enumerate(attendance):
-            student_id = str(record['student_id'])
-            student_fname = str(record['student_fname'])
-            student_year_level = str(record['student_year_level'])
-            student_course = str(record['student_course'])
-            status = str(record['status'])
-            timestamp = str(record['timestamp']) if record['timestamp'] else ''
-            
-            self.attendance_page.attendance_table.setItem(row, 0, QTableWidgetItem(student_id))
-            self.attendance_page.attendance_table.setItem(row, 1, QTableWidgetItem(student_fname))
-            self.attendance_page.attendance_table.setItem(row, 2, QTableWidgetItem(student_year_level))
-            self.attendance_page.attendance_table.setItem(row, 3, QTableWidgetItem(student_course))
-            self.attendance_page.attendance_table.setItem(row, 4, QTableWidgetItem(timestamp))
-            
-            status_combo = QComboBox()
-            status_combo.addItems(ATTENDANCE_STATUSES)
-            status_combo.setCurrentText(status)
-            status_combo.currentTextChanged.connect(
-                lambda status, row=row, event_id=event_id, student_id=student_id: 
-                self.db.update_attendance_status(event_id, student_id, status)
-            )
-            self.attendance_page.attendance_table.setCellWidget(row, 5, status_combo)
-        
+        """Populate the attendance table for a specific event, reading archived events from the archive"""
+        archived = self.db.is_event_archived(event_id=event_id)
+        self.attendance_page.set_archived(archived)
+        self.attendance_scope = {'event_id': event_id}
+        if not archived:
+            self.start_attendance_feed()
+        self.attendance_page.attendance_model.set_rows(self.db.get_attendance_for_event(event_id, compact=True))
+        self.attendance_page.attendance_model.seed_counts(self.db.get_attendance_counts(event_id=event_id))
         self.filter_attendance_table()
     
     def populate_records_table(self, event_id):
@@ -157,37 +261,45 @@ class MainWindow(QMainWindow):
             self.records_page.records_table.setItem(row, 1, QTableWidgetItem(created_at))
     
     def populate_students_table(self, record_id):
-        """Populate the students table for a specific record"""
-        students = self.db.get_students_for_record(record_id)
-        self.attendance_page.attendance_table.setRowCount(len(students))
-        
-        for row, student in enumerate(students):
-            student_id = str(student['student_id'])
-            student_fname = str(student['student_fname'])
-            student_year_level = str(student['student_year_level'])
-            student_course = str(student['student_course'])
-            status = str(student['status'])
-            timestamp = str(student['timestamp']) if student['timestamp'] else ''
-            
-            self.attendance_page.attendance_table.setItem(row, 0, QTableWidgetItem(student_id))
-            self.attendance_page.attendance_table.setItem(row, 1, QTableWidgetItem(student_fname))
-            self.attendance_page.attendance_table.setItem(row, 2, QTableWidgetItem(student_year_level))
-            self.attendance_page.attendance_table.setItem(row, 3, QTableWidgetItem(student_course))
-            self.attendance_page.attendance_table.setItem(row, 4, QTableWidgetItem(timestamp))
-            
-            status_combo = QComboBox()
-            status_combo.addItems(ATTENDANCE_STATUSES)
-            status_combo.setCurrentText(status)
-            status_combo.currentTextChanged.connect(
-                lambda status, row=row, record_id=record_id, student_id=student_id: 
-                self.update_attendance_status_for_record(record_id, student_id, status)
-            )
-            self.attendance_page.attendance_table.setCellWidget(row, 5, status_combo)
-        
+        """Populate the students table for a specific record, reading archived events from the archive"""
+        archived = self.db.is_event_archived(record_id=record_id)
+        self.attendance_page.set_archived(archived)
+        self.attendance_scope = {'record_id': record_id}
+        if not archived:
+            self.start_attendance_feed()
+        self.attendance_page.attendance_model.set_rows(self.db.get_students_for_record(record_id, compact=True))
+        self.attendance_page.attendance_model.seed_counts(self.db.get_attendance_counts(record_id=record_id))
         self.filter_attendance_table()
     
+    def start_attendance_feed(self):
+        """Remember the database clock so later polls only fetch newer changes"""
+        self.attendance_cursor = self.db.get_change_cursor()
+        if ATTENDANCE_POLL_INTERVAL > 0 and self.attendance_cursor is not None:
+            self.attendance_page.poll_timer.start()
+    
+    def poll_attendance_changes(self):
+        """Patch check-ins made by other scanner stations into the attendance table"""
+        if self.central_widget.currentWidget() not in (self.attendance_page, self.scanner_page):
+            return
+        if self.attendance_cursor is None or self.attendance_scope is None:
+            return
+        
+        # Re-read a short overlap so rows committed slightly out of order are not missed
+        since = self.attendance_cursor - timedelta(seconds=ATTENDANCE_POLL_OVERLAP)
+        # Poll what the table holds, not whichever record was opened last
+        changes = self.db.get_attendance_changes(since, **self.attendance_scope)
+        
+        if changes:
+            self.attendance_cursor = max(self.attendance_cursor, max(change['updated_at'] for change in changes))
+            self.attendance_page.attendance_model.apply_changes(AttendanceRow.from_dict(change) for change in changes)
+    
     def update_attendance_status_for_record(self, record_id, student_id, status):
-        """Update attendance status for a specific student in a specific record"""
+        """Update attendance status for a specific student in a specific record
+        
+        Raises ArchivedEventError if the record's event is archived.
+        """
+        if self.db.is_event_archived(record_id=record_id):
+            raise ArchivedEventError()
         try:
             with self.db.conn.cursor() as cursor:
                 cursor.execute('''UPDATE Attendance 
@@ -201,165 +313,165 @@ class MainWindow(QMainWindow):
             return False
     
     def filter_attendance_table(self):
-        """Filter the attendance table based on search text and status filter"""
-        search_text = self.attendance_page.search_input.text().lower()
+        """Filter the loaded attendance rows based on search text and status filter"""
+        search_text = self.attendance_page.search_input.text()
         status_filter = self.attendance_page.status_filter.currentText()
-        
-        if hasattr(self, 'current_record_id') and self.current_record_id:
-            all_students = self.db.get_students_for_record(self.current_record_id)
-            is_record_context = True
-        elif hasattr(self, 'current_event_id') and self.current_event_id:
-            all_students = self.db.get_attendance_for_event(self.current_event_id)
-            is_record_context = False
-        else:
-            return
-
-        filtered_students = []
-        for student in all_students:
-            matches_search = (
-                search_text in str(student['student_id']).lower() or
-                search_text in str(student['student_fname']).lower() or
-                search_text in str(student['student_year_level']).lower() or
-                search_text in str(student['student_course']).lower()
-            )
-            
-            matches_status = (status_filter == "All Statuses" or 
-                            student['status'] == status_filter)
-            
-            if matches_search and matches_status:
-                filtered_students.append(student)
-        
-        self.attendance_page.attendance_table.setRowCount(len(filtered_students))
-        
-        for row, student in enumerate(filtered_students):
-            student_id = str(student['student_id'])
-            student_fname = str(student['student_fname'])
-            student_year_level = str(student['student_year_level'])
-            student_course = str(student['student_course'])
-            status = str(student['status'])
-            timestamp = str(student['timestamp']) if student['timestamp'] else ''
-            
-            self.attendance_page.attendance_table.setItem(row, 0, QTableWidgetItem(student_id))
-            self.attendance_page.attendance_table.setItem(row, 1, QTableWidgetItem(student_fname))
-            self.attendance_page.attendance_table.setItem(row, 2, QTableWidgetItem(student_year_level))
-            self.attendance_page.attendance_table.setItem(row, 3, QTableWidgetItem(student_course))
-            self.attendance_page.attendance_table.setItem(row, 4, QTableWidgetItem(timestamp))
-            
-            status_combo = QComboBox()
-            status_combo.addItems(ATTENDANCE_STATUSES)
-            status_combo.setCurrentText(status)
-            
-            if is_record_context:
-                status_combo.currentTextChanged.connect(
-                    lambda status, row=row, record_id=self.current_record_id, student_id=student_id: 
-                    self.update_attendance_status_for_record(record_id, student_id, status)
-                )
+        status = None if status_filter == "All Statuses" else status_filter
+        self.attendance_page.attendance_model.set_status_filter(search_text, status)
+    
+    def on_attendance_status_changed(self, row, old_status, old_timestamp):
+        """Persist a status edited in the attendance table, reverting the row if it could not be saved"""
+        message = f"Could not update attendance for {row.student_id}."
+        try:
+            if self.current_record_id:
+                saved = self.update_attendance_status_for_record(row.record_id, row.student_id, row.status)
             else:
-                status_combo.currentTextChanged.connect(
-                    lambda status, row=row, event_id=self.current_event_id, student_id=student_id: 
-                    self.db.update_attendance_status(event_id, student_id, status)
-                )
-            
-            self.attendance_page.attendance_table.setCellWidget(row, 5, status_combo)
+                saved = self.db.update_attendance_status(self.current_event_id, row.student_id, row.status)
+                if saved:
+                    # The update covers every record of the event, so keep sibling rows in sync
+                    self.attendance_page.attendance_model.update_student_status(row.student_id, row.status, row.timestamp)
+        except ArchivedEventError as err:
+            saved = False
+            message = str(err)
+        if not saved:
+            self.attendance_page.attendance_model.set_row_status(row, old_status, old_timestamp)
+            QMessageBox.warning(self, "Error", message)
+    
+    def update_attendance_counts(self):
+        """Show the live attendance counters on the attendance and scanner pages"""
+        counts = self.attendance_page.attendance_model.counts
+        summary = counts.summary()
+        by_course = counts.course_summary()
+        for label in (self.attendance_page.counts_label, self.scanner_page.counts_label):
+            label.setText(summary)
+            label.setToolTip(by_course)
+    
+    def refresh_student_attendance(self, student_id, status):
+        """Reflect a status change for one student in the attendance table"""
+        self.attendance_page.attendance_model.update_student_status(student_id, status)
     
     def filter_masterlist_table(self):
-        """Filter the masterlist table based on search text"""
-        search_text = self.masterlist_page.masterlist_search_input.text().lower()
-        
-        all_students = self.db.get_all_students()
-        
-        filtered_students = []
-        for student in all_students:
-            matches_search = (
-                search_text in str(student['student_id']).lower() or
-                search_text in str(student['fname']).lower() or
-                search_text in str(student['year_level']).lower() or
-                search_text in str(student['course']).lower()
-            )
-            
-            if matches_search:
-                filtered_students.append(student)
+        """Filter the loaded masterlist rows based on search text"""
+        search_text = self.masterlist_page.masterlist_search_input.text()
+        if search_text:
+            # Searching needs the whole roster in memory; load the remainder once
+            self.masterlist_page.masterlist_model.fetch_all()
+        self.masterlist_page.masterlist_model.set_filter(search_text)
+    
+    def export_attendance_to_excel(self):
+        """Export the current attendance to an Excel, CSV or Parquet file on a background thread"""
+        if self.current_record_id:
+            context_type = "Record"
+            context_name = self.attendance_page.attendance_title.text().replace("Students for Record: ", "")
+            scope = {'record_id': self.current_record_id}
+        elif self.current_event_id:
+            context_type = "Event"
+            context_name = self.attendance_page.attendance_title.text().replace("Attendance for: ", "")
+            scope = {'event_id': self.current_event_id}
+        else:
+            QMessageBox.warning(self, "Error", "No attendance data to export.")
+            return
         
-        self.masterlist_page.masterlist_table.setRowCount(len(filtered_students))
+        if not self.attendance_page.attendance_model.all_rows():
+            QMessageBox.warning(self, "Error", "No attendance data to export.")
+            return
         
-        for row, student in enumerate(filtered_students):
-            student_id = str(student['student_id'])
-            fname = str(student['fname'])
-            year_level = str(student['year_level'])
-            course = str(student['course'])
-            
-            self.masterlist_page.masterlist_table.setItem(row, 0, QTableWidgetItem(student_id))
-            self.masterlist_page.masterlist_table.setItem(row, 1, QTableWidgetItem(fname))
-            self.masterlist_page.masterlist_table.setItem(row, 2, QTableWidgetItem(year_level))
-            self.masterlist_page.masterlist_table.setItem(row, 3, QTableWidgetItem(course))
+        file_path, selected_filter = QFileDialog.getSaveFileName(
+            self, 
+            "Save Attendance Report", 
+            f"attendance_report_{context_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
+            "Excel Files (*.xlsx);;CSV Files (*.csv);;Parquet Files (*.parquet)"
+        )
+        if not file_path:
+            QMessageBox.information(self, "Cancelled", "Export was cancelled.")
+            return
+        
+        # Honour the chosen file type even if the typed name kept another extension
+        fmt = selected_filter.split("*.")[-1].rstrip(")") if selected_filter else export_format(file_path)
+        if export_format(file_path) != fmt:
+            file_path = f"{os.path.splitext(file_path)[0]}.{fmt}"
+        
+        def export(progress, cancelled):
+            # Runs on a worker thread, so it needs its own connection
+            db = DatabaseManager()
+            try:
+                return export_attendance(db, file_path, f"{context_type}: {context_name}",
+                                         progress=progress, cancelled=cancelled, fmt=fmt, **scope)
+            finally:
+                db.close()
+        
+        self.run_background_job(
+            export, "Exporting attendance report...",
+            lambda count: QMessageBox.information(self, "Success", f"Attendance report exported successfully to:\n{file_path}"),
+            "Failed to export attendance report"
+        )
     
-    def export_attendance_to_excel(self):
-        """Export the current attendance table to an Excel file"""
-        try:
-            if hasattr(self, 'current_record_id') and self.current_record_id:
-                all_students = self.db.get_students_for_record(self.current_record_id)
-                context_type = "Record"
-                context_name = self.attendance_page.attendance_title.text().replace("Students for Record: ", "")
-            elif hasattr(self, 'current_event_id') and self.current_event_id:
-                all_students = self.db.get_attendance_for_event(self.current_event_id)
-                context_type = "Event"
-                context_name = self.attendance_page.attendance_title.text().replace("Attendance for: ", "")
-            else:
-                QMessageBox.warning(self, "Error", "No attendance data to export.")
-                return
-            
-            if not all_students:
-                QMessageBox.warning(self, "Error", "No attendance data to export.")
-                return
-            
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = "Attendance Data"
-            
-            ws['A1'] = f"Attendance Report - {context_type}: {context_name}"
-            ws['A2'] = f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-            ws['A3'] = f"Total Students: {len(all_students)}"
-            
-            headers = ["Student ID", "First Name", "Year Level", "Course", "Status", "Timestamp"]
-            for col, header in enumerate(headers, 1):
-                ws.cell(row=5, column=col, value=header)
-            
-            for row, student in enumerate(all_students, 6):
-                ws.cell(row=row, column=1, value=student['student_id'])
-                ws.cell(row=row, column=2, value=student['student_fname'])
-                ws.cell(row=row, column=3, value=student['student_year_level'])
-                ws.cell(row=row, column=4, value=student['student_course'])
-                ws.cell(row=row, column=5, value=student['status'])
-                ws.cell(row=row, column=6, value=str(student['timestamp']) if student['timestamp'] else '')
-            
-            for column in ws.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                ws.column_dimensions[column_letter].width = adjusted_width
-            
-            file_path, _ = QFileDialog.getSaveFileName(
-                self, 
-                "Save Attendance Report", 
-                f"attendance_report_{context_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-                "Excel Files (*.xlsx)"
-            )
-            
-            if file_path:
-                wb.save(file_path)
-                QMessageBox.information(self, "Success", f"Attendance report exported successfully to:\n{file_path}")
+    def export_event_summary_to_excel(self):
+        """Export the current event as a students x records pivot workbook"""
+        if not self.current_event_id:
+            QMessageBox.warning(self, "Error", "No event selected.")
+            return
+        
+        event_name = self.current_event_name
+        file_path, _ = QFileDialog.getSaveFileName(
+            self,
+            "Save Event Summary",
+            f"event_summary_{event_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
+            "Excel Files (*.xlsx)"
+        )
+        if not file_path:
+            QMessageBox.information(self, "Cancelled", "Export was cancelled.")
+            return
+        
+        event_id = self.current_event_id
+        
+        def export(progress, cancelled):
+            db = DatabaseManager()
+            try:
+                return export_event_pivot(db, file_path, event_id, event_name, progress=progress, cancelled=cancelled)
+            finally:
+                db.close()
+        
+        self.run_background_job(
+            export, "Exporting event summary...",
+            lambda count: QMessageBox.information(self, "Success", f"Event summary exported successfully to:\n{file_path}"),
+            "Failed to export event summary"
+        )
+    
+    def run_background_job(self, job, label, on_success, error_message, on_failure=None):
+        """Run job(progress, cancelled) on a worker thread behind a cancellable progress dialog
+        
+        on_failure(error), if given, runs after the error has been shown.
+        """
+        dialog = QProgressDialog(label, "Cancel", 0, 0, self)
+        dialog.setWindowModality(Qt.WindowModal)
+        dialog.setMinimumDuration(300)
+        
+        worker = BackgroundJob(job, self)
+        
+        def show_progress(done, total):
+            if total:
+                dialog.setMaximum(total)
+                dialog.setValue(min(done, total))
+        
+        def show_failure(error):
+            if isinstance(error, ExportCancelled):
+                QMessageBox.information(self, "Cancelled", "Operation was cancelled.")
             else:
-                QMessageBox.information(self, "Cancelled", "Export was cancelled.")
-                
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to export attendance report:\n{str(e)}")
-            print(f"Export error: {e}")
+                QMessageBox.critical(self, "Error", f"{error_message}:\n{str(error)}")
+                print(f"{error_message}: {error}")
+        
+        worker.progress.connect(show_progress)
+        worker.succeeded.connect(on_success)
+        worker.failed.connect(show_failure)
+        if on_failure is not None:
+            worker.failed.connect(on_failure)
+        worker.finished.connect(dialog.close)
+        worker.finished.connect(dialog.deleteLater)
+        worker.finished.connect(worker.deleteLater)
+        dialog.canceled.connect(worker.cancel)
+        worker.start()
+        return worker
     
     def add_event(self):
         """Add a new event to the database"""
@@ -376,43 +488,98 @@ class MainWindow(QMainWindow):
         """Add a new attendance record to the database"""
         record_name = self.records_page.record_name_input.text().strip()
         if record_name and self.current_event_id:
-            self.db.create_attendance_record(record_name, self.current_event_id)
+            if self.db.create_attendance_record(record_name, self.current_event_id) is None:
+                QMessageBox.warning(self, "Error", "Could not create the record. "
+                                    "If the event is archived, restore it from the events page first.")
+                return
             self.records_page.record_name_input.clear()
             self.populate_records_table(self.current_event_id)
             QMessageBox.information(self, "Success", f"Record '{record_name}' created successfully!")
         else:
             QMessageBox.warning(self, "Error", "Please enter a record name.")
     
+    def selected_event(self):
+        """Return the event selected on the events page, or None"""
+        indexes = self.events_page.events_table.selectionModel().selectedRows()
+        if not indexes:
+            QMessageBox.warning(self, "Error", "Please select an event.")
+            return None
+        return self.events_page.events_model.row_at(indexes[0].row())
+    
+    def archive_selected_event(self):
+        """Move the selected event's attendance to the archive on a background thread"""
+        event = self.selected_event()
+        if event is None:
+            return
+        if self.db.is_event_archived(event_id=event.event_id):
+            QMessageBox.information(self, "Archive", f"Event '{event.event_name}' is already archived.")
+            return
+        answer = QMessageBox.question(
+            self, "Archive Event",
+            f"Archive '{event.event_name}'? Its attendance stays viewable and exportable but becomes read-only."
+        )
+        if answer != QMessageBox.Yes:
+            return
+        self.run_event_archive_job(event, archive=True)
+    
+    def restore_selected_event(self):
+        """Move the selected event's attendance back from the archive on a background thread"""
+        event = self.selected_event()
+        if event is None:
+            return
+        if not self.db.is_event_archived(event_id=event.event_id):
+            QMessageBox.information(self, "Restore", f"Event '{event.event_name}' is not archived.")
+            return
+        self.run_event_archive_job(event, archive=False)
+    
+    def run_event_archive_job(self, event, archive):
+        """Archive or restore an event with its own database connection"""
+        event_id = event.event_id
+        
+        def move(progress, cancelled):
+            db = DatabaseManager()
+            try:
+                moved = db.archive_event(event_id) if archive else db.restore_event(event_id)
+            finally:
+                db.close()
+            if moved is None:
+                raise RuntimeError("The database rejected the change; see the console for details.")
+            return moved
+        
+        action = "archived" if archive else "restored"
+        
+        def show_result(moved):
+            self.populate_events_table()
+            QMessageBox.information(self, "Success", f"Event '{event.event_name}' {action} ({moved} attendance rows moved).")
+        
+        self.run_background_job(
+            move, "Archiving event..." if archive else "Restoring event...", show_result,
+            f"Failed to {'archive' if archive else 'restore'} event"
+        )
+    
     def view_event_attendance(self, row):
         """View attendance for a specific event"""
-        event_id = int(self.events_page.events_table.item(row, 0).text())
-        event_name = self.events_page.events_table.item(row, 1).text()
+        event = self.events_page.events_model.row_at(row)
         
-        self.current_event_id = event_id
-        self.attendance_page.attendance_title.setText(f"Attendance for: {event_name}")
-        self.populate_attendance_table(event_id)
+        self.current_event_id = event.event_id
+        # The whole event is shown, so no record is open
+        self.current_record_id = None
+        self.attendance_page.attendance_title.setText(f"Attendance for: {event.event_name}")
+        self.populate_attendance_table(event.event_id)
         
         self.central_widget.setCurrentWidget(self.attendance_page)
     
     def view_event_records(self, row):
         """View records for a specific event"""
-        event_name = self.events_page.events_table.item(row, 0).text()
+        event = self.events_page.events_model.row_at(row)
         
-        events = self.db.get_all_events()
-        event_id = None
-        for event in events:
-            if event['event_name'] == event_name:
-                event_id = event['event_id']
-                break
+        self.current_event_id = event.event_id
+        self.current_event_name = event.event_name
+        self.current_record_id = None
+        self.records_page.records_title.setText(f"Records for Event: {event.event_name}")
+        self.populate_records_table(event.event_id)
         
-        if event_id:
-            self.current_event_id = event_id
-            self.records_page.records_title.setText(f"Records for Event: {event_name}")
-            self.populate_records_table(event_id)
-            
-            self.central_widget.setCurrentWidget(self.records_page)
-        else:
-            QMessageBox.warning(self, "Error", "Could not find event information.")
+        self.central_widget.setCurrentWidget(self.records_page)
     
     def view_record_students(self, row):
         """View students for a specific record"""
@@ -434,46 +601,135 @@ class MainWindow(QMainWindow):
         else:
             QMessageBox.warning(self, "Error", "Could not find record information.")
 
+    def ingest_scans_for_record(self):
+        """Mark students present in the current record from QR codes in photos or video files"""
+        if not self.current_record_id:
+            QMessageBox.warning(self, "Error", "Open an attendance record first; scans are imported into one record.")
+            return
+        file_paths, _ = QFileDialog.getOpenFileNames(
+            self, "Select Photos or Video", "",
+            "Images and Videos (*.png *.jpg *.jpeg *.bmp *.tif *.tiff *.webp *.mp4 *.avi *.mov *.mkv *.m4v *.webm)"
+        )
+        if not file_paths:
+            return
+        record_id = self.current_record_id
+        
+        def run_ingest(progress, cancelled):
+            from batch_ingest import ingest
+            db = DatabaseManager()
+            try:
+                return ingest(db, record_id, file_paths, progress=progress, cancelled=cancelled)
+            finally:
+                db.close()
+        
+        def show_result(result):
+            if result.cancelled:
+                QMessageBox.information(self, "Cancelled", "Import was cancelled; nothing was committed.")
+                return
+            self.populate_students_table(record_id)
+            message = (f"{result.frames} frames decoded from {result.sources} files.\n"
+                       f"{result.committed} students marked present.")
+            if result.unknown:
+                message += f"\n{len(result.unknown)} codes not in the roster were skipped: " + ", ".join(sorted(result.unknown))
+            QMessageBox.information(self, "Scans Imported", message)
+        
+        self.run_background_job(run_ingest, "Decoding photos and video...", show_result, "Failed to import scans")
+    
+    def sync_roster_from_csv(self):
+        """Apply the differences between a roster CSV and the masterlist on a background thread"""
+        file_path, _ = QFileDialog.getOpenFileName(self, "Open Roster CSV", "", "CSV Files (*.csv)")
+        if not file_path:
+            return
+        
+        def sync(progress, cancelled):
+            db = DatabaseManager()
+            try:
+                result = db.sync_roster(file_path)
+                if result is not None and self.roster is not None:
+                    self.roster.revalidate(db)
+            finally:
+                db.close()
+            if result is None:
+                raise RuntimeError("The database rejected the changes; see the console for details.")
+            return result
+        
+        def show_result(result):
+            self.populate_masterlist_table()
+            message = (f"{result['inserted']} added, {result['updated']} updated, {result['unchanged']} unchanged.\n"
+                       f"{result['attendance_added']} attendance rows added to open records, "
+                       f"{result['attendance_refreshed']} refreshed.")
+            if result['missing']:
+                # The GUI never deletes students, so their attendance history is kept
+                message += (f"\n\n{result['missing']} students in the masterlist are not in the CSV. "
+                            f"They were kept, with their attendance history.")
+            QMessageBox.information(self, "Roster Synchronized", message)
+        
+        self.run_background_job(sync, "Synchronizing roster...", show_result, "Failed to synchronize roster")
+    
     def generate_qr_codes_for_all_students(self):
-        """Generate QR codes for all students, grouped by year level"""
-        print("generate qr_codes for all students")
+        """Generate QR codes for all students, grouped by year level, on a background thread"""
         students = self.db.get_all_students()
         if not students:
             QMessageBox.warning(self, "No Students", "No students found in the database.")
             return
-
-        output_dir = os.path.join(os.getcwd(), "student_qrcodes")
-        os.makedirs(output_dir, exist_ok=True)
-
-        year_groups = {}
-        for student in students:
-            year = str(student['year_level'])
-            if year not in year_groups:
-                year_groups[year] = []
-            year_groups[year].append(student)
-
-        for year, students_in_year in year_groups.items():
-            year_dir = os.path.join(output_dir, year)
-            os.makedirs(year_dir, exist_ok=True)
-            for student in students_in_year:
-                student_id = str(student['student_id'])
-                img = qrcode.make(student_id)
-                img.save(os.path.join(year_dir, f"{student_id}.png"))
         
-        QMessageBox.information(self, "QR Codes Generated", f"QR codes saved in:\n{output_dir}")
+        answer = QMessageBox.question(
+            self, "Printable Sheets",
+            "Also create printable badge sheets (one PDF per year level)?",
+            QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel, QMessageBox.No
+        )
+        if answer == QMessageBox.Cancel:
+            return
+        make_sheets = answer == QMessageBox.Yes
+        output_dir = QR_OUTPUT_DIR
+        
+        def generate(progress, cancelled):
+            result = generate_badges(students, output_dir, workers=QR_WORKERS, progress=progress, cancelled=cancelled)
+            if make_sheets and not result.cancelled:
+                result.sheets = compose_sheets(students, output_dir)
+            return result
+        
+        def show_result(result):
+            summary = (f"{result.generated} generated, {result.skipped} unchanged, "
+                       f"{result.removed} removed, {len(result.sheets)} sheet files")
+            if result.cancelled:
+                QMessageBox.information(self, "Cancelled", f"QR code generation was cancelled ({summary}).")
+            else:
+                QMessageBox.information(self, "QR Codes Generated", f"QR codes saved in:\n{output_dir}\n\n{summary}")
+        
+        self.run_background_job(generate, "Generating QR codes...", show_result, "Failed to generate QR codes")
     
     def closeEvent(self, event):
         """Handle application close event"""
-        self.camera_scanner.stop_camera()
-        self.db.close()
+        if self.camera_scanner:
+            self.camera_scanner.stop_camera()
+        if self.init_job is not None:
+            self.init_job.wait()
+        if self.roster_job is not None:
+            self.roster_job.wait()
+        if self.roster_db is not None:
+            self.roster_db.close()
+        if self.db:
+            self.db.close()
+        if METRICS_FILE:
+            self.write_metrics_file()
         event.accept()
 
 
+PROFILED_ACTIONS = ('show_*_page', 'populate_*_table', 'filter_*_table',
+                    'export_attendance_to_excel', 'generate_qr_codes_for_all_students')
+
+if PROFILE_DIR:
+    from profiling import install_profiling
+    install_profiling(MainWindow, PROFILED_ACTIONS, PROFILE_DIR)
+
+
 def main():
     """Main application entry point"""
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
+    startup_timer.mark("window shown")
     sys.exit(app.exec_())
 
 
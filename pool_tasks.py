@@ -0,0 +1,84 @@
+"""
+Tasks run in worker processes of the Attendance Management System
+
+Pools are started with the spawn method, so every worker imports this module
+and the launcher's __main__ module afresh. Keep this module free of Qt, of
+database access and of anything that runs on import; heavy libraries are
+imported inside the tasks.
+"""
+
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+
+def spawn_pool(workers=None):
+    """Return a process pool whose workers are spawned rather than forked
+
+    Forking the GUI process would copy its running Qt threads into the workers.
+    """
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+
+def render_badges(tasks):
+    """Render a chunk of (student_id, path) QR badges"""
+    import qrcode
+
+    for student_id, path in tasks:
+        qrcode.make(student_id).save(path)
+    return tasks
+
+
+def decode_images(paths):
+    """Decode a chunk of image files for batch ingestion
+
+    Returns (frames decoded, {student_id: (path, None)}).
+    """
+    import cv2
+    from qr_decode import student_ids
+
+    found = {}
+    frames = 0
+    for path in paths:
+        image = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            continue
+        frames += 1
+        for student_id in student_ids(image):
+            found.setdefault(student_id, (path, None))
+    return frames, found
+
+
+def decode_video_segment(path, start, stop, step):
+    """Decode every step-th frame of frames [start, stop) of a video for batch ingestion
+
+    With stop None the video is read until the capture runs out. Skipped
+    frames are only grabbed, not converted, which keeps the cost of a segment
+    close to the cost of its sampled frames.
+    Returns (frames decoded, {student_id: (path, seconds into the video)}).
+    """
+    import cv2
+    from qr_decode import student_ids
+
+    capture = cv2.VideoCapture(path)
+    fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+    if start:
+        capture.set(cv2.CAP_PROP_POS_FRAMES, start)
+    found = {}
+    frames = 0
+    positions = itertools.count(start) if stop is None else range(start, stop)
+    try:
+        for position in positions:
+            if (position - start) % step:
+                if not capture.grab():
+                    break
+                continue
+            ok, frame = capture.read()
+            if not ok:
+                break
+            frames += 1
+            for student_id in student_ids(frame):
+                found.setdefault(student_id, (path, round(position / fps, 1)))
+    finally:
+        capture.release()
+    return frames, found
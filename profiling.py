@@ -0,0 +1,172 @@
+"""
+Opt-in cProfile and tracemalloc hooks for the Attendance Management System
+
+Nothing in this module runs unless PROFILE_DIR is set: methods are only wrapped
+by install_profiling, so the application runs the original methods otherwise.
+Each profiled call writes <Class>.<method>-<time>-<n>.prof, which can be opened
+with pstats or snakeviz, and a .txt summary with timing, the top functions by
+cumulative time and the top allocation sites.
+"""
+
+import cProfile
+import fnmatch
+import functools
+import inspect
+import io
+import itertools
+import os
+import pstats
+import time
+import tracemalloc
+from datetime import datetime
+
+TOP_FUNCTIONS = 25
+TOP_ALLOCATIONS = 10
+
+_sequence = itertools.count(1)
+_active = False
+_SNAPSHOT_FILTERS = tuple(
+    tracemalloc.Filter(False, pattern)
+    for pattern in (__file__, tracemalloc.__file__, cProfile.__file__, pstats.__file__, "<frozen importlib._bootstrap*>")
+)
+
+
+def _profile_path(output_dir, qualname):
+    """Return a unique path prefix for one profile dump"""
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    return os.path.join(output_dir, f"{qualname}-{stamp}-{next(_sequence)}")
+
+
+def _positional_limit(function):
+    """Return how many positional arguments function accepts, or None for *args"""
+    code = function.__code__
+    if code.co_flags & inspect.CO_VARARGS:
+        return None
+    return code.co_argcount
+
+
+def _snapshot():
+    """Take a tracemalloc snapshot without the profiler's own allocations"""
+    return tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+
+
+def _write_summary(path, title, profiler, seconds, calls=1, memory=None):
+    """Dump the profile and write a human readable summary next to it"""
+    profiler.dump_stats(path + ".prof")
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+    with open(path + ".txt", 'w') as file:
+        file.write(f"{title}\n")
+        file.write(f"Calls: {calls}, wall time: {seconds * 1000:.1f} ms\n")
+        if memory:
+            net, peak, top = memory
+            file.write(f"Memory: net {net / 1024:+.1f} KiB, peak {peak / 1024:.1f} KiB\n")
+            file.write("\nTop allocation sites:\n")
+            for stat in top:
+                file.write(f"  {stat}\n")
+        file.write("\n")
+        file.write(stream.getvalue())
+
+
+def _profiled_call(method, output_dir):
+    """Wrap method so each call is written to its own profile"""
+    qualname = method.__qualname__
+    limit = _positional_limit(method)
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        global _active
+        if limit is not None:
+            # Qt signals may pass more arguments than the slot takes
+            args = args[:limit]
+        if _active:
+            # Nested actions are already covered by the outer profile
+            return method(*args, **kwargs)
+
+        _active = True
+        profiler = cProfile.Profile()
+        before = _snapshot()
+        start_memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            profiler.enable()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                profiler.disable()
+        finally:
+            seconds = time.perf_counter() - start
+            end_memory, peak = tracemalloc.get_traced_memory()
+            top = _snapshot().compare_to(before, 'lineno')[:TOP_ALLOCATIONS]
+            _active = False
+            try:
+                _write_summary(_profile_path(output_dir, qualname), qualname, profiler, seconds,
+                               memory=(end_memory - start_memory, peak - start_memory, top))
+            except OSError as e:
+                print(f"Error writing profile: {e}")
+    wrapper._profiled = True
+    return wrapper
+
+
+def _profiled_batch(method, output_dir, batch_size):
+    """Wrap a frequently called method, aggregating batch_size calls per profile"""
+    qualname = method.__qualname__
+    limit = _positional_limit(method)
+    state = {'profiler': cProfile.Profile(), 'calls': 0, 'seconds': 0.0}
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        global _active
+        if limit is not None:
+            args = args[:limit]
+        if _active:
+            return method(*args, **kwargs)
+
+        _active = True
+        start = time.perf_counter()
+        try:
+            state['profiler'].enable()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                state['profiler'].disable()
+        finally:
+            _active = False
+            state['seconds'] += time.perf_counter() - start
+            state['calls'] += 1
+            if state['calls'] >= batch_size:
+                try:
+                    _write_summary(_profile_path(output_dir, qualname), qualname, state['profiler'],
+                                   state['seconds'], calls=state['calls'])
+                except OSError as e:
+                    print(f"Error writing profile: {e}")
+                state.update(profiler=cProfile.Profile(), calls=0, seconds=0.0)
+    wrapper._profiled = True
+    return wrapper
+
+
+def install_profiling(cls, patterns, output_dir, batch_size=None):
+    """Wrap the methods of cls whose names match any of the glob patterns
+
+    With batch_size, calls are aggregated and one profile is written every
+    batch_size calls, which suits per-frame methods. Otherwise every call gets
+    its own profile and allocation report. Returns the wrapped method names.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+    wrapped = []
+    for name, method in list(vars(cls).items()):
+        if not inspect.isfunction(method) or getattr(method, '_profiled', False):
+            continue
+        if not any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns):
+            continue
+        if batch_size:
+            setattr(cls, name, _profiled_batch(method, output_dir, batch_size))
+        else:
+            setattr(cls, name, _profiled_call(method, output_dir))
+        wrapped.append(name)
+    return wrapped
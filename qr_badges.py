@@ -0,0 +1,183 @@
+"""
+Parallel, incremental QR badge generation for the Attendance Management System
+
+Badges are rendered in a process pool and recorded in a manifest, so running the
+generator again over an unchanged roster does no work. This module does not
+depend on Qt and can be used from scripts.
+"""
+
+import json
+import os
+from concurrent.futures import as_completed
+
+from pool_tasks import render_badges, spawn_pool
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+CHUNK_SIZE = 64
+
+# Print sheet layout: A4 at 150 DPI
+SHEET_SIZE = (1240, 1754)
+SHEET_MARGIN = 60
+SHEET_COLUMNS = 4
+SHEET_ROWS = 5
+CAPTION_HEIGHT = 40
+
+
+class BadgeResult:
+    """Outcome of a badge generation run"""
+
+    __slots__ = ('generated', 'skipped', 'removed', 'sheets', 'cancelled')
+
+    def __init__(self):
+        self.generated = 0
+        self.skipped = 0
+        self.removed = 0
+        self.sheets = []
+        self.cancelled = False
+
+
+def _load_manifest(output_dir):
+    """Read the badge manifest, returning an empty one if missing or outdated"""
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME)) as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {}
+    return manifest.get('badges', {})
+
+
+def _save_manifest(output_dir, badges):
+    """Atomically write the badge manifest"""
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w') as file:
+        json.dump({'version': MANIFEST_VERSION, 'badges': badges}, file)
+    os.replace(temp_path, path)
+
+
+def badge_path(student):
+    """Return the path of a student's badge relative to the output directory"""
+    return os.path.join(str(student['year_level']), f"{student['student_id']}.png")
+
+
+def generate_badges(students, output_dir, workers=None, force=False, progress=None, cancelled=None):
+    """Render QR badges for students, skipping those already recorded in the manifest
+
+    students are mappings with student_id and year_level. Badges are saved as
+    <output_dir>/<year_level>/<student_id>.png. Badges of students no longer in
+    the roster, or whose year level changed, are removed. progress(done, total)
+    is called as chunks finish and cancelled() is polled between chunks.
+    """
+    result = BadgeResult()
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = {} if force else _load_manifest(output_dir)
+
+    wanted = {}
+    tasks = []
+    for student in students:
+        student_id = str(student['student_id'])
+        relative_path = badge_path(student)
+        wanted[relative_path] = student_id
+        full_path = os.path.join(output_dir, relative_path)
+        if manifest.get(relative_path) == student_id and os.path.exists(full_path):
+            result.skipped += 1
+        else:
+            tasks.append((student_id, full_path))
+
+    for relative_path in set(manifest) - set(wanted):
+        try:
+            os.remove(os.path.join(output_dir, relative_path))
+        except OSError:
+            pass
+        del manifest[relative_path]
+        result.removed += 1
+
+    for directory in {os.path.dirname(path) for _, path in tasks}:
+        os.makedirs(directory, exist_ok=True)
+
+    if tasks:
+        chunks = [tasks[i:i + CHUNK_SIZE] for i in range(0, len(tasks), CHUNK_SIZE)]
+        pool = spawn_pool(workers)
+        try:
+            futures = [pool.submit(render_badges, chunk) for chunk in chunks]
+            for future in as_completed(futures):
+                for student_id, full_path in future.result():
+                    manifest[os.path.relpath(full_path, output_dir)] = student_id
+                    result.generated += 1
+                if progress:
+                    progress(result.generated, len(tasks))
+                if cancelled and cancelled():
+                    result.cancelled = True
+                    break
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    _save_manifest(output_dir, manifest)
+    return result
+
+
+def compose_sheets(students, output_dir, fmt='pdf'):
+    """Lay out each year level's badges on printable A4 pages with captions
+
+    Writes one <year_level>.pdf (multi-page) or one <year_level>_<page>.png per
+    page under <output_dir>/sheets and returns the written paths. Sheets of the
+    same format left from earlier runs, for year levels or pages that no longer
+    exist, are removed. Badges must already exist, see generate_badges.
+    """
+    from PIL import Image, ImageDraw, ImageFont
+
+    sheets_dir = os.path.join(output_dir, "sheets")
+    os.makedirs(sheets_dir, exist_ok=True)
+    font = ImageFont.load_default()
+
+    year_groups = {}
+    for student in students:
+        year_groups.setdefault(str(student['year_level']), []).append(student)
+
+    cell_width = (SHEET_SIZE[0] - 2 * SHEET_MARGIN) // SHEET_COLUMNS
+    cell_height = (SHEET_SIZE[1] - 2 * SHEET_MARGIN) // SHEET_ROWS
+    badge_size = min(cell_width, cell_height - CAPTION_HEIGHT) - 10
+    per_page = SHEET_COLUMNS * SHEET_ROWS
+
+    def pages(students_in_year):
+        """Yield the year level's pages one at a time, so only one is held in memory"""
+        for start in range(0, len(students_in_year), per_page):
+            page = Image.new('RGB', SHEET_SIZE, 'white')
+            draw = ImageDraw.Draw(page)
+            for slot, student in enumerate(students_in_year[start:start + per_page]):
+                left = SHEET_MARGIN + (slot % SHEET_COLUMNS) * cell_width
+                top = SHEET_MARGIN + (slot // SHEET_COLUMNS) * cell_height
+                with Image.open(os.path.join(output_dir, badge_path(student))) as badge:
+                    badge = badge.convert('RGB').resize((badge_size, badge_size), Image.NEAREST)
+                page.paste(badge, (left + (cell_width - badge_size) // 2, top))
+                caption = f"{student['student_id']}  {student.get('fname', '')}".strip()
+                draw.text((left + 10, top + badge_size + 8), caption, fill='black', font=font)
+            yield page
+
+    written = []
+    for year, students_in_year in sorted(year_groups.items()):
+        if fmt == 'pdf':
+            path = os.path.join(sheets_dir, f"{year}.pdf")
+            # The first page replaces any earlier file; later pages are appended to it
+            for number, page in enumerate(pages(students_in_year)):
+                page.save(path, append=number > 0, resolution=150)
+            written.append(path)
+        else:
+            for number, page in enumerate(pages(students_in_year), 1):
+                path = os.path.join(sheets_dir, f"{year}_{number}.png")
+                page.save(path)
+                written.append(path)
+
+    extension = '.pdf' if fmt == 'pdf' else '.png'
+    keep = set(written)
+    for name in os.listdir(sheets_dir):
+        path = os.path.join(sheets_dir, name)
+        if name.lower().endswith(extension) and path not in keep:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    return written
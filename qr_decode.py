@@ -0,0 +1,196 @@
+"""
+QR code decoding shared by the live scanner and batch ingestion
+
+Two decoder backends are available: zbar through pyzbar and OpenCV's
+QRCodeDetector. Calibration benchmarks them on the same frames so the scanner
+can pick the fastest one that still decodes reliably. Run this module on a
+recording to compare the backends offline:
+
+    python qr_decode.py entrance.mp4
+
+This module does not depend on Qt, so it can be imported by worker processes.
+"""
+
+import sys
+import time
+import cv2
+
+# A backend must decode at least this share of the frames the best backend
+# decoded to be chosen by calibration
+CALIBRATION_MIN_DECODE_RATE = 0.9
+
+
+class PyzbarDecoder:
+    """zbar decoder restricted to QR symbols"""
+
+    name = 'pyzbar'
+
+    def __init__(self):
+        from pyzbar.pyzbar import decode, ZBarSymbol
+        self._decode = decode
+        self._symbols = [ZBarSymbol.QRCODE]
+
+    def decode(self, gray):
+        """Return (text, polygon) pairs for the QR codes in a grayscale frame"""
+        return [(obj.data.decode('utf-8'), obj.polygon) for obj in self._decode(gray, symbols=self._symbols)]
+
+
+class OpenCVDecoder:
+    """OpenCV QRCodeDetector, decoding every code in the frame"""
+
+    name = 'opencv'
+
+    def __init__(self):
+        self._detector = cv2.QRCodeDetector()
+
+    def decode(self, gray):
+        """Return (text, polygon) pairs for the QR codes in a grayscale frame"""
+        ok, texts, points, _ = self._detector.detectAndDecodeMulti(gray)
+        if not ok:
+            return []
+        return [(text, polygon) for text, polygon in zip(texts, points) if text]
+
+
+# In order of preference when calibration has nothing to go on
+DECODERS = {decoder.name: decoder for decoder in (PyzbarDecoder, OpenCVDecoder)}
+
+_default_decoder = None
+
+
+def available_decoders():
+    """Return an instance of every backend whose library can be loaded"""
+    decoders = []
+    for decoder_class in DECODERS.values():
+        try:
+            decoders.append(decoder_class())
+        except (ImportError, OSError) as e:
+            # pyzbar raises ImportError when the zbar shared library is missing
+            print(f"QR decoder '{decoder_class.name}' unavailable: {e}")
+    return decoders
+
+
+def get_decoder(name='auto'):
+    """Return the named backend, or for 'auto' the first available one in DECODERS order"""
+    if name != 'auto':
+        if name not in DECODERS:
+            raise ValueError(f"Unknown QR decoder '{name}', expected one of: auto, {', '.join(DECODERS)}")
+        return DECODERS[name]()
+    decoders = available_decoders()
+    if not decoders:
+        raise RuntimeError("No QR decoder is available; install pyzbar and zbar, or OpenCV")
+    return decoders[0]
+
+
+def default_decoder():
+    """Return the decoder used when none is passed, created on first use"""
+    global _default_decoder
+    if _default_decoder is None:
+        from config import QR_DECODER
+        _default_decoder = get_decoder(QR_DECODER)
+    return _default_decoder
+
+
+def to_grayscale(frame, dst=None):
+    """Return a single-channel view of a BGR or grayscale frame
+
+    When dst is a uint8 array of the frame's height and width the conversion
+    is written into it instead of a new array.
+    """
+    if frame.ndim == 2:
+        return frame
+    if dst is not None and dst.shape == frame.shape[:2]:
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=dst)
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+
+def decode_frame(frame, gray_buffer=None, decoder=None):
+    """Decode the QR codes in a frame, returning (text, polygon) pairs
+
+    Both backends work on luminance only, so frames are converted to grayscale
+    once here (into gray_buffer when given).
+    """
+    return (decoder or default_decoder()).decode(to_grayscale(frame, gray_buffer))
+
+
+def student_ids(frame, decoder=None):
+    """Return the distinct, stripped student IDs encoded in a frame"""
+    return {text.strip() for text, _ in decode_frame(frame, decoder=decoder) if text.strip()}
+
+
+class Calibration:
+    """Benchmark of decoder backends run on the same frames"""
+
+    def __init__(self, decoders):
+        self.decoders = decoders
+        self.frames = 0
+        self.seconds = {decoder.name: 0.0 for decoder in decoders}
+        self.decoded = {decoder.name: 0 for decoder in decoders}
+
+    def add(self, gray):
+        """Time every backend on a grayscale frame and return the first backend's results"""
+        first = None
+        for decoder in self.decoders:
+            start = time.perf_counter()
+            results = decoder.decode(gray)
+            self.seconds[decoder.name] += time.perf_counter() - start
+            if results:
+                self.decoded[decoder.name] += 1
+            if first is None:
+                first = results
+        self.frames += 1
+        return first
+
+    def has_codes(self):
+        """Whether any backend decoded a code, i.e. whether reliability can be compared"""
+        return any(self.decoded.values())
+
+    def choose(self):
+        """Return the fastest backend that decoded nearly as many frames as the best one
+
+        Without any decoded frames the first backend (the preferred one) is kept.
+        """
+        if not self.has_codes():
+            return self.decoders[0]
+        best = max(self.decoded.values())
+        reliable = [decoder for decoder in self.decoders
+                    if self.decoded[decoder.name] >= best * CALIBRATION_MIN_DECODE_RATE]
+        return min(reliable, key=lambda decoder: self.seconds[decoder.name])
+
+    def summary(self):
+        """Return one line per backend with its mean time and decode count"""
+        frames = max(self.frames, 1)
+        return [f"{name}: {self.seconds[name] / frames * 1000:.1f} ms/frame, "
+                f"decoded {self.decoded[name]}/{self.frames} frames"
+                for name in self.seconds]
+
+
+def calibrate_video(path, max_frames=300, step=5):
+    """Benchmark every available backend on every step-th frame of a recording"""
+    decoders = available_decoders()
+    if not decoders:
+        raise RuntimeError("No QR decoder is available; install pyzbar and zbar, or OpenCV")
+    calibration = Calibration(decoders)
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise ValueError(f"Could not open video: {path}")
+    position = 0
+    try:
+        while calibration.frames < max_frames:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            if position % step == 0:
+                calibration.add(to_grayscale(frame))
+            position += 1
+    finally:
+        capture.release()
+    return calibration
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        sys.exit("usage: python qr_decode.py <video file>")
+    result = calibrate_video(sys.argv[1])
+    for line in result.summary():
+        print(line)
+    print(f"Chosen: {result.choose().name}")
@@ -0,0 +1,178 @@
+"""
+Local on-disk snapshot of the Students roster
+
+A kiosk loads the snapshot at startup instead of pulling the whole Students
+table, then revalidates it against MySQL in the background. The snapshot is
+keyed by a change marker (student count and latest Students.updated_at); when
+the marker moved, only students edited since the snapshot are fetched, plus the
+ID list when students were deleted.
+
+The file is a small fixed header followed by zlib-compressed UTF-8 text with
+unit and record separators between fields and rows, so loading it is one read,
+one decompress and two splits. It never holds code, unlike a pickle.
+"""
+
+import os
+import struct
+import threading
+import zlib
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+from config import DB_HOST, DB_PORT, DB_NAME
+from rows import StudentRow
+
+MAGIC = b'ATTROSTR'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('>8sHqIH')  # magic, version, changed_at in microseconds (-1 for none), count, identity length
+FIELD_SEPARATOR = '\x1f'
+ROW_SEPARATOR = '\x1e'
+EPOCH = datetime(1970, 1, 1)
+# Students committed slightly out of timestamp order are re-read rather than missed
+CHANGE_OVERLAP = timedelta(seconds=2)
+
+
+def database_identity():
+    """Return the string identifying the database a snapshot was taken from"""
+    return f"{DB_HOST}:{DB_PORT}/{DB_NAME}"
+
+
+class RosterSnapshot:
+    """Students by ID, sorted IDs for paging, and the change marker they were read at"""
+
+    __slots__ = ('students', 'ids', 'changed_at', 'total')
+
+    def __init__(self, students, changed_at=None):
+        self.students = students
+        self.ids = sorted(students)
+        self.changed_at = changed_at
+        self.total = len(students)
+
+    def marker(self):
+        return self.total, self.changed_at
+
+
+def save_snapshot(path, snapshot, identity):
+    """Write a snapshot atomically, replacing any previous file"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    body = ROW_SEPARATOR.join(
+        FIELD_SEPARATOR.join((row.student_id, row.fname, row.year_level, row.course))
+        for row in map(snapshot.students.get, snapshot.ids)
+    ).encode('utf-8')
+    changed_us = -1 if snapshot.changed_at is None else (snapshot.changed_at - EPOCH) // timedelta(microseconds=1)
+    identity_bytes = identity.encode('utf-8')
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, FORMAT_VERSION, changed_us, snapshot.total, len(identity_bytes)))
+        file.write(identity_bytes)
+        file.write(zlib.compress(body, 1))
+    os.replace(temp_path, path)
+
+
+def load_snapshot(path, identity):
+    """Read a snapshot, or return None if it is missing, damaged, from another version or another database"""
+    try:
+        with open(path, 'rb') as file:
+            data = file.read()
+        magic, version, changed_us, total, identity_length = HEADER.unpack_from(data)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            return None
+        start = HEADER.size + identity_length
+        if data[HEADER.size:start].decode('utf-8') != identity:
+            return None
+        body = zlib.decompress(data[start:]).decode('utf-8')
+    except (OSError, struct.error, zlib.error, UnicodeDecodeError):
+        return None
+    rows = [StudentRow(*line.split(FIELD_SEPARATOR)) for line in body.split(ROW_SEPARATOR)] if body else []
+    if len(rows) != total:
+        return None
+    changed_at = None if changed_us < 0 else EPOCH + timedelta(microseconds=changed_us)
+    return RosterSnapshot({row.student_id: row for row in rows}, changed_at)
+
+
+class RosterCache:
+    """Roster served from a local snapshot and revalidated against the database on demand
+
+    Reads use whichever snapshot is current; revalidate() builds a new one and
+    swaps it in, so it can run on a worker thread while the UI keeps reading.
+    """
+
+    def __init__(self, path, identity=None):
+        self.path = path
+        self.identity = identity or database_identity()
+        self.snapshot = (load_snapshot(path, self.identity) if path else None) or RosterSnapshot({})
+        # Whether the snapshot reflects the roster: loaded from disk or revalidated
+        self.ready = self.snapshot.changed_at is not None
+        self._lock = threading.Lock()
+
+    def get(self, student_id):
+        """Return the StudentRow of a student, or None"""
+        return self.snapshot.students.get(student_id)
+
+    def __contains__(self, student_id):
+        return student_id in self.snapshot.students
+
+    def __len__(self):
+        return self.snapshot.total
+
+    def students_page(self, after_student_id=None, limit=None):
+        """Return StudentRow objects ordered by ID after the given ID, like DatabaseManager.get_students_page"""
+        snapshot = self.snapshot
+        start = 0 if after_student_id is None else bisect_right(snapshot.ids, after_student_id)
+        stop = len(snapshot.ids) if limit is None else start + limit
+        return [snapshot.students[student_id] for student_id in snapshot.ids[start:stop]]
+
+    def revalidate(self, db):
+        """Bring the snapshot up to date with the database and save it
+
+        Returns the number of students added, edited or removed (0 when the
+        snapshot was current), or None if the database could not be read.
+        """
+        with self._lock:
+            current = self.snapshot
+            marker = db.get_roster_marker()
+            if marker is None:
+                return None
+            if (marker['total'], marker['changed_at']) == current.marker():
+                self.ready = True
+                return 0
+
+            since = current.changed_at - CHANGE_OVERLAP if current.changed_at else None
+            changed_rows = db.get_students_changed_since(since)
+            if changed_rows is None:
+                return None
+            students = dict(current.students) if since else {}
+            changed = 0
+            for row in changed_rows:
+                old = students.get(row.student_id)
+                if old is None or (old.fname, old.year_level, old.course) != (row.fname, row.year_level, row.course):
+                    changed += 1
+                students[row.student_id] = row
+
+            # Inserts and edits are all in the delta, so more students than the
+            # database holds means some were deleted
+            if len(students) > marker['total']:
+                ids = db.get_student_ids()
+                if ids is None:
+                    return None
+                keep = set(ids)
+                removed = [student_id for student_id in students if student_id not in keep]
+                for student_id in removed:
+                    del students[student_id]
+                changed += len(removed)
+            if len(students) != marker['total']:
+                # Rows written with an older timestamp than the snapshot's were missed; start over
+                full_rows = db.get_students_changed_since(None)
+                if full_rows is None:
+                    return None
+                students = {row.student_id: row for row in full_rows}
+                changed = max(changed, abs(len(students) - current.total))
+
+            self.snapshot = RosterSnapshot(students, marker['changed_at'])
+            self.ready = True
+            if self.path:
+                try:
+                    save_snapshot(self.path, self.snapshot, self.identity)
+                except OSError as err:
+                    print(f"Error saving roster snapshot: {err}")
+            return changed
@@ -0,0 +1,87 @@
+"""
+Compact row types for the Attendance Management System
+"""
+
+
+class AttendanceRow:
+    """A single student's attendance entry within an attendance record"""
+
+    __slots__ = ('record_id', 'student_id', 'fname', 'year_level', 'course', 'status', 'timestamp')
+
+    def __init__(self, record_id, student_id, fname, year_level, course, status, timestamp):
+        self.record_id = record_id
+        self.student_id = student_id
+        self.fname = fname
+        self.year_level = year_level
+        self.course = course
+        self.status = status
+        self.timestamp = timestamp
+
+    @classmethod
+    def from_dict(cls, row):
+        """Build a row from a DictCursor result of the Attendance table"""
+        return cls(
+            row.get('record_id'),
+            str(row['student_id']),
+            str(row['student_fname']),
+            str(row['student_year_level']),
+            str(row['student_course']),
+            str(row['status']),
+            row['timestamp']
+        )
+
+    def __repr__(self):
+        return f"AttendanceRow({self.record_id!r}, {self.student_id!r}, {self.status!r})"
+
+
+class StudentRow:
+    """A single student from the Students masterlist"""
+
+    __slots__ = ('student_id', 'fname', 'year_level', 'course')
+
+    def __init__(self, student_id, fname, year_level, course):
+        self.student_id = student_id
+        self.fname = fname
+        self.year_level = year_level
+        self.course = course
+
+    @classmethod
+    def from_dict(cls, row):
+        """Build a row from a DictCursor result of the Students table"""
+        return cls(
+            str(row['student_id']),
+            str(row['fname']),
+            str(row['year_level']),
+            str(row['course'])
+        )
+
+    def __repr__(self):
+        return f"StudentRow({self.student_id!r}, {self.fname!r})"
+
+
+class EventRow:
+    """A single event from the Events table"""
+
+    __slots__ = ('event_id', 'event_name', 'event_date', 'record_count', 'present_count', 'archived')
+
+    def __init__(self, event_id, event_name, event_date, record_count=None, present_count=None, archived=False):
+        self.event_id = event_id
+        self.event_name = event_name
+        self.event_date = event_date
+        self.record_count = record_count
+        self.present_count = present_count
+        self.archived = bool(archived)
+
+    @classmethod
+    def from_dict(cls, row):
+        """Build a row from a DictCursor result of the Events table"""
+        return cls(row['event_id'], str(row['event_name']), row['event_date'],
+                   row.get('record_count'), row.get('present_count'), row.get('archived', False))
+
+    @property
+    def status(self):
+        """The event's state as shown in the events table"""
+        return "Archived" if self.archived else "Active"
+
+    def __repr__(self):
+        return f"EventRow({self.event_id!r}, {self.event_name!r})"
@@ -9,14 +9,19 @@ import os
 # Add the current directory to Python path to ensure imports work
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-try:
-    from main_app import main
-    main()
-except ImportError as e:
-    print(f"Import Error: {e}")
-    print("Please ensure all dependencies are installed:")
-    print("pip install -r requirements.txt")
-    sys.exit(1)
-except Exception as e:
-    print(f"Error starting application: {e}")
-    sys.exit(1)
+# Worker processes spawned by the badge and ingestion pools import this module
+# again, so the application is only started when it is run as a script
+if __name__ == "__main__":
+    try:
+        # Start the startup clock before the application modules are imported
+        import startup_timer  # noqa: F401
+        from main_app import main
+        main()
+    except ImportError as e:
+        print(f"Import Error: {e}")
+        print("Please ensure all dependencies are installed:")
+        print("pip install -r requirements.txt")
+        sys.exit(1)
+    except Exception as e:
+        print(f"Error starting application: {e}")
+        sys.exit(1)
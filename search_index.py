@@ -0,0 +1,126 @@
+"""
+Precomputed search index for roster and attendance lookups
+"""
+
+GRAM_SIZE = 3
+
+
+def normalize(text):
+    """Normalize text the same way for indexed values and queries"""
+    return str(text).strip().lower()
+
+
+def trigrams(text):
+    """Return the distinct trigrams of an already normalized string"""
+    return {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+class SearchIndex:
+    """Substring search over row fields plus exact-match facets, keyed by row position
+
+    Distinct field values are indexed rather than rows, so the many rows sharing a
+    course or year level cost one vocabulary entry. A query is answered by
+    intersecting the trigram postings of the query, confirming the few candidate
+    values with a substring check, and unioning their row keys.
+    """
+
+    def __init__(self, search_fields, facet_fields=()):
+        self._search_fields = tuple(search_fields)
+        self._facet_fields = tuple(facet_fields)
+        self.clear()
+
+    def clear(self):
+        """Drop every indexed row"""
+        self._values = {}
+        self._grams = {}
+        self._row_values = {}
+        self._facets = {field: {} for field in self._facet_fields}
+        self._row_facets = {}
+
+    def __len__(self):
+        return len(self._row_values)
+
+    def add(self, key, row):
+        """Index a row under the given key"""
+        values = tuple({normalize(getattr(row, field)) for field in self._search_fields})
+        self._row_values[key] = values
+        for value in values:
+            keys = self._values.get(value)
+            if keys is None:
+                keys = self._values[value] = set()
+                for gram in trigrams(value):
+                    self._grams.setdefault(gram, set()).add(value)
+            keys.add(key)
+
+        facets = tuple(getattr(row, field) for field in self._facet_fields)
+        self._row_facets[key] = facets
+        for field, value in zip(self._facet_fields, facets):
+            self._facets[field].setdefault(value, set()).add(key)
+
+    def remove(self, key):
+        """Remove a row from the index"""
+        for value in self._row_values.pop(key, ()):
+            keys = self._values[value]
+            keys.discard(key)
+            if not keys:
+                del self._values[value]
+                for gram in trigrams(value):
+                    postings = self._grams[gram]
+                    postings.discard(value)
+                    if not postings:
+                        del self._grams[gram]
+
+        for field, value in zip(self._facet_fields, self._row_facets.pop(key, ())):
+            self._facets[field][value].discard(key)
+
+    def update(self, key, row):
+        """Re-index a row whose fields changed"""
+        self.remove(key)
+        self.add(key, row)
+
+    def update_facet(self, key, field, value):
+        """Move a row to a new facet value without touching its text entries"""
+        position = self._facet_fields.index(field)
+        facets = list(self._row_facets[key])
+        old_value = facets[position]
+        if old_value == value:
+            return
+        self._facets[field][old_value].discard(key)
+        self._facets[field].setdefault(value, set()).add(key)
+        facets[position] = value
+        self._row_facets[key] = tuple(facets)
+
+    def search(self, text='', **facets):
+        """Return the set of keys matching text and facets, or None when nothing is filtered"""
+        result = None
+        for field, value in facets.items():
+            if value is None:
+                continue
+            keys = self._facets[field].get(value, set())
+            result = set(keys) if result is None else result & keys
+
+        text = normalize(text)
+        if text:
+            keys = self._match_text(text)
+            result = keys if result is None else result & keys
+        return result
+
+    def _match_text(self, text):
+        """Return the keys of rows with at least one field containing text"""
+        if len(text) >= GRAM_SIZE:
+            postings = []
+            for gram in trigrams(text):
+                values = self._grams.get(gram)
+                if not values:
+                    return set()
+                postings.append(values)
+            postings.sort(key=len)
+            candidates = postings[0].intersection(*postings[1:])
+        else:
+            candidates = self._values
+
+        keys = set()
+        for value in candidates:
+            if text in value:
+                keys |= self._values[value]
+        return keys
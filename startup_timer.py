@@ -0,0 +1,36 @@
+"""
+Startup timing report for the Attendance Management System
+
+Import this module as early as possible so its clock starts close to process start.
+"""
+
+import json
+import time
+from datetime import datetime
+
+_START = time.perf_counter()
+_marks = []
+
+
+def mark(label):
+    """Record how long after startup a milestone was reached"""
+    _marks.append((label, time.perf_counter() - _START))
+
+
+def elapsed_ms():
+    """Return the milliseconds elapsed since startup"""
+    return (time.perf_counter() - _START) * 1000
+
+
+def report(path=None):
+    """Print the recorded milestones and optionally append them to a JSON lines file"""
+    milestones = {label: round(seconds * 1000, 1) for label, seconds in _marks}
+    print("Startup timing: " + ", ".join(f"{label} {ms:.0f} ms" for label, ms in milestones.items()))
+    if path:
+        try:
+            with open(path, 'a') as file:
+                file.write(json.dumps({'started_at': datetime.now().isoformat(timespec='seconds'),
+                                       'milestones_ms': milestones}) + "\n")
+        except OSError as err:
+            print(f"Error writing startup report: {err}")
+    return milestones
@@ -0,0 +1,332 @@
+"""
+Qt item models and delegates backing the tables of the Attendance Management System
+"""
+
+from datetime import datetime
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+from PyQt5.QtWidgets import QStyledItemDelegate, QComboBox
+from config import ATTENDANCE_STATUSES, TABLE_PAGE_SIZE
+from search_index import SearchIndex
+from attendance_counts import AttendanceCounts
+from metrics import REGISTRY
+
+TABLE_REBUILD_SECONDS = REGISTRY.histogram('attendance_ui_table_rebuild_seconds',
+                                           'Time spent rebuilding table models', ('table', 'operation'))
+
+
+class RowTableModel(QAbstractTableModel):
+    """Read-only table model over a list of slotted row objects with indexed filtering"""
+
+    HEADERS = ()
+    FIELDS = ()
+    KEY_FIELD = 'student_id'
+    SEARCH_FIELDS = ()
+    FACET_FIELDS = ()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._all_rows = []
+        self._rows = []
+        self._positions = {}
+        self._search_text = ''
+        self._facets = {}
+        self._index = SearchIndex(self.SEARCH_FIELDS, self.FACET_FIELDS)
+        self._fetcher = None
+        self._page_size = TABLE_PAGE_SIZE
+        self._exhausted = True
+
+    def set_fetcher(self, fetcher, page_size=TABLE_PAGE_SIZE):
+        """Load rows lazily through fetcher(last_row, limit) as the view scrolls
+
+        The fetcher receives the last loaded row (None for the first page) and
+        the maximum number of rows to return, or None for all remaining rows.
+        """
+        self._fetcher = fetcher
+        self._page_size = page_size
+        self._exhausted = False
+        self.set_rows([])
+        self.fetchMore()
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._fetcher is not None and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        """Fetch and append the next page of rows"""
+        if not self.canFetchMore(parent):
+            return
+        self._fetch(self._page_size)
+
+    def fetch_all(self):
+        """Fetch every remaining row in a single request"""
+        if self.canFetchMore():
+            self._fetch(None)
+
+    def _fetch(self, limit):
+        """Append up to limit rows from the fetcher"""
+        last_row = self._all_rows[-1] if self._all_rows else None
+        rows = self._fetcher(last_row, limit)
+        if limit is None or len(rows) < limit:
+            self._exhausted = True
+        self.append_rows(rows)
+
+    def set_rows(self, rows):
+        """Replace the loaded rows, rebuild the search index and re-apply the filter"""
+        with TABLE_REBUILD_SECONDS.time(table=type(self).__name__, operation='load'):
+            self._all_rows = rows if isinstance(rows, list) else list(rows)
+            self._index.clear()
+            for key, row in enumerate(self._all_rows):
+                self._index.add(key, row)
+                self._row_added(key, row)
+            self._refilter()
+
+    def append_rows(self, rows):
+        """Add rows to the loaded set, indexing them incrementally"""
+        rows = list(rows)
+        if not rows:
+            return
+        with TABLE_REBUILD_SECONDS.time(table=type(self).__name__, operation='append'):
+            self._append_rows(rows)
+
+    def _append_rows(self, rows):
+        start = len(self._all_rows)
+        self._all_rows.extend(rows)
+        for key, row in enumerate(rows, start):
+            self._index.add(key, row)
+            self._row_added(key, row)
+        keys = self._index.search(self._search_text, **self._facets)
+        visible = [row for key, row in enumerate(rows, start) if keys is None or key in keys]
+        if visible:
+            first = len(self._rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(visible) - 1)
+            for position, row in enumerate(visible, first):
+                self._rows.append(row)
+                self._positions.setdefault(getattr(row, self.KEY_FIELD), []).append(position)
+            self.endInsertRows()
+
+    def set_filter(self, search_text='', **facets):
+        """Show only loaded rows containing search_text and matching the facet values"""
+        self._search_text = search_text
+        self._facets = facets
+        with TABLE_REBUILD_SECONDS.time(table=type(self).__name__, operation='filter'):
+            self._refilter()
+
+    def _refilter(self):
+        """Recompute the visible rows from the search index"""
+        keys = self._index.search(self._search_text, **self._facets)
+        self.beginResetModel()
+        if keys is None:
+            self._rows = list(self._all_rows)
+        else:
+            self._rows = [self._all_rows[key] for key in sorted(keys)]
+        self._reindex()
+        self.endResetModel()
+
+    def _row_added(self, key, row):
+        """Hook for subclasses to track a newly loaded row"""
+
+    def _reindex(self):
+        """Rebuild the row key -> visible positions lookup"""
+        key_field = self.KEY_FIELD
+        positions = {}
+        for position, row in enumerate(self._rows):
+            positions.setdefault(getattr(row, key_field), []).append(position)
+        self._positions = positions
+
+    def row_at(self, position):
+        """Return the row displayed at the given position"""
+        return self._rows[position]
+
+    def rows(self):
+        """Return the rows currently visible through the filter"""
+        return self._rows
+
+    def all_rows(self):
+        """Return every loaded row regardless of the filter"""
+        return self._all_rows
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.EditRole):
+            return None
+        value = getattr(self._rows[index.row()], self.FIELDS[index.column()])
+        if value.__class__ is str:
+            return value
+        return '' if value is None else str(value)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return section + 1
+
+
+class StudentTableModel(RowTableModel):
+    """Masterlist model over StudentRow objects"""
+
+    HEADERS = ("Student ID", "First Name", "Year Level", "Course")
+    FIELDS = ('student_id', 'fname', 'year_level', 'course')
+    SEARCH_FIELDS = FIELDS
+
+
+class EventTableModel(RowTableModel):
+    """Events model over EventRow objects"""
+
+    HEADERS = ("Event Name", "Date Created", "Records", "Present", "Status")
+    FIELDS = ('event_name', 'event_date', 'record_count', 'present_count', 'status')
+    KEY_FIELD = 'event_id'
+    SEARCH_FIELDS = ('event_name',)
+
+
+class AttendanceTableModel(RowTableModel):
+    """Attendance model over AttendanceRow objects with an editable status column"""
+
+    HEADERS = ("Student ID", "First Name", "Year Level", "Course", "Timestamp", "Status")
+    FIELDS = ('student_id', 'fname', 'year_level', 'course', 'timestamp', 'status')
+    SEARCH_FIELDS = ('student_id', 'fname', 'year_level', 'course')
+    FACET_FIELDS = ('status',)
+    TIMESTAMP_COLUMN = 4
+    STATUS_COLUMN = 5
+
+    # Emitted with (row, old_status, old_timestamp) after the user edits a status cell
+    status_changed = pyqtSignal(object, str, object)
+    # Emitted after the counts are seeded or moved
+    counts_changed = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._by_student = {}
+        self.editable = True
+        self.counts = AttendanceCounts()
+
+    def seed_counts(self, totals):
+        """Reset the live counters from DatabaseManager.get_attendance_counts rows"""
+        self.counts.seed(totals)
+        self.counts_changed.emit()
+
+    def set_rows(self, rows):
+        """Replace the loaded rows, rebuild the search index and re-apply the filter"""
+        self._by_student = {}
+        super().set_rows(rows)
+
+    def _row_added(self, key, row):
+        """Remember which loaded rows belong to each student"""
+        self._by_student.setdefault(row.student_id, []).append(key)
+
+    def set_status_filter(self, search_text, status):
+        """Filter by search text and an attendance status (None for all statuses)"""
+        self.set_filter(search_text, status=status)
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if self.editable and index.isValid() and index.column() == self.STATUS_COLUMN:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=Qt.EditRole):
+        """Apply a status edit made through the view"""
+        if not index.isValid() or role != Qt.EditRole or index.column() != self.STATUS_COLUMN:
+            return False
+        row = self._rows[index.row()]
+        if value == row.status:
+            return False
+        old_status, old_timestamp = row.status, row.timestamp
+        self.set_row_status(row, value, datetime.now().replace(microsecond=0))
+        self.status_changed.emit(row, old_status, old_timestamp)
+        return True
+
+    def set_row_status(self, row, status, timestamp):
+        """Set the status of one loaded row, moving the counters, e.g. to revert an edit that was not saved"""
+        self.counts.move(row.course, row.status, status)
+        row.status = status
+        row.timestamp = timestamp
+        for key in self._by_student.get(row.student_id, ()):
+            if self._all_rows[key] is row:
+                self._index.update_facet(key, 'status', status)
+        for position in self._positions.get(row.student_id, ()):
+            if self._rows[position] is row:
+                self._emit_row_changed(position)
+        self.counts_changed.emit()
+
+    def update_student_status(self, student_id, status, timestamp=None):
+        """Patch every loaded row of a student without going back to the database"""
+        keys = self._by_student.get(student_id, ())
+        if timestamp is None:
+            timestamp = datetime.now().replace(microsecond=0)
+        for key in keys:
+            row = self._all_rows[key]
+            self.counts.move(row.course, row.status, status)
+            row.status = status
+            row.timestamp = timestamp
+            self._index.update_facet(key, 'status', status)
+        for position in self._positions.get(student_id, ()):
+            self._emit_row_changed(position)
+        if keys:
+            self.counts_changed.emit()
+        return len(keys)
+
+    def apply_changes(self, rows):
+        """Patch changed rows from another station into the model, appending unknown ones"""
+        changed = 0
+        new_rows = []
+        for incoming in rows:
+            for key in self._by_student.get(incoming.student_id, ()):
+                row = self._all_rows[key]
+                if row.record_id == incoming.record_id:
+                    break
+            else:
+                new_rows.append(incoming)
+                continue
+            if row.status == incoming.status and row.timestamp == incoming.timestamp:
+                continue
+            self.counts.move(row.course, row.status, incoming.status)
+            row.status = incoming.status
+            row.timestamp = incoming.timestamp
+            self._index.update_facet(key, 'status', incoming.status)
+            for position in self._positions.get(row.student_id, ()):
+                if self._rows[position] is row:
+                    self._emit_row_changed(position)
+            changed += 1
+        for row in new_rows:
+            self.counts.add(row.course, row.status)
+        self.append_rows(new_rows)
+        if changed or new_rows:
+            self.counts_changed.emit()
+        return changed + len(new_rows)
+
+    def _emit_row_changed(self, position):
+        """Notify views that the timestamp and status cells of a row changed"""
+        self.dataChanged.emit(
+            self.index(position, self.TIMESTAMP_COLUMN),
+            self.index(position, self.STATUS_COLUMN),
+            [Qt.DisplayRole, Qt.EditRole]
+        )
+
+
+class StatusDelegate(QStyledItemDelegate):
+    """Delegate that only creates a status combo box while a cell is being edited"""
+
+    def createEditor(self, parent, option, index):
+        editor = QComboBox(parent)
+        editor.addItems(ATTENDANCE_STATUSES)
+        editor.activated.connect(lambda _: self._commit_and_close(editor))
+        return editor
+
+    def setEditorData(self, editor, index):
+        editor.setCurrentText(index.data(Qt.EditRole))
+
+    def setModelData(self, editor, model, index):
+        model.setData(index, editor.currentText(), Qt.EditRole)
+
+    def updateEditorGeometry(self, editor, option, index):
+        editor.setGeometry(option.rect)
+
+    def _commit_and_close(self, editor):
+        """Write the chosen status back as soon as the user picks one"""
+        self.commitData.emit(editor)
+        self.closeEditor.emit(editor)
@@ -0,0 +1,118 @@
+"""
+Tests for batch_ingest and the video decode task it runs in the process pool
+
+Run with: python -m unittest test_batch_ingest
+"""
+
+import unittest
+from unittest import mock
+
+import cv2
+
+import batch_ingest
+import pool_tasks
+
+
+class FakeCapture:
+    """cv2.VideoCapture stand-in for a stream that does not report its frame count"""
+
+    def __init__(self, frames, fps=30.0, frame_count=0):
+        self.frames = list(frames)
+        self.properties = {cv2.CAP_PROP_FPS: fps, cv2.CAP_PROP_FRAME_COUNT: frame_count}
+        self.position = 0
+        self.released = False
+
+    def isOpened(self):
+        return True
+
+    def get(self, prop):
+        return self.properties.get(prop, 0)
+
+    def set(self, prop, value):
+        self.position = int(value)
+        return True
+
+    def grab(self):
+        if self.position >= len(self.frames):
+            return False
+        self.position += 1
+        return True
+
+    def read(self):
+        if self.position >= len(self.frames):
+            return False, None
+        frame = self.frames[self.position]
+        self.position += 1
+        return True, frame
+
+    def release(self):
+        self.released = True
+
+
+class UnknownFrameCountTest(unittest.TestCase):
+    def test_segments_fall_back_to_one_open_ended_segment(self):
+        for frame_count in (0, -1):
+            capture = FakeCapture([], frame_count=frame_count)
+            with mock.patch('cv2.VideoCapture', return_value=capture):
+                segments = batch_ingest._video_segments('stream.webm', 4, 6.0)
+            self.assertEqual(segments, [('stream.webm', 0, None, 5)])
+            self.assertTrue(capture.released)
+
+    def test_open_ended_segment_reads_until_the_capture_runs_out(self):
+        # Frames are labelled with the ID they would decode to; sampled every 5th frame
+        capture = FakeCapture([f"ID-{index}" for index in range(12)])
+        with mock.patch('cv2.VideoCapture', return_value=capture), \
+                mock.patch('qr_decode.student_ids', side_effect=lambda frame: [frame]):
+            frames, found = pool_tasks.decode_video_segment('stream.webm', 0, None, 5)
+        self.assertEqual(frames, 3)
+        self.assertEqual(found, {
+            'ID-0': ('stream.webm', 0.0),
+            'ID-5': ('stream.webm', 0.2),
+            'ID-10': ('stream.webm', 0.3),
+        })
+        self.assertTrue(capture.released)
+
+
+class FakeDatabase:
+    """The slice of DatabaseManager that ingest() uses"""
+
+    def __init__(self, roster, changed):
+        self.roster = roster
+        self.changed = changed
+        self.batches = []
+
+    def is_event_archived(self, record_id=None, event_id=None):
+        return False
+
+    def get_all_students(self):
+        return [{'student_id': student_id} for student_id in self.roster]
+
+    def mark_students_present_batch(self, checkins):
+        self.batches.append(checkins)
+        return self.changed
+
+
+class IngestCommitTest(unittest.TestCase):
+    def scan(self, *args):
+        result = batch_ingest.IngestResult()
+        result.found = {'A': ('a.png', None), 'B': ('b.png', None), 'X': ('x.png', None)}
+        return result
+
+    def test_committed_is_the_changed_row_count(self):
+        # B has no row in the record, so the batch changes only A's row
+        db = FakeDatabase(['A', 'B'], changed=1)
+        with mock.patch.object(batch_ingest, 'scan_sources', self.scan):
+            result = batch_ingest.ingest(db, 7, ['scans'])
+        self.assertEqual([checkin[:2] for checkin in db.batches[0]], [('A', 7), ('B', 7)])
+        self.assertEqual(result.committed, 1)
+        self.assertEqual(sorted(result.unknown), ['X'])
+
+    def test_rejected_batch_raises(self):
+        db = FakeDatabase(['A'], changed=None)
+        with mock.patch.object(batch_ingest, 'scan_sources', self.scan):
+            with self.assertRaises(RuntimeError):
+                batch_ingest.ingest(db, 7, ['scans'])
+
+
+if __name__ == '__main__':
+    unittest.main()
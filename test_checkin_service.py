@@ -0,0 +1,59 @@
+"""
+Tests for the check-in service's validation and writer, against the in-memory store
+
+Run with: python -m unittest test_checkin_service
+"""
+
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from checkin_service import SCAN_TO_COMMIT_SECONDS, CheckinService, MemoryStore, parse_checkin
+
+
+def service_for(store):
+    service = CheckinService(lambda: store, flush_interval=0.05, dead_letter_file='')
+    service.roster = frozenset(student['student_id'] for student in store.students)
+    return service
+
+
+class ParseCheckinTest(unittest.TestCase):
+    def test_timestamp_with_an_offset_becomes_naive_local_time(self):
+        moment = datetime(2026, 10, 19, 9, 30, 15, 250000, tzinfo=timezone(timedelta(hours=-5)))
+        checkin = parse_checkin({'student_id': 'S1', 'event_id': 1, 'timestamp': moment.isoformat()})
+        self.assertIsNone(checkin[3].tzinfo)
+        self.assertEqual(checkin[3], moment.astimezone().replace(tzinfo=None))
+
+    def test_naive_timestamp_is_kept_with_its_milliseconds(self):
+        checkin = parse_checkin({'student_id': 'S1', 'event_id': 1, 'timestamp': '2026-10-19T09:30:15.250'})
+        self.assertEqual(checkin[3], datetime(2026, 10, 19, 9, 30, 15, 250000))
+
+
+class WriterTest(unittest.TestCase):
+    def test_commit_stores_whole_seconds_and_observes_scan_to_commit(self):
+        store = MemoryStore()
+        service = service_for(store)
+        scanned_at = datetime.now() - timedelta(seconds=2)
+        count_before = SCAN_TO_COMMIT_SECONDS.totals()[0]
+        service.submit([{'student_id': '2023-0001', 'record_id': 1, 'timestamp': scanned_at.isoformat()}])
+        service._commit(store, service._take_batch())
+        self.assertEqual(service.committed, 1)
+        self.assertEqual(store.attendance[(1, '2023-0001')], ('Present', scanned_at.replace(microsecond=0)))
+        self.assertEqual(SCAN_TO_COMMIT_SECONDS.totals()[0], count_before + 1)
+        self.assertGreaterEqual(SCAN_TO_COMMIT_SECONDS.snapshot()[2], 2)
+
+    def test_archived_checkins_are_dead_lettered_and_the_rest_committed(self):
+        store = MemoryStore(records={1: 1, 2: 2}, archived_events={2})
+        service = service_for(store)
+        service.submit([{'student_id': '2023-0001', 'record_id': 1},
+                        {'student_id': '2023-0002', 'record_id': 2},
+                        {'student_id': '2023-0003', 'event_id': 2}])
+        service._commit(store, service._take_batch())
+        self.assertEqual(service.committed, 1)
+        self.assertEqual(service.dead_letters, 2)
+        self.assertEqual(service.queue.qsize(), 0)
+        self.assertEqual(store.attendance[(1, '2023-0001')][0], 'Present')
+        self.assertEqual(store.attendance[(2, '2023-0002')][0], 'Absent')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+"""
+Tests for DatabaseManager against a scripted stand-in for the pymysql connection
+
+Run with: python -m unittest test_database
+"""
+
+import unittest
+from unittest import mock
+
+import pymysql
+
+import database
+from database import DatabaseManager
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.result = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        query = " ".join(query.split())
+        self.conn.statements.append((query, params))
+        for fragment, result in self.conn.responses:
+            if fragment in query:
+                if isinstance(result, Exception):
+                    raise result
+                self.result = list(result)
+                return len(self.result)
+        self.result = []
+        return self.conn.rowcount
+
+    def executemany(self, query, params):
+        return sum(self.execute(query, row) or 0 for row in params)
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+    def fetchall(self):
+        return self.result
+
+
+class FakeConnection:
+    """Records statements; responses are (query fragment, rows or exception) pairs"""
+
+    def __init__(self, responses=(), rowcount=0):
+        self.responses = list(responses)
+        self.rowcount = rowcount
+        self.statements = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self, cursorclass=None):
+        return FakeCursor(self)
+
+    def begin(self):
+        pass
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def queries(self, fragment):
+        return [query for query, params in self.statements if fragment in query]
+
+
+def manager(conn):
+    """A DatabaseManager on a fake connection, skipping the connect in __init__"""
+    db = DatabaseManager.__new__(DatabaseManager)
+    db.conn = conn
+    return db
+
+
+class EventCountsTest(unittest.TestCase):
+    @mock.patch.object(DatabaseManager, '_event_counts_live', False)
+    def test_triggers_are_created_and_counts_backfilled_once(self):
+        conn = FakeConnection([('information_schema.triggers', [])])
+        manager(conn)._ensure_event_count_triggers()
+        self.assertEqual(len(conn.queries('CREATE TRIGGER')), len(database.EVENT_COUNT_TRIGGERS))
+        self.assertEqual(len(conn.queries('REPLACE INTO EventCounts')), 1)
+        self.assertTrue(DatabaseManager._event_counts_live)
+
+        conn = FakeConnection([('information_schema.triggers', [(1,)])])
+        manager(conn)._ensure_event_count_triggers()
+        self.assertEqual(conn.queries('CREATE TRIGGER') + conn.queries('REPLACE INTO'), [])
+
+    def test_events_page_joins_event_counts_when_the_triggers_exist(self):
+        conn = FakeConnection()
+        with mock.patch.object(DatabaseManager, '_event_counts_live', True):
+            manager(conn).get_events_page(limit=10, compact=True)
+        query = conn.statements[-1][0]
+        self.assertIn('LEFT JOIN EventCounts ec', query)
+        self.assertNotIn('COUNT(*)', query)
+
+    def test_events_page_counts_on_read_without_the_triggers(self):
+        conn = FakeConnection([('information_schema.triggers', []),
+                               ('CREATE TRIGGER', pymysql.err.OperationalError(1419, "no SUPER privilege"))])
+        with mock.patch.object(DatabaseManager, '_event_counts_live', True):
+            db = manager(conn)
+            db._ensure_event_count_triggers()
+            db.get_events_page(limit=10, compact=True)
+        query = conn.statements[-1][0]
+        self.assertNotIn('EventCounts', query)
+        self.assertIn('COUNT(*)', query)
+
+
+class ArchivedEventWritesTest(unittest.TestCase):
+    def test_status_update_on_an_archived_event_raises(self):
+        conn = FakeConnection([('FROM EventSummaries WHERE event_id', [{'1': 1}])])
+        db = manager(conn)
+        with self.assertRaises(database.ArchivedEventError):
+            db.update_attendance_status(3, 'S1', 'Excused')
+        with self.assertRaises(database.ArchivedEventError):
+            db.mark_student_present(3, 'S1')
+        self.assertEqual(conn.queries('UPDATE Attendance'), [])
+
+    def test_status_update_on_a_live_event_is_written(self):
+        conn = FakeConnection(rowcount=1)
+        self.assertTrue(manager(conn).mark_student_present(3, 'S1'))
+        self.assertEqual(len(conn.queries('UPDATE Attendance')), 1)
+
+    def test_batch_with_archived_events_raises_and_writes_nothing(self):
+        # Record 10 belongs to an archived event, as does event 4
+        conn = FakeConnection([('JOIN EventSummaries es', [(10,)]),
+                               ('FROM EventSummaries WHERE event_id IN', [(4,)])])
+        checkins = [('S1', 10, None, 't'), ('S2', 11, None, 't'), ('S3', None, 4, 't'), ('S4', None, 5, 't')]
+        with self.assertRaises(database.ArchivedEventError) as caught:
+            manager(conn).mark_students_present_batch(checkins)
+        self.assertEqual(caught.exception.checkins, [checkins[0], checkins[2]])
+        self.assertEqual(conn.queries('UPDATE Attendance'), [])
+
+    def test_batch_on_live_events_is_written(self):
+        conn = FakeConnection(rowcount=1)
+        changed = manager(conn).mark_students_present_batch([('S1', 10, None, 't'), ('S2', None, 5, 't')])
+        self.assertEqual(changed, 2)
+        self.assertEqual(conn.commits, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
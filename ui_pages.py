@@ -4,10 +4,41 @@ UI page components for the Attendance Management System
 
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
                              QLabel, QTableWidget, QTableWidgetItem, QComboBox, 
-                             QLineEdit, QHeaderView, QAbstractItemView)
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QFont
-from config import BUTTON_STYLE, ATTENDANCE_STATUSES
+                             QLineEdit, QHeaderView, QAbstractItemView, QTableView, QDateEdit)
+from PyQt5.QtCore import Qt, QTimer, QDate
+from PyQt5.QtGui import QFont, QPainter
+from config import BUTTON_STYLE, ATTENDANCE_STATUSES, SEARCH_DEBOUNCE_MS, ATTENDANCE_POLL_INTERVAL
+from table_models import AttendanceTableModel, EventTableModel, StudentTableModel, StatusDelegate
+from metrics import REGISTRY
+
+
+def metrics_summary():
+    """Return a one-line summary of the scanner and database metrics"""
+    parts = []
+    fps = REGISTRY.get('attendance_camera_fps')
+    if fps is not None:
+        parts.append(f"FPS {fps.value():.1f}")
+    for name, label in (('attendance_qr_decode_seconds', "decode"),
+                        ('attendance_scan_to_commit_seconds', "scan→commit"),
+                        ('attendance_db_query_seconds', "DB avg")):
+        histogram = REGISTRY.get(name)
+        if histogram is not None:
+            count, total = histogram.totals()
+            if count:
+                parts.append(f"{label} {total / count * 1000:.1f} ms")
+    scans = REGISTRY.get('attendance_scans_total')
+    if scans is not None:
+        parts.append(f"scans {scans.value(outcome='committed')}, duplicates {scans.value(outcome='duplicate')}")
+    return " | ".join(parts)
+
+
+def make_debounce_timer(parent, callback):
+    """Create a single-shot timer that fires callback once typing pauses"""
+    timer = QTimer(parent)
+    timer.setSingleShot(True)
+    timer.setInterval(SEARCH_DEBOUNCE_MS)
+    timer.timeout.connect(callback)
+    return timer
 
 
 class MainPage(QWidget):
@@ -85,21 +116,84 @@ class EventsPage(QWidget):
         add_event_layout.addWidget(self.event_name_input)
         add_event_layout.addWidget(add_event_btn)
         
+        # Filters, applied by the database query
+        filter_layout = QHBoxLayout()
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Search events by name...")
+        self.search_timer = make_debounce_timer(self, self.parent.populate_events_table)
+        self.search_input.textChanged.connect(self.search_timer.start)
+        
+        self.date_from = self.make_date_filter()
+        self.date_to = self.make_date_filter()
+        
+        self.order_combo = QComboBox()
+        self.order_combo.addItem("Newest first", 'newest')
+        self.order_combo.addItem("Oldest first", 'oldest')
+        self.order_combo.addItem("Name A-Z", 'name')
+        self.order_combo.currentIndexChanged.connect(self.parent.populate_events_table)
+        
+        filter_layout.addWidget(QLabel("Search:"))
+        filter_layout.addWidget(self.search_input)
+        filter_layout.addWidget(QLabel("From:"))
+        filter_layout.addWidget(self.date_from)
+        filter_layout.addWidget(QLabel("To:"))
+        filter_layout.addWidget(self.date_to)
+        filter_layout.addWidget(self.order_combo)
+        
         # Events table
-        self.events_table = QTableWidget()
-        self.events_table.setColumnCount(2)
-        self.events_table.setHorizontalHeaderLabels(["Event Name", "Date Created"])
+        self.events_model = EventTableModel(self)
+        self.events_table = QTableView()
+        self.events_table.setModel(self.events_model)
         self.events_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.events_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         self.events_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
-        self.events_table.cellDoubleClicked.connect(self.parent.view_event_records)
+        self.events_table.doubleClicked.connect(lambda index: self.parent.view_event_records(index.row()))
+        self.events_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        
+        # Archive section
+        archive_layout = QHBoxLayout()
+        archive_btn = QPushButton("Archive Selected Event")
+        archive_btn.clicked.connect(self.parent.archive_selected_event)
+        restore_btn = QPushButton("Restore Selected Event")
+        restore_btn.clicked.connect(self.parent.restore_selected_event)
+        
+        archive_layout.addWidget(archive_btn)
+        archive_layout.addWidget(restore_btn)
         
         # Layout
         layout.addWidget(back_btn)
         layout.addWidget(title)
         layout.addLayout(add_event_layout)
+        layout.addLayout(filter_layout)
         layout.addWidget(self.events_table)
+        layout.addLayout(archive_layout)
         
         self.setLayout(layout)
+    
+    def make_date_filter(self):
+        """Create a date picker whose minimum date stands for no limit, refreshing through search_timer"""
+        date_edit = QDateEdit()
+        date_edit.setCalendarPopup(True)
+        date_edit.setDisplayFormat("yyyy-MM-dd")
+        date_edit.setMinimumDate(QDate(2000, 1, 1))
+        date_edit.setSpecialValueText("Any")
+        date_edit.setDate(date_edit.minimumDate())
+        # Typing a date changes it once per digit; query once the typing pauses, as for the name search
+        date_edit.dateChanged.connect(self.search_timer.start)
+        return date_edit
+    
+    def filters(self):
+        """Return the name, date range and order filters as get_events_page keyword arguments"""
+        def picked(date_edit):
+            date = date_edit.date()
+            return None if date == date_edit.minimumDate() else date.toPyDate()
+        
+        return {
+            'name': self.search_input.text().strip() or None,
+            'date_from': picked(self.date_from),
+            'date_to': picked(self.date_to),
+            'order': self.order_combo.currentData(),
+        }
 
 
 class RecordsPage(QWidget):
@@ -136,6 +230,10 @@ class RecordsPage(QWidget):
         add_record_layout.addWidget(self.record_name_input)
         add_record_layout.addWidget(add_record_btn)
         
+        # Whole-event export button
+        export_summary_btn = QPushButton("Export Event Summary to Excel")
+        export_summary_btn.clicked.connect(self.parent.export_event_summary_to_excel)
+        
         # Records table
         self.records_table = QTableWidget()
         self.records_table.setColumnCount(2)
@@ -148,6 +246,7 @@ class RecordsPage(QWidget):
         layout.addWidget(back_btn)
         layout.addWidget(self.records_title)
         layout.addLayout(add_record_layout)
+        layout.addWidget(export_summary_btn)
         layout.addWidget(self.records_table)
         
         self.setLayout(layout)
@@ -181,7 +280,8 @@ class MasterlistPage(QWidget):
         search_layout = QHBoxLayout()
         self.masterlist_search_input = QLineEdit()
         self.masterlist_search_input.setPlaceholderText("Search by ID, Name, Year Level, or Course...")
-        self.masterlist_search_input.textChanged.connect(self.parent.filter_masterlist_table)
+        self.masterlist_search_timer = make_debounce_timer(self, self.parent.filter_masterlist_table)
+        self.masterlist_search_input.textChanged.connect(self.masterlist_search_timer.start)
         
         search_layout.addWidget(QLabel("Search:"))
         search_layout.addWidget(self.masterlist_search_input)
@@ -192,15 +292,20 @@ class MasterlistPage(QWidget):
         generate_qr_btn = QPushButton("Generate QR Codes for All Students")
         generate_qr_btn.setStyleSheet(BUTTON_STYLE)
         generate_qr_btn.clicked.connect(self.parent.generate_qr_codes_for_all_students)
+        sync_roster_btn = QPushButton("Sync Roster from CSV")
+        sync_roster_btn.setStyleSheet(BUTTON_STYLE)
+        sync_roster_btn.clicked.connect(self.parent.sync_roster_from_csv)
         qr_btn_layout.addStretch()
+        qr_btn_layout.addWidget(sync_roster_btn)
         qr_btn_layout.addWidget(generate_qr_btn)
         qr_btn_layout.addStretch()
         
         # Masterlist table
-        self.masterlist_table = QTableWidget()
-        self.masterlist_table.setColumnCount(4)
-        self.masterlist_table.setHorizontalHeaderLabels(["Student ID", "First Name", "Year Level", "Course"])
+        self.masterlist_model = StudentTableModel(self)
+        self.masterlist_table = QTableView()
+        self.masterlist_table.setModel(self.masterlist_model)
         self.masterlist_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.masterlist_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         self.masterlist_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         
         # Layout
@@ -233,16 +338,24 @@ class AttendancePage(QWidget):
         title_font.setBold(True)
         self.attendance_title.setFont(title_font)
         
+        # Live attendance counter, course breakdown in the tooltip
+        self.counts_label = QLabel()
+        self.counts_label.setAlignment(Qt.AlignCenter)
+        
         # Back button
         back_btn = QPushButton("Back to Records")
         back_btn.clicked.connect(lambda: self.parent.central_widget.setCurrentWidget(self.parent.records_page))
         
         # Check attendance button
-        check_attendance_btn = QPushButton("Check Attendance (Scan QR)")
-        check_attendance_btn.clicked.connect(self.parent.show_scanner_page)
+        self.check_attendance_btn = QPushButton("Check Attendance (Scan QR)")
+        self.check_attendance_btn.clicked.connect(self.parent.show_scanner_page)
+        
+        # Batch ingestion from photos or recordings
+        self.ingest_btn = QPushButton("Import Scans from Photos or Video")
+        self.ingest_btn.clicked.connect(self.parent.ingest_scans_for_record)
         
         # Export button
-        export_btn = QPushButton("Export to Excel")
+        export_btn = QPushButton("Export (Excel, CSV or Parquet)")
         export_btn.clicked.connect(self.parent.export_attendance_to_excel)
         
         # Search and filter section
@@ -251,7 +364,8 @@ class AttendancePage(QWidget):
         # Search bar
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Search by ID, Name, Year Level, or Course...")
-        self.search_input.textChanged.connect(self.parent.filter_attendance_table)
+        self.search_timer = make_debounce_timer(self, self.parent.filter_attendance_table)
+        self.search_input.textChanged.connect(self.search_timer.start)
         
         # Status filter dropdown
         self.status_filter = QComboBox()
@@ -266,20 +380,68 @@ class AttendancePage(QWidget):
         search_filter_layout.addStretch()
         
         # Attendance table
-        self.attendance_table = QTableWidget()
-        self.attendance_table.setColumnCount(6)
-        self.attendance_table.setHorizontalHeaderLabels(["Student ID", "First Name", "Year Level", "Course", "Timestamp", "Status"])
+        self.attendance_model = AttendanceTableModel(self)
+        self.attendance_table = QTableView()
+        self.attendance_table.setModel(self.attendance_model)
+        self.attendance_table.setItemDelegateForColumn(
+            AttendanceTableModel.STATUS_COLUMN, StatusDelegate(self.attendance_table)
+        )
+        self.attendance_table.setEditTriggers(
+            QAbstractItemView.DoubleClicked | QAbstractItemView.SelectedClicked | QAbstractItemView.EditKeyPressed
+        )
         self.attendance_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.attendance_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        
+        # Picks up check-ins made by other scanner stations
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(ATTENDANCE_POLL_INTERVAL)
+        self.poll_timer.timeout.connect(self.parent.poll_attendance_changes)
         
         # Layout
         layout.addWidget(back_btn)
         layout.addWidget(self.attendance_title)
-        layout.addWidget(check_attendance_btn)
+        layout.addWidget(self.counts_label)
+        layout.addWidget(self.check_attendance_btn)
+        layout.addWidget(self.ingest_btn)
         layout.addWidget(export_btn)
         layout.addLayout(search_filter_layout)
         layout.addWidget(self.attendance_table)
         
         self.setLayout(layout)
+    
+    def set_archived(self, archived):
+        """Make the page read-only while showing an archived event"""
+        self.attendance_model.editable = not archived
+        self.check_attendance_btn.setEnabled(not archived)
+        self.check_attendance_btn.setToolTip("Restore the event to scan attendance" if archived else "")
+        self.ingest_btn.setEnabled(not archived)
+
+
+class FrameView(QLabel):
+    """Label that paints a camera frame QImage directly, without a per-frame QPixmap"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._image = None
+    
+    def show_frame(self, image):
+        """Display image, which may be the same QImage updated in place, centred in the view"""
+        self._image = image
+        self.update()
+    
+    def clear_frame(self):
+        """Stop painting the last frame"""
+        self._image = None
+        self.update()
+    
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self._image is None:
+            return
+        painter = QPainter(self)
+        painter.drawImage((self.width() - self._image.width()) // 2,
+                          (self.height() - self._image.height()) // 2, self._image)
+        painter.end()
 
 
 class ScannerPage(QWidget):
@@ -302,12 +464,30 @@ class ScannerPage(QWidget):
         title_font.setBold(True)
         title.setFont(title_font)
         
+        # Live attendance counter
+        self.counts_label = QLabel()
+        self.counts_label.setAlignment(Qt.AlignCenter)
+        counts_font = QFont()
+        counts_font.setPointSize(14)
+        counts_font.setBold(True)
+        self.counts_label.setFont(counts_font)
+        
         # Camera display
-        self.camera_label = QLabel()
+        self.camera_label = FrameView()
         self.camera_label.setAlignment(Qt.AlignCenter)
         self.camera_label.setMinimumSize(640, 480)
         self.camera_label.setStyleSheet("border: 1px solid black; background-color: #eee;")
         
+        # Metrics overlay in the corner of the camera view
+        self.metrics_overlay = QLabel(self.camera_label)
+        self.metrics_overlay.setStyleSheet(
+            "background-color: rgba(0, 0, 0, 160); color: white; padding: 4px; font-size: 11px;"
+        )
+        self.metrics_overlay.move(6, 6)
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.setInterval(1000)
+        self.metrics_timer.timeout.connect(self.update_metrics_overlay)
+        
         # Status message
         self.scanner_status = QLabel("Point camera at QR code")
         self.scanner_status.setAlignment(Qt.AlignCenter)
@@ -318,8 +498,23 @@ class ScannerPage(QWidget):
         
         # Layout
         layout.addWidget(title)
+        layout.addWidget(self.counts_label)
         layout.addWidget(self.camera_label)
         layout.addWidget(self.scanner_status)
         layout.addWidget(back_btn)
         
         self.setLayout(layout)
+    
+    def update_metrics_overlay(self):
+        """Refresh the metrics overlay text"""
+        self.metrics_overlay.setText(metrics_summary() or "No metrics yet")
+        self.metrics_overlay.adjustSize()
+    
+    def showEvent(self, event):
+        self.update_metrics_overlay()
+        self.metrics_timer.start()
+        super().showEvent(event)
+    
+    def hideEvent(self, event):
+        self.metrics_timer.stop()
+        super().hideEvent(event)
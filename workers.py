@@ -0,0 +1,37 @@
+"""
+Background jobs for long-running operations of the Attendance Management System
+"""
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+class BackgroundJob(QThread):
+    """Runs job(progress, cancelled) on a worker thread and reports back through signals
+
+    The job calls progress(done, total) to report progress and polls cancelled()
+    to find out whether the user asked it to stop. Jobs that touch the database
+    must open their own DatabaseManager, since connections are not thread-safe.
+    """
+
+    progress = pyqtSignal(int, int)
+    succeeded = pyqtSignal(object)
+    failed = pyqtSignal(object)
+
+    def __init__(self, job, parent=None):
+        super().__init__(parent)
+        self._job = job
+
+    def run(self):
+        try:
+            result = self._job(self._report_progress, self.isInterruptionRequested)
+        except Exception as e:
+            self.failed.emit(e)
+        else:
+            self.succeeded.emit(result)
+
+    def _report_progress(self, done, total):
+        self.progress.emit(done, total or 0)
+
+    def cancel(self):
+        """Ask the job to stop at its next cancellation check"""
+        self.requestInterruption()